@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""日志
+
+基于标准库 logging，所有模块使用 get_logger(__name__) 得到 shigureai.* 下的记录器。
+日志始终写入内存环形缓冲区（帮助 -> 查看日志），可选写入 configs/ 下的滚动日志文件：
+  --log-level=DEBUG|INFO|WARNING|ERROR|OFF  或环境变量 SHIGUREAI_LOG_LEVEL
+  --log-file[=路径]                          或环境变量 SHIGUREAI_LOG_FILE（值为1时使用默认路径）
+消息使用 % 占位符延迟格式化，级别未开启时不会拼接字符串；
+循环中的调试日志应在循环外先判断 isEnabledFor(logging.DEBUG)。
+"""
+
+import collections
+import logging
+import logging.handlers
+import os
+import sys
+
+ROOT_LOGGER = 'shigureai'
+DEFAULT_LEVEL = logging.INFO
+RING_CAPACITY = 2000
+LOG_FILE = 'shigureai.log'
+LOG_FILE_MAX_BYTES = 1024 * 1024
+LOG_FILE_BACKUPS = 3
+LEVEL_ENV_VAR = 'SHIGUREAI_LOG_LEVEL'
+FILE_ENV_VAR = 'SHIGUREAI_LOG_FILE'
+LEVEL_FLAG = '--log-level'
+FILE_FLAG = '--log-file'
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+OFF = logging.CRITICAL + 10
+
+_ring_handler = None
+
+
+def get_logger(name):
+    """返回 shigureai 下的子记录器，name 一般为 __name__"""
+    if name == ROOT_LOGGER or name.startswith(ROOT_LOGGER + '.'):
+        return logging.getLogger(name)
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class RingBufferHandler(logging.Handler):
+    """只保留最近 capacity 条记录，记录在读取时才格式化"""
+
+    def __init__(self, capacity=RING_CAPACITY):
+        super().__init__()
+        self.records = collections.deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def lines(self, min_level=logging.NOTSET):
+        with self.lock:
+            records = list(self.records)
+        lines = []
+        for record in records:
+            if record.levelno < min_level:
+                continue
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                lines.append(f"{record.levelname} {record.name}: {record.msg!r} {record.args!r}")
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+
+def parse_level(value):
+    """把级别名称或数字转换为 logging 级别，无法识别时返回None"""
+    if value is None:
+        return None
+    value = str(value).strip().upper()
+    if value in ('OFF', 'NONE', '0'):
+        return OFF
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value)
+    return level if isinstance(level, int) else None
+
+
+def requested_options(argv=None, environ=None):
+    """从命令行与环境变量读取 (级别, 日志文件路径)；文件为''表示默认路径，None表示不写文件"""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    level = parse_level(environ.get(LEVEL_ENV_VAR))
+    log_file = environ.get(FILE_ENV_VAR) or None
+    if log_file == '1':
+        log_file = ''
+    for arg in argv[1:]:
+        if arg.startswith(LEVEL_FLAG + '='):
+            level = parse_level(arg.split('=', 1)[1])
+        elif arg == FILE_FLAG:
+            log_file = ''
+        elif arg.startswith(FILE_FLAG + '='):
+            log_file = arg.split('=', 1)[1]
+    return level, log_file
+
+
+def setup_logging(level=None, log_file=None, log_dir=None):
+    """配置 shigureai 记录器，重复调用时替换之前的处理器，返回记录器
+
+    log_file 为''时写入 log_dir/shigureai.log。
+    """
+    global _ring_handler
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    logger.setLevel(DEFAULT_LEVEL if level is None else level)
+    logger.propagate = False
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    _ring_handler = RingBufferHandler()
+    _ring_handler.setFormatter(formatter)
+    logger.addHandler(_ring_handler)
+
+    if log_file is not None:
+        if not log_file:
+            log_file = os.path.join(log_dir or '.', LOG_FILE)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            logger.addHandler(file_handler)
+        except OSError as e:
+            logger.warning("无法打开日志文件 %s: %s", log_file, e)
+
+    # 显式指定级别时同时输出到控制台，便于开发调试（打包后没有控制台）
+    if level is not None and level < OFF and sys.stderr is not None:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        logger.addHandler(console_handler)
+    return logger
+
+
+def ring_buffer():
+    """返回内存环形缓冲区处理器，尚未配置日志时返回None"""
+    return _ring_handler
+
+
+def log_file_paths():
+    """返回当前写入的日志文件路径"""
+    return [handler.baseFilename for handler in logging.getLogger(ROOT_LOGGER).handlers
+            if isinstance(handler, logging.FileHandler)]
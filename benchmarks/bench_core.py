@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""核心路径性能基准
+
+运行全部基准并与已保存的基线比较：
+    python benchmarks/bench_core.py
+保存当前结果为基线：
+    python benchmarks/bench_core.py --save-baseline
+只比较（不重新保存），超过阈值时返回非零退出码：
+    python benchmarks/bench_core.py --compare --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import synthetic  # noqa: E402
+import favor_core  # noqa: E402
+from data_models import load_csv_data  # noqa: E402
+from favor_calculator import FavorCalculator  # noqa: E402
+from import_manager import parse_import_profiles, PARALLEL_PARSE_THRESHOLD  # noqa: E402
+from config_manager import ConfigManager  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+BACV_SIZES = (1000, 10000, 100000, 1000000)
+QUICK_BACV_SIZES = (1000, 10000)
+PARALLEL_PROFILES = 8
+CATALOG_SIZES = (52, 1000, 10000)
+CONFIG_STUDENTS = 10000
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """返回单次调用耗时（秒）的最小值与中位数，短调用自动多次循环"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 4
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+    return {'min': min(samples), 'median': statistics.median(samples), 'loops': number}
+
+
+def _config_parent(configs, catalog):
+    noop = lambda *args, **kwargs: None  # noqa: E731
+    return SimpleNamespace(student_configs=configs, current_config=next(iter(configs), None), gift_catalog=catalog,
+                           config_combo=SimpleNamespace(blockSignals=noop), update_config_combo=noop,
+                           update_special_gifts_display=noop, load_config=noop, config_watcher=None)
+
+
+def run_benchmarks(work_dir, quick=False, log=print):
+    results = {}
+
+    def record(name, func, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            timing = measure(func, **kwargs)
+        results[name] = timing
+        log(f"{name:<48} {timing['min'] * 1000:>12.3f} ms  (x{timing['loops']})")
+
+    # 礼物表与等级表
+    catalogs = {}
+    for size in CATALOG_SIZES:
+        path = os.path.join(work_dir, f'gifts_{size}.csv')
+        catalogs[size] = synthetic.make_gift_catalog(path, size)
+        record(f'load_csv_data/gifts_{size}', lambda p=path: load_csv_data(p))
+
+    for size in (100, 10000):
+        path = os.path.join(work_dir, f'levels_{size}.csv')
+        synthetic.make_level_table(path, size)
+        holder = SimpleNamespace(levels_data=load_csv_data(path))
+        record(f'_precompute_levels/levels_{size}',
+               lambda h=holder: FavorCalculator._precompute_levels(h))
+
+        lookups = [h_exp + 7 for _, h_exp in holder.level_list]
+        searcher = SimpleNamespace(level_list=holder.level_list, current_level=1)
+
+        def search_all(s=searcher, values=lookups):
+            for total_exp in values:
+                FavorCalculator._find_target_level_binary(s, total_exp)
+        record(f'_find_target_level_binary/levels_{size}_x{len(lookups)}', search_all)
+
+    # bacv解析：与导入线程调用的是同一个函数（含校验）
+    gift_ids = [gift_id for gift_id, _ in catalogs[52]]
+    known_gift_ids = frozenset(gift_ids)
+    for size in (QUICK_BACV_SIZES if quick else BACV_SIZES):
+        content = synthetic.make_bacv(size, gift_ids)
+        repeat = 3 if size >= 100000 else 5
+        record(f'parse_import_profiles/json_{size}',
+               lambda c=content: parse_import_profiles(c, known_gift_ids), repeat=repeat)
+        del content
+
+        content = synthetic.make_regex_only_text(size, gift_ids)
+        record(f'parse_import_profiles/regex_{size}',
+               lambda c=content: parse_import_profiles(c, known_gift_ids), repeat=repeat)
+        del content
+
+    if not quick:
+        # 超过阈值的多账号文件走进程池并行解析
+        per_profile = 100000
+        content = synthetic.make_bacv(per_profile, gift_ids, n_profiles=PARALLEL_PROFILES)
+        while len(content) < PARALLEL_PARSE_THRESHOLD:
+            per_profile *= 2
+            content = synthetic.make_bacv(per_profile, gift_ids, n_profiles=PARALLEL_PROFILES)
+        record(f'parse_import_profiles/parallel_{PARALLEL_PROFILES}x{per_profile}',
+               lambda c=content: parse_import_profiles(c, known_gift_ids), repeat=3)
+        del content
+
+    # 配置保存与加载
+    gift_catalog = favor_core.GiftCatalog(catalogs[52])
+    configs = {name: favor_core.normalize_config(config, gift_catalog)
+               for name, config in synthetic.make_student_configs(CONFIG_STUDENTS, catalogs[52]).items()}
+    saved_argv0 = sys.argv[0]
+    sys.argv[0] = os.path.join(work_dir, 'bench.py')  # 配置目录跟随 argv[0]
+    try:
+        saver = ConfigManager(_config_parent(configs, gift_catalog))
+        record(f'save_all_configs/students_{CONFIG_STUDENTS}', saver.save_all_configs, repeat=3)
+        loader = ConfigManager(_config_parent({}, gift_catalog))
+        record(f'load_last_config/students_{CONFIG_STUDENTS}', loader.load_last_config, repeat=3)
+    finally:
+        sys.argv[0] = saved_argv0
+
+    # 计算循环
+    level_exp_cache, level_list = favor_core.build_level_table(
+        load_csv_data(os.path.join(os.path.dirname(BENCH_DIR), 'exp.csv')))
+    for size in CATALOG_SIZES:
+        catalog = favor_core.GiftCatalog(catalogs[size])
+        quantities = {gift_id: 3 for gift_id in catalog}
+        config = favor_core.normalize_config(
+            next(iter(synthetic.make_student_configs(1, catalogs[size]).values())), catalog)
+        record(f'calculate_favor/gifts_{size}',
+               lambda g=catalog, q=quantities, c=config: favor_core.calculate_favor(
+                   level_exp_cache, level_list, g, q, 1, 0, c, False))
+
+    def roster_pass():
+        for config in configs.values():
+            favor_core.calculate_favor(level_exp_cache, level_list, gift_catalog,
+                                       config['gift_quantities'], config['start_level'],
+                                       config['start_exp'], config, config['is_linked_student'])
+    record(f'calculate_favor/roster_{CONFIG_STUDENTS}', roster_pass, repeat=3)
+
+    return results
+
+
+def compare(current, baseline, threshold):
+    """返回 [(名称, 基线, 当前, 比值)]，只包含超过阈值的项目"""
+    regressions = []
+    for name, timing in current.items():
+        base = baseline.get(name)
+        if not base or base['min'] <= 0:
+            continue
+        ratio = timing['min'] / base['min']
+        if ratio > 1 + threshold:
+            regressions.append((name, base['min'], timing['min'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ShigureAI 核心路径基准测试")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果保存为基线")
+    parser.add_argument('--compare', action='store_true', help="与基线比较，有回退时返回1")
+    parser.add_argument('--threshold', type=float, default=0.2, help="允许的变慢比例，默认0.2")
+    parser.add_argument('--quick', action='store_true', help="跳过10万与100万条目的bacv")
+    parser.add_argument('--output', help="把本次结果另存为JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='shigure_bench_') as work_dir:
+        results = run_benchmarks(work_dir, quick=args.quick)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n未找到基线文件 {args.baseline}，使用 --save-baseline 生成")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"\n与基线相比无超过 {args.threshold:.0%} 的回退")
+        return 0
+
+    print(f"\n发现 {len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）：")
+    for name, base, current, ratio in regressions:
+        print(f"  {name:<48} {base * 1000:.3f} ms -> {current * 1000:.3f} ms  (x{ratio:.2f})")
+    return 1 if args.compare else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
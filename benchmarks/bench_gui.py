@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""界面交互延迟基准（无头运行，QT_QPA_PLATFORM=offscreen）
+
+    python benchmarks/bench_gui.py
+    python benchmarks/bench_gui.py --configs 500 --repeat 20 --output gui.json
+    python benchmarks/bench_gui.py --save-baseline / --compare
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from PyQt5.QtWidgets import QApplication, QProgressDialog  # noqa: E402
+from PyQt5.QtCore import Qt, QObject, QEvent, QTimer  # noqa: E402
+from PyQt5.QtTest import QTest  # noqa: E402
+
+import synthetic  # noqa: E402
+from bench_core import compare  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'gui_baseline.json')
+WAIT_TIMEOUT = 10.0
+
+
+class PaintWatcher(QObject):
+    """记录窗口第一次绘制的时间"""
+
+    def __init__(self):
+        super().__init__()
+        self.painted_at = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.painted_at is None:
+            self.painted_at = time.perf_counter()
+        return False
+
+
+class ModalCloser:
+    """轮询模态窗口，出现时记录时间并关闭，代替用户点击"""
+
+    def __init__(self, app):
+        self.app = app
+        self.opened_at = None
+        self.titles = []
+        self._timer = QTimer()
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._poll)
+
+    def start(self):
+        self.opened_at = None
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _poll(self):
+        widget = self.app.activeModalWidget()
+        if widget is None or not widget.isVisible() or isinstance(widget, QProgressDialog):
+            return
+        if self.opened_at is None:
+            self.opened_at = time.perf_counter()
+        self.titles.append(widget.windowTitle())
+        widget.close()
+
+
+def wait_until(app, condition, timeout=WAIT_TIMEOUT):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("等待界面响应超时")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def settle(app, rounds=3):
+    for _ in range(rounds):
+        app.processEvents()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def object_counts(app, window):
+    return {'widgets': len(app.allWidgets()), 'objects': len(window.findChildren(QObject)) + 1}
+
+
+def summarize(samples):
+    samples_ms = [s * 1000 for s in samples]
+    return {'min': min(samples), 'median': statistics.median(samples),
+            'max_ms': round(max(samples_ms), 3), 'samples': len(samples)}
+
+
+def run_benchmarks(app, work_dir, n_configs=200, repeat=10, log=print):
+    # 配置目录跟随 argv[0]，放到临时目录避免污染真实配置
+    sys.argv[0] = os.path.join(work_dir, 'bench_gui.py')
+    gift_catalog = synthetic.make_gift_catalog(os.path.join(work_dir, 'gifts.csv'), 52)
+    from data_models import load_csv_data
+    from utils import resource_path
+    real_ids = [int(row['ID']) for row in load_csv_data(resource_path('giftID.csv'))]
+    gift_catalog = [(real_ids[i % len(real_ids)], favor) for i, (_, favor) in enumerate(gift_catalog)]
+    configs = synthetic.make_student_configs(n_configs, gift_catalog)
+    synthetic.write_config_file(os.path.join(work_dir, 'configs', 'config.json'), configs)
+
+    from favor_calculator import FavorCalculator
+
+    results = {}
+    counts = {}
+    closer = ModalCloser(app)
+
+    def record(name, samples, window):
+        results[name] = summarize(samples)
+        counts[name] = object_counts(app, window)
+        timing = results[name]
+        log(f"{name:<36} median {timing['median'] * 1000:>9.3f} ms  max {timing['max_ms']:>9.3f} ms  "
+            f"widgets {counts[name]['widgets']:>6}  objects {counts[name]['objects']:>6}")
+
+    # 启动到首次绘制，以及到礼物格子、配置与首次计算全部完成
+    samples = []
+    ready_samples = []
+    window = None
+    for _ in range(max(1, repeat // 2)):
+        if window is not None:
+            window.close()
+            window.deleteLater()
+            settle(app)
+        watcher = PaintWatcher()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            window = FavorCalculator()
+            window.installEventFilter(watcher)
+            window.show()
+            wait_until(app, lambda: watcher.painted_at is not None)
+            wait_until(app, lambda: window.startup_complete)
+        samples.append(watcher.painted_at - started)
+        ready_samples.append(time.perf_counter() - started)
+        window.removeEventFilter(watcher)
+    settle(app)
+    record('launch_to_first_paint', samples, window)
+    record('launch_to_ready', ready_samples, window)
+
+    # 在礼物数量输入框中输入（含防抖延迟）
+    samples = []
+    spinboxes = [info['spinbox'] for info in window.gift_inputs.values()]
+    for i in range(repeat):
+        spinbox = spinboxes[i % len(spinboxes)]
+        before = window.result_text.toPlainText()
+        spinbox.setFocus()
+        spinbox.selectAll()
+        started = time.perf_counter()
+        QTest.keyClicks(spinbox, str(100 + i))
+        wait_until(app, lambda: window.result_text.toPlainText() != before)
+        samples.append(time.perf_counter() - started)
+    record('type_gift_quantity', samples, window)
+
+    # 切换配置
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        window.config_combo.setCurrentIndex((i + 1) % window.config_combo.count())
+        settle(app)
+        samples.append(time.perf_counter() - started)
+    record('switch_config', samples, window)
+
+    # 打开特殊喜好配置对话框
+    samples = []
+    if window.is_linked_student_checkbox.isChecked():
+        window.is_linked_student_checkbox.setChecked(False)
+    for _ in range(repeat):
+        closer.start()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            window.configure_special_gifts()
+        closer.stop()
+        if closer.opened_at is not None:
+            samples.append(closer.opened_at - started)
+    if samples:
+        record('open_gift_config_dialog', samples, window)
+
+    # 导入bacv.txt（后台解析 + 写入 + 重新计算，直到完成提示出现）
+    with open(resource_path('bacv.txt'), 'r', encoding='utf-8') as f:
+        content = f.read()
+    samples = []
+    for _ in range(repeat):
+        closer.start()
+        started = time.perf_counter()
+        window.import_manager.start_import(content=content)
+        wait_until(app, lambda: closer.opened_at is not None)
+        closer.stop()
+        samples.append(closer.opened_at - started)
+        settle(app)
+    record('import_bacv', samples, window)
+
+    # 切换联动学生
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        QTest.mouseClick(window.is_linked_student_checkbox, Qt.LeftButton)
+        settle(app)
+        samples.append(time.perf_counter() - started)
+    record('toggle_linked_student', samples, window)
+
+    window.config_modified = False
+    window.close()
+    return results, counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ShigureAI 界面交互延迟基准")
+    parser.add_argument('--configs', type=int, default=200, help="合成配置数量")
+    parser.add_argument('--repeat', type=int, default=10, help="每项交互的重复次数")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果保存为基线")
+    parser.add_argument('--compare', action='store_true', help="与基线比较，有回退时返回1")
+    parser.add_argument('--threshold', type=float, default=0.3, help="允许的变慢比例，默认0.3")
+    parser.add_argument('--output', help="把本次结果另存为JSON")
+    args = parser.parse_args(argv)
+
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
+    app = QApplication([sys.argv[0]])
+    app.setStyle('Fusion')
+
+    with tempfile.TemporaryDirectory(prefix='shigure_gui_bench_') as work_dir:
+        results, counts = run_benchmarks(app, work_dir, args.configs, args.repeat)
+
+    report = {'meta': {'platform': os.environ.get('QT_QPA_PLATFORM'),
+                       'configs': args.configs, 'repeat': args.repeat,
+                       'created': time.strftime('%Y-%m-%d %H:%M:%S')},
+              'results': results, 'counts': counts}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"\n与基线相比无超过 {args.threshold:.0%} 的回退")
+        return 0
+    print(f"\n发现 {len(regressions)} 项交互延迟回退（阈值 {args.threshold:.0%}）：")
+    for name, base, current, ratio in regressions:
+        print(f"  {name:<36} {base * 1000:.3f} ms -> {current * 1000:.3f} ms  (x{ratio:.2f})")
+    return 1 if args.compare else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""基准测试用的合成数据生成器"""
+
+import csv
+import json
+import os
+import random
+
+GOLD_FAVOR = 20
+PURPLE_FAVOR = 120
+GIFT_SET_SIZES = {'level40_gifts': (GOLD_FAVOR, 3), 'level60_gifts': (GOLD_FAVOR, 2),
+                  'level180_gifts': (PURPLE_FAVOR, 3), 'level240_gifts': (PURPLE_FAVOR, 1)}
+
+
+def make_gift_catalog(path, n_rows, seed=0):
+    """生成礼物表CSV，返回 [(礼物ID, 基础好感)]"""
+    rng = random.Random(seed)
+    rows = [(100008, '礼物选择盒', 60)]
+    for i in range(n_rows - 1):
+        base_favor = PURPLE_FAVOR if rng.random() < 0.25 else GOLD_FAVOR
+        rows.append((5000 + i, f"礼物{i}", base_favor))
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['ID', '礼物名', '基础经验值'])
+        writer.writerows(rows)
+    return [(gift_id, favor) for gift_id, _, favor in rows]
+
+
+def make_level_table(path, n_levels):
+    """生成等级表CSV（累计经验单调递增）"""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['当前等级', '升级所需经验', '达到等级累计经验'])
+        total = 0
+        for level in range(1, n_levels + 1):
+            step = 15 + level * 5
+            writer.writerow([level, step, total])
+            total += step
+
+
+def make_bacv(n_items, gift_ids, n_profiles=1, seed=0):
+    """生成bacv导出文本，物品中包含礼物和其他道具"""
+    rng = random.Random(seed)
+    profiles = []
+    for p in range(n_profiles):
+        items = []
+        for i in range(n_items):
+            if i < len(gift_ids):
+                item_id = gift_ids[i]
+            else:
+                item_id = 10 + i
+            items.append({'id': item_id, 'number': rng.randint(0, 500)})
+        profiles.append({'id': f"profile{p}", 'name': f"账号{p}", 'checked': 1, 'pool': '',
+                         'student': [{'id': 10000 + s, 'level': 90} for s in range(min(200, n_items))],
+                         'equipment': [], 'item': items, 'currency': []})
+    return json.dumps(profiles, ensure_ascii=False, separators=(',', ':'))
+
+
+def make_regex_only_text(n_items, gift_ids, seed=0):
+    """生成JSON解析失败、只能走正则兼容解析的文本"""
+    rng = random.Random(seed)
+    parts = []
+    for i in range(n_items):
+        item_id = gift_ids[i] if i < len(gift_ids) else 10 + i
+        parts.append(f"{{'id': {item_id}, 'number': {rng.randint(0, 500)}}}")
+    return "item: [" + ", ".join(parts) + "]"
+
+
+def make_student_configs(n_students, gift_catalog, seed=0):
+    """生成内存中的学生配置（集合格式）"""
+    rng = random.Random(seed)
+    by_favor = {}
+    for gift_id, favor in gift_catalog:
+        by_favor.setdefault(favor, []).append(gift_id)
+
+    configs = {}
+    for s in range(n_students):
+        config = {'level20_gifts': set(), 'level120_gifts': set()}
+        for key, (favor, count) in GIFT_SET_SIZES.items():
+            pool = by_favor.get(favor, [])
+            config[key] = set(rng.sample(pool, min(count, len(pool))))
+        config['gift_quantities'] = {gift_id: rng.randint(0, 50) for gift_id, _ in gift_catalog[:20]}
+        config['start_level'] = rng.randint(1, 60)
+        config['start_exp'] = 0
+        config['is_linked_student'] = rng.random() < 0.05
+        configs[f"学生{s}"] = config
+    return configs
+
+
+def write_config_file(path, configs):
+    """以旧版格式（礼物ID列表）写出配置文件，读取时会自动转换为掩码"""
+    data = {name: {k: list(v) if isinstance(v, set) else v for k, v in conf.items()}
+            for name, conf in configs.items()}
+    if configs:
+        data['_last_config'] = next(iter(configs))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""二进制差分补丁
+
+按固定大小的块索引旧文件，在新文件中逐字节查找相同的块并向前后延伸，
+新文件表示为 "从旧文件复制" 与 "插入新数据" 两种操作，操作序列用zlib压缩。
+补丁头记录新旧文件的大小与SHA-256：应用前校验旧文件，应用后校验结果，任何不一致都抛出 DeltaError。
+
+文件格式：
+    8字节魔数 SHGRDLT1 | 旧文件大小 | 旧文件SHA-256 | 新文件大小 | 新文件SHA-256 | 块大小 | zlib(操作序列)
+    操作: b'C' + 偏移(8字节) + 长度(8字节)   从旧文件复制
+          b'I' + 长度(8字节) + 数据            插入
+
+生成补丁: python binary_delta.py diff 旧版本.exe 新版本.exe 补丁.delta
+应用补丁: python binary_delta.py apply 旧版本.exe 补丁.delta 输出.exe
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import sys
+import zlib
+
+MAGIC = b'SHGRDLT1'
+HEADER = struct.Struct('<8sQ32sQ32sI')
+COPY_OP = struct.Struct('<cQQ')
+INSERT_OP = struct.Struct('<cQ')
+DEFAULT_BLOCK_SIZE = 256
+MATCH_STEP = 64 * 1024
+
+
+class DeltaError(ValueError):
+    """补丁格式错误，或旧文件、结果与补丁记录的哈希不一致"""
+
+
+def sha256_of(data):
+    return hashlib.sha256(data).digest()
+
+
+def _match_length(a, i, b, j):
+    """a[i:] 与 b[j:] 的公共前缀长度，按块比较后逐步缩小步长"""
+    limit = min(len(a) - i, len(b) - j)
+    length = 0
+    step = MATCH_STEP
+    while step:
+        while length + step <= limit and a[i + length:i + length + step] == b[j + length:j + length + step]:
+            length += step
+        step //= 2
+    return length
+
+
+def _diff_ops(source, target, block_size):
+    """生成 ('C', 偏移, 长度) / ('I', 数据) 操作"""
+    index = {}
+    for offset in range(len(source) - block_size, -1, -block_size):
+        index[hash(source[offset:offset + block_size])] = offset  # 倒序写入，保留最靠前的块
+
+    ops = []
+    literal_start = pos = 0
+    last = len(target) - block_size
+    while pos <= last:
+        block = target[pos:pos + block_size]
+        offset = index.get(hash(block))
+        if offset is None or source[offset:offset + block_size] != block:
+            pos += 1
+            continue
+        # 向前延伸到尚未输出的插入数据中
+        back = 0
+        while back < pos - literal_start and back < offset and source[offset - back - 1] == target[pos - back - 1]:
+            back += 1
+        start, offset = pos - back, offset - back
+        length = back + block_size + _match_length(source, offset + back + block_size, target, pos + block_size)
+
+        if start > literal_start:
+            ops.append(('I', target[literal_start:start]))
+        if ops and ops[-1][0] == 'C' and ops[-1][1] + ops[-1][2] == offset:
+            ops[-1] = ('C', ops[-1][1], ops[-1][2] + length)
+        else:
+            ops.append(('C', offset, length))
+        pos = literal_start = start + length
+    if literal_start < len(target):
+        ops.append(('I', target[literal_start:]))
+    return ops
+
+
+def make_delta(source, target, block_size=DEFAULT_BLOCK_SIZE):
+    """生成把 source 变为 target 的补丁（bytes）"""
+    source, target = bytes(source), bytes(target)
+    body = []
+    for op in _diff_ops(source, target, block_size):
+        if op[0] == 'C':
+            body.append(COPY_OP.pack(b'C', op[1], op[2]))
+        else:
+            body.append(INSERT_OP.pack(b'I', len(op[1])))
+            body.append(op[1])
+    header = HEADER.pack(MAGIC, len(source), sha256_of(source), len(target), sha256_of(target), block_size)
+    return header + zlib.compress(b''.join(body), 9)
+
+
+def read_header(delta):
+    """返回 (旧文件大小, 旧文件SHA-256, 新文件大小, 新文件SHA-256)"""
+    if len(delta) < HEADER.size:
+        raise DeltaError("补丁文件不完整")
+    magic, source_size, source_hash, target_size, target_hash, _ = HEADER.unpack_from(delta)
+    if magic != MAGIC:
+        raise DeltaError("不是有效的补丁文件")
+    return source_size, source_hash, target_size, target_hash
+
+
+def apply_delta(source, delta):
+    """把补丁应用到 source，返回校验通过的新文件内容"""
+    source_size, source_hash, target_size, target_hash = read_header(delta)
+    if len(source) != source_size or sha256_of(source) != source_hash:
+        raise DeltaError("补丁与当前文件的版本不匹配")
+    try:
+        body = zlib.decompress(delta[HEADER.size:])
+    except zlib.error as e:
+        raise DeltaError(f"补丁数据损坏: {e}")
+
+    output = bytearray()
+    pos = 0
+    try:
+        while pos < len(body):
+            if body[pos:pos + 1] == b'C':
+                _, offset, length = COPY_OP.unpack_from(body, pos)
+                pos += COPY_OP.size
+                if offset + length > len(source):
+                    raise DeltaError("补丁中的复制范围超出旧文件")
+                output += source[offset:offset + length]
+            elif body[pos:pos + 1] == b'I':
+                _, length = INSERT_OP.unpack_from(body, pos)
+                pos += INSERT_OP.size
+                output += body[pos:pos + length]
+                pos += length
+            else:
+                raise DeltaError("补丁中有无法识别的操作")
+    except struct.error:
+        raise DeltaError("补丁数据不完整")
+
+    if len(output) != target_size or sha256_of(output) != target_hash:
+        raise DeltaError("应用补丁后的文件校验失败")
+    return bytes(output)
+
+
+def make_delta_file(source_path, target_path, delta_path, block_size=DEFAULT_BLOCK_SIZE):
+    """生成补丁文件，返回补丁大小"""
+    with open(source_path, 'rb') as f:
+        source = f.read()
+    with open(target_path, 'rb') as f:
+        target = f.read()
+    delta = make_delta(source, target, block_size)
+    with open(delta_path, 'wb') as f:
+        f.write(delta)
+    return len(delta)
+
+
+def apply_delta_file(source_path, delta_path, output_path):
+    """应用补丁文件，校验通过后才替换 output_path"""
+    with open(source_path, 'rb') as f:
+        source = f.read()
+    with open(delta_path, 'rb') as f:
+        delta = f.read()
+    output = apply_delta(source, delta)
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(output)
+    os.replace(temp_path, output_path)
+    return len(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ShigureAI 二进制差分补丁")
+    commands = parser.add_subparsers(dest='command', required=True)
+    diff_parser = commands.add_parser('diff', help="生成补丁")
+    diff_parser.add_argument('source')
+    diff_parser.add_argument('target')
+    diff_parser.add_argument('delta')
+    diff_parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE)
+    apply_parser = commands.add_parser('apply', help="应用补丁")
+    apply_parser.add_argument('source')
+    apply_parser.add_argument('delta')
+    apply_parser.add_argument('output')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'diff':
+            size = make_delta_file(args.source, args.target, args.delta, args.block_size)
+            target_size = os.path.getsize(args.target)
+            print(f"补丁大小: {size / 1024:.1f} KB（新文件的 {size / max(target_size, 1):.1%}）")
+            if size > target_size * 0.8:
+                print("提示: 补丁接近完整文件大小，新文件可能整体压缩过，发布补丁意义不大")
+        else:
+            size = apply_delta_file(args.source, args.delta, args.output)
+            print(f"已生成 {args.output}（{size} 字节，校验通过）")
+    except (OSError, DeltaError) as e:
+        print(e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
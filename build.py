@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from version import __version__
+from resource_pack import PACK_FILE, build_pack, pack_file_names
 
 import os
 import sys
@@ -16,7 +17,7 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='repla
 def build_executable():
     print("开始使用 Nuitka 打包可执行文件...")
     
-    required_files = ['favor_calculator.py', 'giftID.csv', 'exp.csv', 'icon.ico', 'bacv.txt']
+    required_files = ['favor_calculator.py', 'giftID.csv', 'exp.csv', 'students.csv', 'icon.ico', 'bacv.txt']
     required_dirs = ['pic']
     
     for file in required_files:
@@ -29,6 +30,10 @@ def build_executable():
             print(f"❌ 错误: 找不到必要目录 {dir_name}")
             return False
     
+    # 礼物表、等级表、学生目录、图标与图片合并为一个资源包，运行时以 mmap 读取
+    packed = build_pack(PACK_FILE, '.', pack_file_names('.'), __version__)
+    print(f"已生成资源包 {PACK_FILE}（{packed} 个文件，{os.path.getsize(PACK_FILE) / 1024 / 1024:.1f} MB）")
+
     print("Cleaning previous build files...")
     cleanup_paths = ["build", "dist", "ShigureAI_v0.1.1.exe", "ShigureAI_v0.1.1.dist"]
     for path in cleanup_paths:
@@ -52,11 +57,8 @@ def build_executable():
         '--noinclude-default-mode=error',
         '--windows-icon-from-ico=icon.ico',
         '--output-filename=ShigureAI_v0.1.1.exe',
-        '--include-data-files=giftID.csv=giftID.csv',
-        '--include-data-files=exp.csv=exp.csv',
-        '--include-data-files=icon.ico=icon.ico',
+        f'--include-data-files={PACK_FILE}={PACK_FILE}',
         '--include-data-files=bacv.txt=bacv.txt',
-        '--include-data-dir=pic=pic',
         '--assume-yes-for-downloads',
         '--remove-output',
         '--no-pyi-file',
@@ -73,7 +75,6 @@ def build_executable():
         '--nofollow-import-to=PyQt5.QtWebEngine',
         '--nofollow-import-to=PyQt5.QtMultimedia',
         '--nofollow-import-to=PyQt5.QtMultimediaWidgets',
-        '--nofollow-import-to=PyQt5.QtNetwork',
         '--nofollow-import-to=PyQt5.QtQml',
         '--nofollow-import-to=PyQt5.QtQuick',
         '--nofollow-import-to=PyQt5.QtQuickWidgets',
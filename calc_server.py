@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""本地JSON计算服务
+
+只监听本机回环地址，提供与主界面相同的好感度计算：
+    POST /calculate  请求体为bacv导出数据或 {"bacv": ..., "config": ..., "start_level": ..., "start_exp": ...}
+                     bacv包含多个账号时附带每个账号的结果，可用 "profile" 指定主账号
+    POST /roster     使用同一份库存计算所有配置
+    GET  /roster     使用各配置自身保存的礼物数量计算所有配置
+    POST /project    {"income": {礼物ID: 每日数量}, "targets": [...], "horizon_days": ...}
+                     预测所有配置到达目标等级的天数
+    GET  /metrics    吞吐量、延迟与缓存统计
+    GET  /health     存活检查
+
+运行: python calc_server.py --port 8765 --workers 4
+"""
+
+import argparse
+import ipaddress
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from version import __version__
+from utils import resource_path
+from data_models import load_csv_resource
+from import_manager import ImportParseError, parse_import_profiles, extract_json_profiles, build_profile
+from result_cache import LRUCache, config_fingerprint, inventory_fingerprint
+import favor_core
+import config_store
+import favor_simulator
+from metrics import Histogram, MetricsRegistry
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_BODY_SIZE = 64 * 1024 * 1024
+REQUEST_HISTOGRAM = '_all'
+
+
+class RequestError(Exception):
+    """请求错误，携带HTTP状态码"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceMetrics(MetricsRegistry):
+    """请求计数、延迟与吞吐量统计，延迟同时按接口分别统计"""
+
+    def __init__(self, window=1024, throughput_window=60.0):
+        super().__init__(window)
+        self.throughput_window = throughput_window
+        self._recent = deque()
+
+    def record(self, endpoint, status, seconds):
+        now = time.time()
+        self.increment('requests')
+        self.increment(f"{endpoint} {status}")
+        if status >= 400:
+            self.increment('errors')
+        self.observe(REQUEST_HISTOGRAM, seconds)
+        if status != 404:  # 不存在的路径不单独建直方图
+            self.observe(endpoint, seconds)
+        with self._lock:
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > self.throughput_window:
+                self._recent.popleft()
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        uptime = time.time() - self.started_at
+        total = snapshot['counters'].get('requests', 0)
+        latencies = snapshot.pop('latency_ms')
+        with self._lock:
+            recent = len(self._recent)
+        return {
+            'uptime_s': round(uptime, 3),
+            'counters': snapshot['counters'],
+            'throughput_rps': round(total / uptime, 3) if uptime > 0 else 0.0,
+            'recent_rps': round(recent / self.throughput_window, 3),
+            'latency_ms': latencies.pop(REQUEST_HISTOGRAM, Histogram().summary()),
+            'endpoint_latency_ms': latencies,
+        }
+
+
+class CalculationService:
+    """与界面共享计算逻辑的无界面计算服务"""
+
+    def __init__(self, config_file=None, cache_size=1024):
+        self.gift_catalog = favor_core.build_gift_table(load_csv_resource('giftID.csv'))
+        self.level_exp_cache, self.level_list = favor_core.build_level_table(
+            load_csv_resource('exp.csv'))
+        self.config_file = config_file or os.path.join(
+            resource_path("configs", use_exe_dir_for_config=True), "config.json")
+        self.cache = LRUCache(cache_size)
+        self.metrics = ServiceMetrics()
+        self._configs = {}
+        self._configs_mtime = None
+        self._configs_lock = threading.Lock()
+
+    def get_configs(self):
+        """读取配置文件，文件未变化时复用上次结果"""
+        try:
+            mtime = os.path.getmtime(self.config_file)
+        except OSError:
+            return {}
+        with self._configs_lock:
+            if mtime != self._configs_mtime:
+                self._configs, _ = config_store.read_config_file(self.config_file, self.gift_catalog)
+                self._configs_mtime = mtime
+            return self._configs
+
+    def parse_profiles(self, bacv):
+        """把bacv数据转换为账号列表，每个账号带有 礼物ID->数量"""
+        try:
+            if isinstance(bacv, str):
+                return parse_import_profiles(bacv, self.gift_catalog)
+            profiles = extract_json_profiles(bacv)
+            if not profiles:
+                raise ImportParseError(ImportParseError.INVALID_FORMAT, "无法解析数据格式!")
+            return [build_profile(i, profile, self.gift_catalog) for i, profile in enumerate(profiles)]
+        except ImportParseError as e:
+            raise RequestError(e.message if not e.detail else f"{e.message} {e.detail}")
+
+    def _select_profiles(self, payload):
+        """解析请求中的bacv，返回 (选中的账号, 全部账号)"""
+        profiles = self.parse_profiles(payload['bacv'])
+        wanted = payload.get('profile')
+        if wanted is None:
+            return profiles[0], profiles
+        for profile in profiles:
+            if wanted in (profile['id'], profile['name']):
+                return profile, profiles
+        raise RequestError(f"未知账号: {wanted}", status=404)
+
+    def _resolve_config(self, spec):
+        if spec is None:
+            return None, None
+        if isinstance(spec, dict):
+            try:
+                return None, favor_core.normalize_config(spec, self.gift_catalog)
+            except (TypeError, ValueError):
+                raise RequestError("config 中的礼物必须为礼物ID列表或十六进制掩码")
+        configs = self.get_configs()
+        if spec not in configs:
+            raise RequestError(f"未知配置: {spec}", status=404)
+        return spec, configs[spec]
+
+    def _quantities_from(self, payload, config):
+        source = payload.get('quantities')
+        if source is None:
+            source = (config or {}).get('gift_quantities', {})
+        try:
+            return {int(k): int(v) for k, v in source.items()}
+        except (AttributeError, TypeError, ValueError):
+            raise RequestError("quantities 格式错误")
+
+    def compute(self, config, quantities, start_level, start_exp, is_linked=None):
+        """带缓存的计算，键为 (配置指纹, 库存指纹, 起始等级, 起始经验)"""
+        if is_linked is None:
+            is_linked = bool(config and config.get('is_linked_student', False))
+        key = (config_fingerprint(config, is_linked), inventory_fingerprint(quantities),
+               start_level, start_exp)
+        result = self.cache.get(key)
+        if result is None:
+            result = favor_core.calculate_favor(
+                self.level_exp_cache, self.level_list, self.gift_catalog, quantities,
+                start_level, start_exp, config, is_linked)
+            self.cache.put(key, result)
+        return result
+
+    def _calculate_one(self, payload, name, config):
+        try:
+            start_level = int(payload.get('start_level', (config or {}).get('start_level', 1)))
+            start_exp = int(payload.get('start_exp', (config or {}).get('start_exp', 0)))
+        except (TypeError, ValueError):
+            raise RequestError("start_level/start_exp 必须为整数")
+        if start_level not in self.level_exp_cache:
+            raise RequestError(f"无效等级: {start_level}")
+        is_linked = payload.get('is_linked')
+        if isinstance(is_linked, str):
+            is_linked = is_linked.lower() in ('1', 'true', 'yes')
+        quantities = self._quantities_from(payload, config)
+        result = dict(self.compute(config, quantities, start_level, start_exp,
+                                   None if is_linked is None else bool(is_linked)))
+        result['config'] = name
+        result['text'] = favor_core.format_result(result)
+        return result
+
+    def calculate(self, payload):
+        name, config = self._resolve_config(payload.get('config'))
+        if 'bacv' not in payload:
+            return self._calculate_one(payload, name, config)
+
+        # 多账号导出：返回选中账号的结果，并附带每个账号的结果
+        selected, profiles = self._select_profiles(payload)
+        payload = {k: v for k, v in payload.items() if k != 'bacv'}
+        results = {}
+        for profile in profiles:
+            results[profile['id']] = self._calculate_one(
+                dict(payload, quantities=profile['quantities']), name, config)
+            results[profile['id']]['profile'] = profile['name']
+        result = dict(results[selected['id']])
+        if len(profiles) > 1:
+            result['profiles'] = results
+        return result
+
+    def roster(self, payload):
+        # 同一份库存只解析一次
+        if 'bacv' in payload:
+            selected, _ = self._select_profiles(payload)
+            payload = {k: v for k, v in payload.items() if k != 'bacv'}
+            payload['quantities'] = selected['quantities']
+        results = {}
+        for name, config in self.get_configs().items():
+            results[name] = self._calculate_one(payload, name, config)
+        return {'count': len(results), 'results': results}
+
+    def project(self, payload):
+        try:
+            income = {int(k): float(v) for k, v in payload.get('income', {}).items()}
+            targets = tuple(int(t) for t in payload.get('targets', favor_simulator.DEFAULT_TARGETS))
+            horizon_days = int(payload.get('horizon_days', 365))
+        except (AttributeError, TypeError, ValueError):
+            raise RequestError("income/targets/horizon_days 格式错误")
+        projections = favor_simulator.project_roster(
+            self.level_exp_cache, self.level_list, self.gift_catalog, self.get_configs(), income,
+            targets, horizon_days, bool(payload.get('include_inventory', False)))
+        for projection in projections.values():
+            projection['levels'] = {str(level): day for level, day in projection['levels'].items()}
+        return {'count': len(projections), 'results': projections}
+
+
+class CalculationRequestHandler(BaseHTTPRequestHandler):
+    server_version = f"ShigureAI/{__version__}"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch({
+            '/health': lambda payload: {'status': 'ok', 'version': __version__},
+            '/metrics': lambda payload: self._metrics(),
+            '/roster': self.server.service.roster,
+        }, with_body=False)
+
+    def do_POST(self):
+        self._dispatch({
+            '/calculate': self.server.service.calculate,
+            '/roster': self.server.service.roster,
+            '/project': self.server.service.project,
+        }, with_body=True)
+
+    def _metrics(self):
+        snapshot = self.server.service.metrics.snapshot()
+        snapshot['cache'] = self.server.service.cache.stats()
+        snapshot['workers'] = self.server.workers
+        return snapshot
+
+    def _read_payload(self, query):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_SIZE:
+            raise RequestError("请求体过大", status=413)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+
+        payload = dict(query)
+        if not body.strip():
+            return payload
+        try:
+            data = json.loads(body)
+        except ValueError:
+            # 非JSON文本按bacv字符串处理（正则兼容格式）
+            payload['bacv'] = body
+            return payload
+        if isinstance(data, dict) and 'item' not in data:
+            payload.update(data)
+        else:
+            payload['bacv'] = data if isinstance(data, list) else [data]
+        return payload
+
+    def _dispatch(self, routes, with_body):
+        started = time.perf_counter()
+        try:
+            # 请求行按latin-1解码，未转义的UTF-8字符需还原
+            url = urlsplit(self.path.encode('iso-8859-1').decode('utf-8'))
+        except UnicodeError:
+            url = urlsplit(self.path)
+        status = 200
+        try:
+            route = routes.get(url.path)
+            if route is None:
+                raise RequestError(f"未知路径: {url.path}", status=404)
+            query = dict(parse_qsl(url.query))
+            payload = self._read_payload(query) if with_body else query
+            response = route(payload)
+        except RequestError as e:
+            status, response = e.status, {'error': str(e)}
+        except Exception as e:
+            status, response = 500, {'error': f"内部错误: {e}"}
+
+        body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.service.metrics.record(url.path, status, time.perf_counter() - started)
+
+
+class WorkerPoolHTTPServer(HTTPServer):
+    """用固定大小线程池处理请求的HTTP服务，超出排队上限时返回503"""
+
+    def __init__(self, address, service, workers=4, backlog=64, verbose=False):
+        super().__init__(address, CalculationRequestHandler)
+        self.service = service
+        self.workers = workers
+        self.verbose = verbose
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='calc-worker')
+        self._slots = threading.BoundedSemaphore(workers + backlog)
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(b"HTTP/1.0 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n")
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self._pool.submit(self._process_in_worker, request, client_address)
+
+    def _process_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=4, cache_size=1024,
+                  config_file=None, verbose=False):
+    """创建计算服务（只允许回环地址）"""
+    if not is_loopback(host):
+        raise ValueError(f"计算服务只允许监听本机回环地址: {host}")
+    service = CalculationService(config_file=config_file, cache_size=cache_size)
+    return WorkerPoolHTTPServer((host, port), service, workers=workers, verbose=verbose)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ShigureAI 本地计算服务")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="监听地址（仅限回环地址）")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=4, help="工作线程数")
+    parser.add_argument('--cache-size', type=int, default=1024, help="结果缓存条数")
+    parser.add_argument('--config', default=None, help="配置文件路径，默认为 configs/config.json")
+    parser.add_argument('--verbose', action='store_true', help="输出请求日志")
+    args = parser.parse_args(argv)
+
+    try:
+        server = create_server(args.host, args.port, args.workers, args.cache_size,
+                               args.config, args.verbose)
+    except ValueError as e:
+        print(e)
+        return 2
+
+    host, port = server.server_address[:2]
+    print(f"ShigureAI 计算服务已启动: http://{host}:{port}  (工作线程 {args.workers})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,254 @@
 
 import os
 import json
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox,
+                             QFileDialog)
 from utils import resource_path
+import app_logging
+import metrics
+from favor_core import GIFT_SET_KEYS, MAX_LEVEL
+from config_store import SLOTS_KEY, PROFILES_KEY, read_config_file, write_config_file, resolve_preference
+
+logger = app_logging.get_logger(__name__)
+
+CONFIG_READ_CHUNK_SIZE = 64 * 1024
+
+# 导入时遇到同名配置的处理方式
+MERGE_SKIP = 'skip'
+MERGE_OVERWRITE = 'overwrite'
+MERGE_RENAME = 'rename'
+
+
+class ConfigImportError(ValueError):
+    """配置文件无法解析"""
+
+
+def iter_config_entries(f, chunk_size=CONFIG_READ_CHUNK_SIZE):
+    """逐条读取顶层为 {配置名: 配置} 的JSON文件，产出 (配置名, 配置)
+
+    只在内存中保留当前条目，适合很大的共享配置文件。
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    def expect(chars):
+        nonlocal pos
+        skip_whitespace()
+        if pos >= len(buffer) or buffer[pos] not in chars:
+            found = buffer[pos] if pos < len(buffer) else '文件结尾'
+            raise ConfigImportError(f"配置文件格式错误：期望 {chars!r}，遇到 {found!r}")
+        pos += 1
+        return buffer[pos - 1]
+
+    def decode_value():
+        nonlocal pos
+        skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # 数字可能被分块截断，必须看到其后的字符才算完整
+                if end < len(buffer) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ConfigImportError(f"配置文件格式错误：{e}")
+            fill()
+
+    fill()
+    if buffer.startswith('\ufeff'):
+        pos = 1
+    expect('{')
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == '}':
+        return
+    while True:
+        name = decode_value()
+        if not isinstance(name, str):
+            raise ConfigImportError("配置文件格式错误：配置名必须为字符串")
+        expect(':')
+        yield name, decode_value()
+        if expect(',}') == '}':
+            return
+
+
+def validate_config_entry(data, catalog, slot_ids=None, profiles=None):
+    """校验并转换一条导入的配置，返回 (配置, 被忽略的未知礼物数)，格式错误时抛出ValueError
+
+    特殊喜好可以是礼物ID列表（旧格式）、按 slot_ids 编码的十六进制掩码，
+    或引用 profiles 中的喜好方案。
+    """
+    if not isinstance(data, dict):
+        raise ValueError("配置不是对象")
+    data = resolve_preference(data, profiles or {})
+
+    config = {}
+    unknown = 0
+    for key in GIFT_SET_KEYS:
+        value = data.get(key, [])
+        if isinstance(value, list):
+            if not all(isinstance(i, int) and not isinstance(i, bool) for i in value):
+                raise ValueError(f"{key} 必须为礼物ID列表")
+        elif isinstance(value, str):
+            try:
+                int(value or '0', 16)
+            except ValueError:
+                raise ValueError(f"{key} 不是有效的礼物掩码")
+        else:
+            raise ValueError(f"{key} 必须为礼物ID列表或礼物掩码")
+        gift_ids = catalog.decode_ids(value, slot_ids)
+        known = [gift_id for gift_id in gift_ids if gift_id in catalog]
+        unknown += len(gift_ids) - len(known)
+        config[key] = catalog.mask_of(known)
+
+    quantities = data.get('gift_quantities', {})
+    if not isinstance(quantities, dict):
+        raise ValueError("gift_quantities 必须为对象")
+    config['gift_quantities'] = {}
+    for gift_id, qty in quantities.items():
+        try:
+            gift_id, qty = int(gift_id), int(qty)
+        except (TypeError, ValueError):
+            raise ValueError(f"礼物数量格式错误: {gift_id}")
+        if qty < 0:
+            raise ValueError(f"礼物数量不能为负数: {gift_id}")
+        if gift_id not in catalog:
+            unknown += 1
+            continue
+        config['gift_quantities'][gift_id] = qty
+
+    if 'start_level' in data:
+        level = data['start_level']
+        if not isinstance(level, int) or not 1 <= level <= MAX_LEVEL:
+            raise ValueError(f"起始等级必须为1-{MAX_LEVEL}的整数")
+        config['start_level'] = level
+    if 'start_exp' in data:
+        exp = data['start_exp']
+        if not isinstance(exp, int) or exp < 0:
+            raise ValueError("起始经验必须为非负整数")
+        config['start_exp'] = exp
+    config['is_linked_student'] = bool(data.get('is_linked_student', False))
+    if isinstance(data.get('student_id'), int):
+        config['student_id'] = data['student_id']
+    return config, unknown
+
+
+def unique_config_name(name, existing):
+    """为重名配置生成 "名称 (2)" 形式的新名称"""
+    index = 2
+    while f"{name} ({index})" in existing:
+        index += 1
+    return f"{name} ({index})"
+
+
+def merge_config_entries(configs, entries, catalog, strategy=MERGE_SKIP):
+    """把 (配置名, 配置) 条目合并进 configs，返回导入统计"""
+    summary = {'imported': [], 'overwritten': [], 'renamed': [], 'skipped': [], 'invalid': [], 'unknown_gifts': 0}
+    slot_ids = None
+    profiles = {}
+    for name, data in entries:
+        # 写入时 _gift_slots 与 _preference_profiles 位于所有配置之前
+        if name == SLOTS_KEY and isinstance(data, list):
+            slot_ids = data
+            continue
+        if name == PROFILES_KEY and isinstance(data, dict):
+            profiles = data
+            continue
+        if name.startswith('_'):
+            continue  # _last_config 等元数据
+        name = name.strip()
+        if not name:
+            summary['invalid'].append(("(空名称)", "配置名称不能为空"))
+            continue
+        try:
+            config, unknown = validate_config_entry(data, catalog, slot_ids, profiles)
+        except ValueError as e:
+            summary['invalid'].append((name, str(e)))
+            continue
+        summary['unknown_gifts'] += unknown
+
+        if name in configs:
+            if strategy == MERGE_SKIP:
+                summary['skipped'].append(name)
+                continue
+            if strategy == MERGE_RENAME:
+                new_name = unique_config_name(name, configs)
+                summary['renamed'].append((name, new_name))
+                name = new_name
+            else:
+                summary['overwritten'].append(name)
+        configs[name] = config
+        summary['imported'].append(name)
+    return summary
+
+
+def generate_roster_configs(configs, student_ids, students, catalog):
+    """为账号拥有的学生批量创建或更新配置，返回统计
+
+    已有配置按 student_id（其次按学生名）匹配，只更新特殊喜好与联动标记，
+    礼物数量与起始等级保持不变；目录中没有特殊喜好的学生不会覆盖已有配置。
+    """
+    summary = {'created': [], 'updated': [], 'unchanged': []}
+    by_student = {config['student_id']: name for name, config in configs.items() if 'student_id' in config}
+
+    for student_id in dict.fromkeys(student_ids):
+        entry = students.get(student_id)
+        display_name = students.display_name(student_id)
+        name = by_student.get(student_id)
+        if name is None and display_name in configs and 'student_id' not in configs[display_name]:
+            name = display_name
+
+        preferences = {}
+        if entry is not None and entry['has_preferences']:
+            preferences = {key: catalog.mask_of(g for g in entry[key] if g in catalog) for key in GIFT_SET_KEYS
+                           if key in entry}
+        is_linked = bool(entry and entry['is_linked'])
+
+        if name is None:
+            name = display_name if display_name not in configs else unique_config_name(display_name, configs)
+            config = {key: 0 for key in GIFT_SET_KEYS}
+            config.update(preferences)
+            config.update({'gift_quantities': {}, 'start_level': 1, 'start_exp': 0,
+                           'is_linked_student': is_linked, 'student_id': student_id})
+            configs[name] = config
+            summary['created'].append(name)
+            continue
+
+        config = configs[name]
+        changes = dict(preferences, student_id=student_id)
+        if entry is not None:
+            changes['is_linked_student'] = is_linked
+        if all(config.get(key) == value for key, value in changes.items()):
+            summary['unchanged'].append(name)
+            continue
+        config.update(changes)
+        summary['updated'].append(name)
+    return summary
+
 
 class ConfigManager:
     def __init__(self, parent):
         self.parent = parent
+        self._states = {}  # 配置名 -> 切换时写入界面的状态
 
     def create_new_config(self):
         """创建新配置"""
@@ -67,12 +308,12 @@ class ConfigManager:
 
             self.parent.current_config = name
             self.parent.student_configs[name] = {
-                'level20_gifts': set(),
-                'level40_gifts': set(),
-                'level60_gifts': set(),
-                'level120_gifts': set(),
-                'level180_gifts': set(),
-                'level240_gifts': set(),
+                'level20_gifts': 0,
+                'level40_gifts': 0,
+                'level60_gifts': 0,
+                'level120_gifts': 0,
+                'level180_gifts': 0,
+                'level240_gifts': 0,
                 'gift_quantities': {},
                 'is_linked_student': False # 新增联动学生状态
             }
@@ -110,6 +351,7 @@ class ConfigManager:
                                    f"确定要删除配置 '{self.parent.current_config}' 吗?",
                                    QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
+            self.parent.invalidate_config_cache(self.parent.current_config)
             del self.parent.student_configs[self.parent.current_config]
             self.parent.current_config = None
             self.parent.update_config_combo()
@@ -125,33 +367,72 @@ class ConfigManager:
         if self.parent.current_config and self.parent.current_config in self.parent.student_configs:
             self.parent.config_combo.setCurrentText(self.parent.current_config)
 
+    def config_state(self, config_name):
+        """返回切换到配置时需要写入界面的状态，按配置内容缓存
+
+        状态包含要写入的礼物数量、起始等级/经验与联动标记；
+        配置的数量字典或起始状态变化后自动重新生成。
+        好感向量不放在状态中：计算时由 GiftCatalog.compile 按特殊喜好掩码缓存，特殊喜好相同的配置共享同一向量。
+        """
+        config = self.parent.student_configs[config_name]
+        source = (config.get('gift_quantities'), config.get('start_level'), config.get('start_exp'),
+                  config.get('is_linked_student', False))
+        state = self._states.get(config_name)
+        if state is not None and state['source'][0] is source[0] and state['source'][1:] == source[1:]:
+            return state
+
+        quantities = {}
+        for gift_id_str, qty in (config.get('gift_quantities') or {}).items():
+            gift_id = int(gift_id_str)  # 将字符串转回整数
+            if gift_id in self.parent.gift_inputs:
+                quantities[gift_id] = qty
+        state = {
+            'source': source,
+            'quantities': quantities,
+            'start_level': config.get('start_level'),
+            'start_exp': config.get('start_exp'),
+            'is_linked': config.get('is_linked_student', False),
+        }
+        self._states[config_name] = state
+        return state
+
+    @metrics.timed('config.load')
     def load_config(self, config_name):
-        """加载配置"""
+        """加载配置：一次性写入预先生成的状态，只重新计算一次"""
         if not config_name or config_name not in self.parent.student_configs:
             return
 
+        state = self.config_state(config_name)
         self.parent.current_config = config_name
-        config = self.parent.student_configs[config_name]
-
-        if 'gift_quantities' in config:
-            for gift_id_str, qty in config['gift_quantities'].items():
-                gift_id = int(gift_id_str)  # 将字符串转回整数
-                if gift_id in self.parent.gift_inputs:
-                    self.parent.gift_inputs[gift_id]['spinbox'].blockSignals(True)
-                    self.parent.gift_inputs[gift_id]['spinbox'].setValue(qty)
-                    self.parent.gift_inputs[gift_id]['spinbox'].blockSignals(False)
-
-        if 'start_level' in config:
-            self.parent.level_input.setValue(config['start_level'])
-        if 'start_exp' in config:
-            self.parent.exp_input.setValue(config['start_exp'])
-
-        is_linked = config.get('is_linked_student', False)
-        self.parent.is_linked_student_checkbox.setChecked(is_linked)
-        self.parent.on_linked_student_toggled(Qt.Checked if is_linked else Qt.Unchecked)
-
-        self.parent.update_special_gifts_display()
-        self.parent.config_modified = False  # 配置已加载，标记为未修改
+        parent = self.parent
+
+        for gift_id, qty in state['quantities'].items():
+            spinbox = parent.gift_inputs[gift_id]['spinbox']
+            if spinbox.value() != qty:
+                spinbox.blockSignals(True)
+                spinbox.setValue(qty)
+                spinbox.blockSignals(False)
+
+        # 直接写入等级与经验，不经过 update_level/update_exp 触发的重复计算
+        widgets = (parent.level_input, parent.exp_input, parent.is_linked_student_checkbox)
+        for widget in widgets:
+            widget.blockSignals(True)
+        if state['start_level'] is not None:
+            parent.level_input.setValue(state['start_level'])
+            parent.current_level = state['start_level']
+            parent.exp_input.setValue(0)
+            parent.current_exp = 0
+        if state['start_exp'] is not None:
+            parent.exp_input.setValue(state['start_exp'])
+            parent.current_exp = state['start_exp']
+        parent.is_linked_student_checkbox.setChecked(state['is_linked'])
+        for widget in widgets:
+            widget.blockSignals(False)
+
+        parent.apply_linked_state(state['is_linked'])
+        parent.update_special_gifts_display()
+        parent.calculate_favor()
+        parent.config_modified = False  # 配置已加载，标记为未修改
 
     def save_config(self):
         """保存当前配置"""
@@ -164,6 +445,17 @@ class ConfigManager:
             QMessageBox.warning(self.parent, "警告", "配置名称不能为空!")
             return
 
+        watcher = self.parent.config_watcher
+        if watcher is not None:
+            watcher.check()  # 先合并尚未处理的外部修改
+            if config_name in watcher.conflicts:
+                reply = QMessageBox.question(
+                    self.parent, "配置冲突",
+                    f"配置 '{config_name}' 已在外部被修改或删除，保存将覆盖外部的修改。\n是否继续保存？",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                if reply != QMessageBox.Yes:
+                    return
+
         config = self.parent.student_configs[self.parent.current_config]
         config['gift_quantities'] = {
             gift_id: self.parent.gift_inputs[gift_id]['spinbox'].value()
@@ -179,50 +471,58 @@ class ConfigManager:
         os.makedirs(config_dir, exist_ok=True)
 
         config_file = os.path.join(config_dir, "config.json")
-
-        def convert_sets(d):
-            return {k: list(v) if isinstance(v, set) else v for k, v in d.items() if not k.startswith('_')}
+        catalog = self.parent.gift_catalog
 
         try:
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    all_configs = json.load(f)
-            except Exception:
-                all_configs = {}
+            # 只更新当前配置，文件中的其他配置保持原样（按当前槽位重新编码）
+            with metrics.timer('config.save'):
+                try:
+                    all_configs, _ = read_config_file(config_file, catalog)
+                except Exception:
+                    all_configs = {}
 
-            all_configs[self.parent.current_config] = convert_sets(config)
+                all_configs[self.parent.current_config] = config
 
-            all_configs['_last_config'] = self.parent.current_config
-
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(all_configs, f, ensure_ascii=False, indent=2)
+                write_config_file(config_file, all_configs, catalog, self.parent.current_config)
+            self.mark_config_file_synced()
 
             QMessageBox.information(self.parent, "成功", f"配置 '{self.parent.current_config}' 已保存！")
             self.parent.config_modified = False  # 配置已保存，标记为未修改
         except Exception as e:
             QMessageBox.critical(self.parent, "错误", f"保存配置失败:\n{e}")
 
+    @metrics.timed('config.save_all')
     def save_all_configs(self):
         config_dir = resource_path("configs", use_exe_dir_for_config=True)
         os.makedirs(config_dir, exist_ok=True)
         config_file = os.path.join(config_dir, "config.json")
 
-        def convert_sets(d):
-            return {k: list(v) if isinstance(v, set) else v for k, v in d.items() if not k.startswith('_')}
-
         try:
-            all_configs = {}
-            for config_name, config in self.parent.student_configs.items():
-                all_configs[config_name] = convert_sets(config)
-            
-            if self.parent.current_config:
-                all_configs['_last_config'] = self.parent.current_config
-
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(all_configs, f, ensure_ascii=False, indent=2)
+            write_config_file(config_file, self.parent.student_configs, self.parent.gift_catalog,
+                              self.parent.current_config)
+            self.mark_config_file_synced()
         except Exception as e:
             QMessageBox.critical(self.parent, "错误", f"保存配置失败:\n{e}")
 
+    def mark_config_file_synced(self):
+        """程序自身写入 config.json 后更新监视基准，避免当作外部修改重新合并"""
+        if self.parent.config_watcher is not None:
+            self.parent.config_watcher.mark_synced()
+
+    def ask_merge_strategy(self):
+        """询问导入时同名配置的处理方式，取消时返回None"""
+        box = QMessageBox(self.parent)
+        box.setWindowTitle("导入配置")
+        box.setText("导入的配置与已有配置同名时：")
+        skip_btn = box.addButton("跳过", QMessageBox.AcceptRole)
+        overwrite_btn = box.addButton("覆盖", QMessageBox.AcceptRole)
+        rename_btn = box.addButton("重命名导入", QMessageBox.AcceptRole)
+        box.addButton("取消", QMessageBox.RejectRole)
+        box.setDefaultButton(skip_btn)
+        box.exec_()
+        return {skip_btn: MERGE_SKIP, overwrite_btn: MERGE_OVERWRITE,
+                rename_btn: MERGE_RENAME}.get(box.clickedButton())
+
     def load_config_from_file(self):
         """从文件导入配置"""
         # 默认打开路径是exe所在目录的configs文件夹
@@ -235,96 +535,107 @@ class ConfigManager:
             config_dir,
             "JSON Files (*.json);;All Files (*)"
         )
+        if not file_path:
+            return
 
-        if file_path:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    file_data = json.load(f)
-
-                # 检查文件是否包含多个配置（键值对形式）
-                if isinstance(file_data, dict) and len(file_data) > 0:
-                    # 文件包含多个配置
-                    configs_loaded = 0
-                    for config_name, config_data in file_data.items():
-                        if config_name not in self.parent.student_configs and isinstance(config_data, dict):
-                            # 转换集合格式（列表转回集合）
-                            converted_config = {
-                                'level20_gifts': set(config_data.get('level20_gifts', [])),
-                                'level40_gifts': set(config_data.get('level40_gifts', [])),
-                                'level60_gifts': set(config_data.get('level60_gifts', [])),
-                                'level120_gifts': set(config_data.get('level120_gifts', [])),
-                                'level180_gifts': set(config_data.get('level180_gifts', [])),
-                                'level240_gifts': set(config_data.get('level240_gifts', [])),
-                                'gift_quantities': config_data.get('gift_quantities', {}),
-                                'is_linked_student': config_data.get('is_linked_student', False) # 加载联动学生状态
-                            }
-                            self.parent.student_configs[config_name] = converted_config
-                            configs_loaded += 1
-
-                        # 更新UI
-                        self.parent.update_config_combo()
-
-                    # 设置第一个新加载的配置为当前配置
-                    if configs_loaded > 0:
-                        first_new_config = list(file_data.keys())[0]
-                        self.parent.current_config = first_new_config
-                        self.parent.config_combo.setCurrentText(self.parent.current_config)
-                        self.load_config(self.parent.current_config)
-
-                        # 更新上次使用的配置记录
-                        last_config_path = resource_path(os.path.join("configs", "last_config.json"), use_exe_dir_for_config=True)
-                        with open(last_config_path, "w", encoding="utf-8") as f:
-                            json.dump({'last_config': self.parent.current_config}, f, ensure_ascii=False, indent=2)
-
-                    QMessageBox.information(self.parent, "成功", f"已加载 {configs_loaded} 个新配置！")
+        strategy = MERGE_SKIP
+        if self.parent.student_configs:
+            strategy = self.ask_merge_strategy()
+            if strategy is None:
+                return
 
-                else:
-                    QMessageBox.warning(self.parent, "警告", "配置文件格式错误或为空！")
+        # 先合并到副本，文件中途出错时不影响已有配置
+        configs = dict(self.parent.student_configs)
+        try:
+            with metrics.timer('config.import'), open(file_path, 'r', encoding='utf-8') as f:
+                summary = merge_config_entries(configs, iter_config_entries(f), self.parent.gift_catalog,
+                                               strategy)
+        except (OSError, UnicodeDecodeError, ConfigImportError) as e:
+            QMessageBox.critical(self.parent, "错误", f"加载配置文件失败:\n{str(e)}")
+            return
 
-            except Exception as e:
-                QMessageBox.critical(self.parent, "错误", f"加载配置文件失败:\n{str(e)}")
+        if not summary['imported']:
+            QMessageBox.warning(self.parent, "警告", self.format_import_summary(summary))
+            return
 
+        for name in summary['overwritten']:
+            self.parent.invalidate_config_cache(name)
+        self.parent.student_configs = configs
+        self.parent.current_config = summary['imported'][0]
+
+        # 所有条目合并完成后只刷新一次下拉框并加载一次配置
+        self.parent.config_combo.blockSignals(True)
+        self.update_config_combo()
+        self.parent.config_combo.blockSignals(False)
+        self.load_config(self.parent.current_config)
+        self.save_all_configs()
+
+        QMessageBox.information(self.parent, "成功", self.format_import_summary(summary))
+
+    def generate_roster_configs(self, student_ids):
+        """按导入账号拥有的学生一次性创建或更新配置，结束后只刷新一次界面"""
+        summary = generate_roster_configs(self.parent.student_configs, student_ids,
+                                          self.parent.student_catalog, self.parent.gift_catalog)
+        changed = summary['created'] + summary['updated']
+        if not changed:
+            return summary
+
+        for name in summary['updated']:
+            self.parent.invalidate_config_cache(name)
+        if not self.parent.current_config:
+            self.parent.current_config = changed[0]
+
+        self.parent.config_combo.blockSignals(True)
+        self.update_config_combo()
+        self.parent.config_combo.blockSignals(False)
+        if self.parent.current_config in summary['updated'] or self.parent.current_config == changed[0]:
+            self.load_config(self.parent.current_config)
+        self.save_all_configs()
+        return summary
+
+    def format_import_summary(self, summary):
+        lines = [f"已导入 {len(summary['imported'])} 个配置"]
+        if summary['overwritten']:
+            lines.append(f"覆盖 {len(summary['overwritten'])} 个同名配置")
+        if summary['renamed']:
+            lines.append(f"重命名 {len(summary['renamed'])} 个同名配置，例如 "
+                         f"'{summary['renamed'][0][0]}' → '{summary['renamed'][0][1]}'")
+        if summary['skipped']:
+            lines.append(f"跳过 {len(summary['skipped'])} 个同名配置")
+        if summary['unknown_gifts']:
+            lines.append(f"忽略 {summary['unknown_gifts']} 个未知礼物")
+        if summary['invalid']:
+            lines.append(f"{len(summary['invalid'])} 个配置格式错误：")
+            lines.extend(f"  {name}: {reason}" for name, reason in summary['invalid'][:5])
+            if len(summary['invalid']) > 5:
+                lines.append("  ...")
+        return "\n".join(lines)
+
+    @metrics.timed('config.load_last')
     def load_last_config(self):
         """启动时加载已有配置"""
         try:
             config_file = resource_path(os.path.join("configs", "config.json"), use_exe_dir_for_config=True)
             if os.path.exists(config_file):
-                with open(config_file, "r", encoding="utf-8") as f:
-                            data = json.load(f)
+                # 礼物列表（旧格式）与掩码都会转换为当前礼物目录下的掩码，旧格式文件自动迁移
+                configs, last_config = read_config_file(config_file, self.parent.gift_catalog, migrate=True)
+                self.parent.student_configs = configs
 
                 # 检查是否有last_config信息
-                last_config = data.get('_last_config')
-                if last_config and last_config in data:
-                    # 排除_last_config键，只加载学生配置
-                    student_configs_data = {k: v for k, v in data.items() if k != '_last_config'}
-
-                    # 把 list 转回 set
-                    self.parent.student_configs = {
-                        name: {
-                            k: set(v) if isinstance(v, list) else v
-                            for k, v in conf.items()
-                        }
-                        for name, conf in student_configs_data.items()
-                    }
-
-                    if self.parent.student_configs:
-                        self.parent.current_config = last_config
-                        self.parent.update_config_combo()
-                        self.parent.update_special_gifts_display()
-                        print(f"加载上次配置: {last_config}，共 {len(self.parent.student_configs)} 个配置")
+                if last_config and last_config in configs:
+                    self.parent.current_config = last_config
+                    logger.info("加载上次配置: %s，共 %d 个配置", last_config, len(configs))
+                elif configs:
+                    # 如果没有last_config信息，使用第一个配置
+                    self.parent.current_config = list(configs.keys())[0]
+                    logger.info("加载配置文件，共 %d 个配置", len(configs))
                 else:
-                    # 如果没有last_config信息，加载所有配置
-                    self.parent.student_configs = {
-                        name: {
-                            k: set(v) if isinstance(v, list) else v
-                            for k, v in conf.items()
-                        }
-                        for name, conf in data.items()
-                    }
-                    if self.parent.student_configs:
-                        self.parent.current_config = list(self.parent.student_configs.keys())[0]
-                        self.parent.update_config_combo()
-                        self.parent.update_special_gifts_display()
-                        print(f"加载配置文件，共 {len(self.parent.student_configs)} 个配置")
+                    return
+
+                # 填充下拉框时不逐项触发加载，最后只加载一次选中的配置
+                self.parent.config_combo.blockSignals(True)
+                self.parent.update_config_combo()
+                self.parent.config_combo.blockSignals(False)
+                self.parent.load_config(self.parent.current_config)
         except Exception as e:
             QMessageBox.warning(self.parent, "警告", f"加载配置失败：{e}")
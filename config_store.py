@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""config.json 的读写（不依赖界面，供主界面与计算服务共用）
+
+特殊喜好礼物以十六进制位掩码保存，文件开头的 _gift_slots 记录写入时的槽位顺序，
+读取时若与当前礼物目录不同则重新映射。
+
+相同的特殊喜好只在 _preference_profiles 中保存一次（喜好方案），配置通过
+"preference" 引用方案ID，配置中再出现的礼物键会覆盖方案中的同名键。
+读取时每个方案只解码一次，引用同一方案的配置共享同一组掩码对象。
+旧版本保存的礼物ID列表格式在读取时自动转换，主界面启动时会把旧文件迁移为新格式。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import favor_core
+
+SLOTS_KEY = '_gift_slots'
+PROFILES_KEY = '_preference_profiles'
+LAST_CONFIG_KEY = '_last_config'
+PREFERENCE_KEY = 'preference'
+BACKUP_SUFFIX = '.bak'
+
+
+def preference_id(masks):
+    """按掩码内容生成稳定的喜好方案ID"""
+    payload = ','.join(favor_core.GiftCatalog.encode_mask(mask) for mask in masks)
+    return hashlib.sha1(payload.encode('ascii')).hexdigest()[:8]
+
+
+def resolve_preference(conf, profiles):
+    """把引用喜好方案的配置展开为完整配置（未解码），引用不存在时抛出ValueError"""
+    profile_id = conf.get(PREFERENCE_KEY)
+    if profile_id is None:
+        return conf
+    if profile_id not in profiles:
+        raise ValueError(f"未知的喜好方案: {profile_id}")
+    resolved = dict(profiles[profile_id])
+    resolved.update((k, v) for k, v in conf.items() if k != PREFERENCE_KEY)
+    return resolved
+
+
+def decode_configs(data, catalog):
+    """把文件内容转换为 (配置名->配置, 上次使用的配置名)"""
+    slot_ids = data.get(SLOTS_KEY)
+    profiles = {
+        profile_id: favor_core.normalize_config(profile, catalog, slot_ids)
+        for profile_id, profile in data.get(PROFILES_KEY, {}).items()
+    }
+
+    configs = {}
+    for name, conf in data.items():
+        if name.startswith('_') or not isinstance(conf, dict):
+            continue
+        profile_id = conf.get(PREFERENCE_KEY)
+        if profile_id is None:
+            configs[name] = favor_core.normalize_config(conf, catalog, slot_ids)
+            continue
+        if profile_id not in profiles:
+            raise ValueError(f"配置 '{name}' 引用了未知的喜好方案: {profile_id}")
+        profile = profiles[profile_id]
+        config = {}
+        for key, value in conf.items():
+            if key in favor_core.GIFT_SET_KEYS:
+                config[key] = catalog.decode_mask(value, slot_ids)
+            elif key != PREFERENCE_KEY:
+                config[key] = value
+        for key in favor_core.GIFT_SET_KEYS:
+            if key not in config:
+                config[key] = profile[key]
+        configs[name] = config
+    return configs, data.get(LAST_CONFIG_KEY)
+
+
+def encode_config(config):
+    """把内存中的配置转换为可写入JSON的格式（去掉 _ 开头的临时数据）"""
+    encoded = {}
+    for key, value in config.items():
+        if key.startswith('_'):
+            continue
+        if key in favor_core.GIFT_SET_KEYS:
+            value = favor_core.GiftCatalog.encode_mask(value)
+        elif isinstance(value, (set, frozenset)):
+            value = sorted(value)
+        encoded[key] = value
+    return encoded
+
+
+def encode_configs(configs, catalog, last_config=None):
+    """生成写入文件的内容：特殊喜好相同的配置共享一个喜好方案"""
+    profiles = {}
+    encoded_configs = {}
+    for name, config in configs.items():
+        masks = tuple(config.get(key, 0) for key in favor_core.GIFT_SET_KEYS)
+        encoded = {k: v for k, v in encode_config(config).items() if k not in favor_core.GIFT_SET_KEYS}
+        if any(masks):
+            profile_id = preference_id(masks)
+            profiles[profile_id] = {key: favor_core.GiftCatalog.encode_mask(mask)
+                                    for key, mask in zip(favor_core.GIFT_SET_KEYS, masks) if mask}
+            encoded = {PREFERENCE_KEY: profile_id, **encoded}
+        encoded_configs[name] = encoded
+
+    # 流式导入依赖 _gift_slots 与 _preference_profiles 位于所有配置之前
+    data = {SLOTS_KEY: list(catalog.slot_ids), PROFILES_KEY: profiles}
+    data.update(encoded_configs)
+    if last_config:
+        data[LAST_CONFIG_KEY] = last_config
+    return data
+
+
+def read_config_file(path, catalog, migrate=False):
+    """读取配置文件，文件不存在时返回 ({}, None)
+
+    migrate 为 True 时，把没有喜好方案的旧格式文件备份为 .bak 后按新格式重写。
+    """
+    if not os.path.exists(path):
+        return {}, None
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    configs, last_config = decode_configs(data, catalog)
+
+    if migrate and PROFILES_KEY not in data and configs:
+        shutil.copyfile(path, path + BACKUP_SUFFIX)
+        write_config_file(path, configs, catalog, last_config)
+    return configs, last_config
+
+
+def write_config_file(path, configs, catalog, last_config=None):
+    """写出全部配置，掩码按 catalog 当前的槽位编码"""
+    data = encode_configs(configs, catalog, last_config)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
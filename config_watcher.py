@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""监视 config.json 的外部修改
+
+文件（及其所在目录，编辑器常用替换文件的方式保存）变化后稍作延迟再检查：
+修改时间与大小未变、或内容哈希与上次一致时不做任何事；否则按配置逐个比较指纹，
+只把新增、修改、删除的配置合并到 student_configs，不重新加载整个文件对应的界面。
+当前配置有未保存的修改时不覆盖，记为冲突，保存时再询问是否覆盖外部修改。
+"""
+
+import hashlib
+import json
+import os
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from config_store import decode_configs, encode_config
+from result_cache import fingerprint
+import app_logging
+
+logger = app_logging.get_logger(__name__)
+
+RELOAD_DELAY_MS = 200
+
+
+def config_fingerprints(configs):
+    """配置名 -> 按写入格式计算的指纹"""
+    return {name: fingerprint(encode_config(config)) for name, config in configs.items()}
+
+
+class ConfigFileWatcher(QObject):
+    """把 config.json 的外部修改增量合并到主界面"""
+
+    # (新增, 修改, 删除, 冲突) 的配置名列表
+    configs_changed = pyqtSignal(list, list, list, list)
+
+    def __init__(self, parent, path):
+        super().__init__(parent)
+        self.parent = parent
+        self.path = os.path.abspath(path)
+        self.conflicts = set()
+        self._stat = None
+        self._hash = None
+        self._fingerprints = {}
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._schedule_check)
+        self._watcher.directoryChanged.connect(self._schedule_check)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(RELOAD_DELAY_MS)
+        self._timer.timeout.connect(self.check)
+
+    def start(self):
+        """记录当前文件内容作为基准并开始监视"""
+        self.mark_synced()
+        directory = os.path.dirname(self.path)
+        if os.path.isdir(directory) and directory not in self._watcher.directories():
+            self._watcher.addPath(directory)
+        self._watch_file()
+
+    def _watch_file(self):
+        # 文件被替换后原监视会失效，需要重新添加
+        if os.path.exists(self.path) and self.path not in self._watcher.files():
+            self._watcher.addPath(self.path)
+
+    def _schedule_check(self, _path=None):
+        self._timer.start()
+
+    def _read(self):
+        """返回 (stat, 内容哈希, 文件数据)，文件不存在时为 (None, None, {})"""
+        try:
+            stat = os.stat(self.path)
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except OSError:
+            return None, None, {}
+        data = json.loads(raw.decode('utf-8')) if raw.strip() else {}
+        return (stat.st_mtime_ns, stat.st_size), hashlib.sha1(raw).hexdigest(), data
+
+    def mark_synced(self):
+        """程序自身写入文件后调用：以文件当前内容为基准，不当作外部修改"""
+        try:
+            stat, content_hash, data = self._read()
+            configs, _ = decode_configs(data, self.parent.gift_catalog)
+        except ValueError as e:
+            logger.warning("读取配置文件失败 %s: %s", self.path, e)
+            return
+        self._stat, self._hash = stat, content_hash
+        self._fingerprints = config_fingerprints(configs)
+        self.conflicts.clear()
+
+    def check(self):
+        """检查文件是否被外部修改，返回是否合并了修改"""
+        self._watch_file()
+        try:
+            stat = os.stat(self.path)
+            stat = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stat = None
+        if stat == self._stat:
+            return False
+
+        try:
+            stat, content_hash, data = self._read()
+            if content_hash == self._hash:
+                self._stat = stat
+                return False
+            configs, _ = decode_configs(data, self.parent.gift_catalog)
+        except ValueError as e:
+            # 外部程序可能正在写入，等下一次变化再读取
+            logger.warning("外部修改后的配置文件无法解析，暂不合并: %s", e)
+            return False
+
+        fingerprints = config_fingerprints(configs)
+        added = [name for name in fingerprints if name not in self._fingerprints]
+        changed = [name for name in fingerprints
+                   if name in self._fingerprints and fingerprints[name] != self._fingerprints[name]]
+        removed = [name for name in self._fingerprints if name not in fingerprints]
+        self._stat, self._hash, self._fingerprints = stat, content_hash, fingerprints
+        if not (added or changed or removed):
+            return False
+
+        conflicts = self.merge(configs, added, changed, removed)
+        logger.info("配置文件被外部修改: 新增 %s，修改 %s，删除 %s，冲突 %s", added, changed, removed, conflicts)
+        self.configs_changed.emit(added, changed, removed, conflicts)
+        return True
+
+    def merge(self, configs, added, changed, removed):
+        """把外部修改写入 student_configs，返回冲突的配置名"""
+        parent = self.parent
+        current = parent.current_config
+        conflicts = []
+        combo = parent.config_combo
+        combo.blockSignals(True)
+        try:
+            for name in added + changed:
+                if name == current and parent.config_modified:
+                    conflicts.append(name)
+                    continue
+                is_new = name not in parent.student_configs
+                parent.student_configs[name] = configs[name]
+                parent.invalidate_config_cache(name)
+                if is_new:
+                    combo.addItem(name)
+            for name in removed:
+                if name == current:
+                    conflicts.append(name)  # 正在使用的配置保留在内存中，保存时重新写回
+                    continue
+                if parent.student_configs.pop(name, None) is not None:
+                    parent.invalidate_config_cache(name)
+                    index = combo.findText(name)
+                    if index >= 0:
+                        combo.removeItem(index)
+        finally:
+            combo.blockSignals(False)
+
+        self.conflicts.update(conflicts)
+        if current in changed and current not in conflicts:
+            parent.load_config(current)  # 当前配置被外部修改且本地没有未保存的修改
+        return conflicts
@@ -2,7 +2,8 @@
 # -*- coding: utf-8 -*-
 
 import csv
-from utils import resource_path
+import io
+from utils import resource_path, resource_data
 
 class SimpleDataFrame:
     def __init__(self, data, columns):
@@ -40,11 +41,25 @@ def notna(value):
     return value is not None and value != '' and str(value).strip() != ''
 
 def load_csv_data(file_path):
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        return _parse_csv(f)
+
+def load_csv_buffer(buffer):
+    """从内存中的CSV内容（bytes/memoryview）读取"""
+    return _parse_csv(io.StringIO(str(buffer, 'utf-8-sig'), newline=''))
+
+def load_csv_resource(relative_path):
+    """读取随程序附带的CSV资源（优先资源包）"""
+    data = resource_data(relative_path)
+    if data is None:
+        raise FileNotFoundError(f"找不到资源文件: {relative_path}")
+    return load_csv_buffer(data)
+
+def _parse_csv(lines):
     data = []
-    with open(file_path, 'r', encoding='utf-8-sig') as f:
-        reader = csv.reader(f)
-        columns = next(reader)
-        columns = [col.strip('\ufeff') for col in columns]
-        for row in reader:
-            data.append(row)
+    reader = csv.reader(lines)
+    columns = next(reader)
+    columns = [col.strip('\ufeff') for col in columns]
+    for row in reader:
+        data.append(row)
     return SimpleDataFrame(data, columns)
@@ -5,22 +5,53 @@ from version import __version__
 
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QMessageBox, QDialog
-from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt, QTimer
-
-from utils import resource_path
+import time
+import multiprocessing
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QMessageBox, QDialog,
+                             QShortcut)
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+from utils import resource_path, resource_data, load_resource_icon
 from gift_config_dialog import GiftConfigDialog
-from data_models import load_csv_data
+from data_models import load_csv_buffer
+from student_catalog import load_student_catalog
+import favor_core
+from result_cache import ResultCache
+from inventory_store import InventoryStore
+from inventory_history import InventoryHistory, HISTORY_FILE
+from history_dialog import InventoryHistoryDialog
+from projection_dialog import ProjectionDialog
 from version_manager import VersionManager
 from import_manager import ImportManager
 from config_manager import ConfigManager
+from sync_manager import SyncManager
+from update_prefetcher import UpdatePrefetcher
 from ui_components import UIComponents
+from memory_diagnostics import MemoryProfiler
+from log_viewer import LogViewerDialog
+from metrics_dialog import MetricsDialog
+from config_watcher import ConfigFileWatcher
+from session_store import (SESSION_FILE, data_fingerprint, config_fingerprint, input_fingerprint, read_session,
+                           write_session)
+from single_instance import (InstanceServer, instance_arguments, forward_to_running_instance,
+                             NEW_INSTANCE_FLAG, PASTE_COMMAND)
+import app_logging
+import metrics
+
+logger = app_logging.get_logger(__name__)
 
 class FavorCalculator(QMainWindow):
+    startup_finished = pyqtSignal()
+
     def __init__(self):
         super().__init__()
+        self._startup_started = time.perf_counter()
+        self.startup_complete = False
+        self._pending_instance_args = []
         self.gifts_data = None
+        self.gift_catalog = None
+        self.student_catalog = None
         self.levels_data = None
         self.student_configs = {}
         self.current_config = None
@@ -30,25 +61,166 @@ class FavorCalculator(QMainWindow):
         self.config_modified = False  # 跟踪配置是否被修改
         self.is_linked_student_checkbox = None
         self.previous_special_gifts = {}
+        self.result_cache = ResultCache()
+        self.inventory_store = InventoryStore()  # 按账号保存导入的库存
+        self.inventory_history = InventoryHistory(
+            os.path.join(resource_path("configs", use_exe_dir_for_config=True), HISTORY_FILE))
+        self.memory_profiler = None  # 诊断模式下由 main 设置
+        self.data_hash = None
+        self.session_file = os.path.join(resource_path("configs", use_exe_dir_for_config=True), SESSION_FILE)
+        self._restored_scroll = None
+        self.config_watcher = ConfigFileWatcher(
+            self, os.path.join(resource_path("configs", use_exe_dir_for_config=True), "config.json"))
+        self.config_watcher.configs_changed.connect(self.on_external_config_change)
 
         # 初始化各个管理器
         self.version_manager = VersionManager(self)
         self.import_manager = ImportManager(self)
         self.config_manager = ConfigManager(self)
+        self.sync_manager = SyncManager(self)
+        self.update_prefetcher = UpdatePrefetcher(self)
         self.ui_components = UIComponents(self)
 
+        # 构造时只建立窗口框架，礼物格子、配置与首次计算在显示后的事件循环中完成
         self.init_data()
         self.init_ui()
+        self._startup_stages = self._startup_sequence()
+        QTimer.singleShot(0, self._run_startup_stage)
+
+    def _startup_sequence(self):
+        """启动的后续阶段，每次 yield 后回到事件循环，让窗口先绘制并保持响应"""
+        self.centralWidget().setEnabled(False)
+        self.menuBar().setEnabled(False)
+        self.result_text.setPlainText("正在加载...")
+        yield
+
+        yield from self.ui_components.iter_load_gifts()
+        yield
+
+        # 加载配置期间的重新计算都被推迟，启动完成时只计算一次
         self.load_last_config()
+        self.restore_session()
+        self.config_watcher.start()
+        yield
+
+        self.startup_complete = True
+        self.centralWidget().setEnabled(True)
+        self.menuBar().setEnabled(True)
+        self.calculate_favor()
+        if self._restored_scroll:
+            # 礼物网格布局完成后滚动条才有范围
+            QTimer.singleShot(0, lambda: self.gifts_scroll_area.verticalScrollBar().setValue(self._restored_scroll))
+        metrics.observe('startup.ready', time.perf_counter() - self._startup_started)
+        self.startup_finished.emit()
+        self.update_prefetcher.start()
+
+        pending, self._pending_instance_args = self._pending_instance_args, []
+        for args in pending:
+            self.handle_instance_arguments(args)
+
+    def restore_session(self):
+        """恢复上次退出时的会话，输入未变化时把保存的结果放入缓存，返回是否恢复"""
+        session = read_session(self.session_file, self.data_hash)
+        if session is None:
+            return False
+        self._restored_scroll = session.get('scroll')
+        if session.get('config') != self.current_config:
+            return False  # 配置已被删除或改名，只恢复滚动位置
+        modified = bool(session.get('modified'))
+        saved_hash = config_fingerprint(self.student_configs.get(self.current_config))
+        if not modified and session.get('config_hash') != saved_hash:
+            return False  # 配置在退出后被外部修改或同步，保留加载的配置
+
+        quantities = session['quantities']
+        for gift_id, gift_info in self.gift_inputs.items():
+            spinbox = gift_info['spinbox']
+            spinbox.blockSignals(True)
+            spinbox.setValue(quantities.get(gift_id, 0))
+            spinbox.blockSignals(False)
+        widgets = (self.level_input, self.exp_input, self.is_linked_student_checkbox)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.level_input.setValue(session.get('level', 1))
+        self.exp_input.setValue(session.get('exp', 0))
+        self.is_linked_student_checkbox.setChecked(bool(session.get('is_linked')))
+        for widget in widgets:
+            widget.blockSignals(False)
+        self.current_level = self.level_input.value()
+        self.current_exp = self.exp_input.value()
+        self.apply_linked_state(self.is_linked_student_checkbox.isChecked())
+        self.config_modified = modified
+
+        config, is_linked = self._get_favor_context()
+        cache_key = self._result_key(self.current_quantities(), config, is_linked)
+        if session.get('result') and input_fingerprint(cache_key) == session.get('input_hash'):
+            self.result_cache.put(cache_key, session['result'])
+        return True
+
+    def save_session(self):
+        """退出时保存会话快照"""
+        if not self.startup_complete or self.data_hash is None:
+            return
+        config, is_linked = self._get_favor_context()
+        quantities = self.current_quantities()
+        session = {
+            'data_hash': self.data_hash,
+            'config': self.current_config,
+            'level': self.current_level,
+            'exp': self.current_exp,
+            'is_linked': bool(self.is_linked_student_checkbox.isChecked()),
+            'modified': self.config_modified,
+            'config_hash': config_fingerprint(self.student_configs.get(self.current_config)),
+            'quantities': {str(gift_id): qty for gift_id, qty in quantities.items() if qty},
+            'scroll': self.gifts_scroll_area.verticalScrollBar().value(),
+            'input_hash': input_fingerprint(self._result_key(quantities, config, is_linked)),
+            'result': self._cached_calculate(quantities, config, is_linked),
+        }
+        try:
+            write_session(self.session_file, session)
+        except OSError as e:
+            logger.warning("保存会话快照失败: %s", e)
+
+    def on_external_config_change(self, added, changed, removed, conflicts):
+        """config.json 被外部修改并已合并"""
+        parts = []
+        if added:
+            parts.append(f"新增 {len(added)} 个")
+        if changed:
+            parts.append(f"更新 {len(changed)} 个")
+        if removed:
+            parts.append(f"删除 {len(removed)} 个")
+        message = "配置文件已在外部修改：" + "，".join(parts)
+        if conflicts:
+            message += f"；当前配置 '{self.current_config}' 与外部修改冲突，保留本地版本"
+        self.statusBar().showMessage(message, 10000)
+
+    def closeEvent(self, event):
+        self.save_session()
+        self.update_prefetcher.stop()
+        super().closeEvent(event)
+
+    def _run_startup_stage(self):
+        try:
+            next(self._startup_stages)
+        except StopIteration:
+            return
+        QTimer.singleShot(0, self._run_startup_stage)
 
     def init_data(self):
         """初始化数据"""
         try:
-            self.gifts_data = load_csv_data(resource_path('giftID.csv'))
-            print(f"加载了 {len(self.gifts_data)} 个礼物")
-
-            self.levels_data = load_csv_data(resource_path('exp.csv'))
-            print(f"加载了 {len(self.levels_data)} 个等级")
+            gifts_buffer = resource_data('giftID.csv')
+            levels_buffer = resource_data('exp.csv')
+            if gifts_buffer is None or levels_buffer is None:
+                raise FileNotFoundError("找不到 giftID.csv 或 exp.csv")
+            self.gifts_data = load_csv_buffer(gifts_buffer)
+            logger.info("加载了 %d 个礼物", len(self.gifts_data))
+            self.gift_catalog = favor_core.build_gift_table(self.gifts_data)
+            self.student_catalog = load_student_catalog()
+
+            self.levels_data = load_csv_buffer(levels_buffer)
+            self.data_hash = data_fingerprint([gifts_buffer, levels_buffer], __version__)
+            logger.info("加载了 %d 个等级", len(self.levels_data))
 
             # 预计算等级数据以提高性能
             self._precompute_levels()
@@ -67,23 +239,14 @@ class FavorCalculator(QMainWindow):
     
     def _precompute_levels(self):
         """预计算等级数据以提高性能"""
-        self.level_exp_cache = {}  # 等级 -> 所需经验的映射
-        self.level_list = []  # 按等级排序的列表
-        
-        for _, level in self.levels_data.iterrows():
-            level_num = int(level['当前等级'])
-            exp_required = int(level['达到等级累计经验'])
-            self.level_exp_cache[level_num] = exp_required
-            self.level_list.append((level_num, exp_required))
-        
-        # 按等级排序
-        self.level_list.sort(key=lambda x: x[0])
-        print(f"预计算了 {len(self.level_list)} 个等级数据")
+        # 等级 -> 所需经验的映射, 按等级排序的列表
+        self.level_exp_cache, self.level_list = favor_core.build_level_table(self.levels_data)
+        logger.debug("预计算了 %d 个等级数据", len(self.level_list))
 
     def init_ui(self):
         """初始化UI"""
         self.setWindowTitle(f"ShigureAI {__version__}")
-        self.setWindowIcon(QIcon(resource_path("icon.ico")))
+        self.setWindowIcon(load_resource_icon("icon.ico"))
         self.setGeometry(100, 100, 1600, 900)
 
         self.ui_components.create_menu_bar()
@@ -98,6 +261,9 @@ class FavorCalculator(QMainWindow):
         right_panel = self.ui_components.create_right_panel()
         main_layout.addWidget(right_panel, 3)
 
+        # 隐藏的运行指标对话框
+        QShortcut(QKeySequence("Ctrl+Shift+M"), self, activated=self.show_metrics)
+
     # 版本管理相关方法
     def show_about(self):
         self.version_manager.show_about()
@@ -119,10 +285,10 @@ class FavorCalculator(QMainWindow):
         self.config_manager.update_config_combo()
 
     def load_config(self, config_name):
-        self.config_manager.load_config(config_name)
-        # 清除配置缓存，强制重新计算
+        # 清除配置缓存，加载配置时的计算使用新配置
         if hasattr(self, '_cached_config_state'):
             self._cached_config_state = None
+        self.config_manager.load_config(config_name)
 
     def save_config(self):
         self.config_manager.save_config()
@@ -143,6 +309,32 @@ class FavorCalculator(QMainWindow):
     def import_from_file(self):
         self.import_manager.import_from_file()
 
+    def show_inventory_history(self):
+        with metrics.timer('dialog.inventory_history'):
+            dialog = InventoryHistoryDialog(self)
+        dialog.exec_()
+
+    def show_projection(self):
+        with metrics.timer('dialog.projection'):
+            dialog = ProjectionDialog(self)
+        dialog.exec_()
+
+    def show_log_viewer(self):
+        LogViewerDialog(self).exec_()
+
+    def show_metrics(self):
+        MetricsDialog(self).exec_()
+
+    def show_sync(self):
+        self.sync_manager.sync_now()
+
+    def switch_profile(self, index):
+        if index >= 0:
+            self.import_manager.switch_profile(self.profile_combo.itemData(index))
+
+    def update_profile_combo(self):
+        self.ui_components.update_profile_combo()
+
     # UI组件相关方法
     def load_gifts(self):
         self.ui_components.load_gifts()
@@ -183,65 +375,67 @@ class FavorCalculator(QMainWindow):
 
     def calculate_favor(self):
         """计算好感度"""
+        if not self.startup_complete:
+            return  # 启动完成时统一计算一次
+        self._calculate_favor()
+
+    @metrics.timed('calculate_favor')
+    def _calculate_favor(self):
         if not hasattr(self, 'level_exp_cache') or not self.level_exp_cache:
             return
 
-        # 获取当前等级的累计经验（使用缓存）
-        current_cumulative_exp = self.level_exp_cache.get(self.current_level, 0)
+        config, is_linked = self._get_favor_context()
+        quantities = self.current_quantities()
+
+        result = self._cached_calculate(quantities, config, is_linked)
+        result_text = favor_core.format_result(result)
 
-        # total_exp = 达到当前等级的总经验 + 当前等级内经验 + 礼物经验
-        total_exp = current_cumulative_exp + self.current_exp
+        # 导入了多个账号时，同时给出每个账号在当前配置下的结果
+        if len(self.inventory_store) > 1:
+            result_text += "\n\n各账号预计等级:"
+            for profile in self.inventory_store:
+                profile_quantities = {gift_id: profile['quantities'].get(gift_id, 0) for gift_id in quantities}
+                profile_result = self._cached_calculate(profile_quantities, config, is_linked)
+                marker = " (当前)" if profile['id'] == self.inventory_store.active_id else ""
+                result_text += f"\n{profile['name']}{marker}: 等级 {profile_result['target_level']}"
 
-        # 计算所有礼物的经验
+        self.result_text.setPlainText(result_text)
+
+    def current_quantities(self):
+        """礼物ID->输入框中的数量"""
+        quantities = {}
         for gift_id, gift_info in self.gift_inputs.items():
             spinbox = gift_info['spinbox']
-            if spinbox is None or spinbox.value() <= 0:
+            if spinbox is None:
                 continue
-
-            base_favor = gift_info['base_favor']
-            actual_favor = self.get_actual_favor(gift_id, base_favor)
-            total_exp += actual_favor * spinbox.value()
-
-        # 使用二分查找找到目标等级
-        target_level = self._find_target_level_binary(total_exp)
-
-        # 计算结果显示
-        result_text = f"当前状态: 等级 {self.current_level}, 经验 {self.current_exp}\n"
-        result_text += f"使用礼物后获得经验: {total_exp - current_cumulative_exp - self.current_exp}\n"
-        result_text += f"预计达到等级: {target_level}\n"
-
-        # 检查是否还有下一等级
-        if target_level < 100:
-            next_level_exp = self.level_exp_cache.get(target_level + 1)
-            if next_level_exp is not None:
-                remaining_exp = next_level_exp - total_exp
-                result_text += f"升级到 {target_level + 1} 级还需要经验: {remaining_exp}"
-            else:
-                result_text += "无下一等级数据"
-        else:
-            result_text += "已达到最高等级"
-
-        self.result_text.setPlainText(result_text)
+            quantities[gift_id] = spinbox.value()
+        return quantities
+
+    def _result_key(self, quantities, config, is_linked):
+        return self.result_cache.make_key(
+            self.current_config if config else None, config, is_linked,
+            quantities, self.current_level, self.current_exp
+        )
+
+    def _cached_calculate(self, quantities, config, is_linked):
+        # 相同配置与库存直接复用之前的结果
+        cache_key = self._result_key(quantities, config, is_linked)
+        result = self.result_cache.get(cache_key)
+        metrics.increment('calculate_favor.cache_miss' if result is None else 'calculate_favor.cache_hit')
+        if result is None:
+            result = favor_core.calculate_favor(
+                self.level_exp_cache, self.level_list, self.gift_catalog, quantities,
+                self.current_level, self.current_exp, config, is_linked
+            )
+            self.result_cache.put(cache_key, result)
+        return result
     
     def _find_target_level_binary(self, total_exp):
         """使用二分查找找到目标等级"""
-        left, right = 0, len(self.level_list) - 1
-        target_level = self.current_level
-        
-        while left <= right:
-            mid = (left + right) // 2
-            level_num, required_exp = self.level_list[mid]
-            
-            if required_exp <= total_exp:
-                target_level = level_num
-                left = mid + 1
-            else:
-                right = mid - 1
-        
-        return target_level
+        return favor_core.find_target_level(self.level_list, total_exp, self.current_level)
 
-    def get_actual_favor(self, gift_id, base_favor):
-        """获取礼物的实际好感度"""
+    def _get_favor_context(self):
+        """返回 (当前配置, 是否联动学生)"""
         # 缓存当前配置状态，避免重复查找
         if not hasattr(self, '_cached_config_state'):
             self._cached_config_state = None
@@ -260,72 +454,56 @@ class FavorCalculator(QMainWindow):
         if self.is_linked_student_checkbox is not None:
                     self._cached_is_linked = self.is_linked_student_checkbox.isChecked()
 
-        # 联动学生特殊处理
-        if self._cached_is_linked:
-            return 20 if gift_id == 100008 else base_favor
-
-        # 没有配置时直接返回基础好感度
-        if not self._cached_config:
-            return base_favor
+        return self._cached_config, self._cached_is_linked
 
-        # 特殊喜好礼物处理
-        if base_favor == 20:
-            if gift_id in self._cached_config.get('level60_gifts', set()):
-                return 60
-            elif gift_id in self._cached_config.get('level40_gifts', set()):
-                return 40
-        elif base_favor == 120:
-            if gift_id in self._cached_config.get('level240_gifts', set()):
-                return 240
-            elif gift_id in self._cached_config.get('level180_gifts', set()):
-                return 180
+    def invalidate_config_cache(self, config_name):
+        """配置的特殊喜好或联动状态被修改后，丢弃其缓存结果"""
+        self.result_cache.invalidate_config(config_name)
 
-        return base_favor
+    def get_actual_favor(self, gift_id):
+        """获取礼物的实际好感度"""
+        config, is_linked = self._get_favor_context()
+        return favor_core.get_actual_favor(self.gift_catalog, gift_id, config, is_linked)
 
-    def on_linked_student_toggled(self, state):
-        """处理联动学生复选框切换"""
-        is_linked = state == Qt.Checked
+    def apply_linked_state(self, is_linked):
+        """把联动状态写入当前配置，返回配置是否存在"""
         # 启用/禁用配置特殊礼物按钮
         self.config_gifts_btn.setEnabled(not is_linked)
 
-        # 如果没有当前配置，仍然需要重新计算
         if not self.current_config or self.current_config not in self.student_configs:
-            # 重新计算以反映联动状态变化
-            self.calculate_favor()
-            return
+            return False
 
         config = self.student_configs[self.current_config]
 
         if is_linked:
-            # 保存当前特殊喜好到配置的临时储存，然后清空以实现"全部按基础好感"效果
-            config['_previous_special_gifts'] = {
-                'level40_gifts': config.get('level40_gifts', set()).copy(),
-                'level60_gifts': config.get('level60_gifts', set()).copy(),
-                'level180_gifts': config.get('level180_gifts', set()).copy(),
-                'level240_gifts': config.get('level240_gifts', set()).copy()
-            }
-            config['level40_gifts'] = set()
-            config['level60_gifts'] = set()
-            config['level180_gifts'] = set()
-            config['level240_gifts'] = set()
+            # 保存当前特殊喜好掩码到配置的临时储存，然后清空以实现"全部按基础好感"效果
+            if '_previous_special_gifts' not in config:
+                config['_previous_special_gifts'] = {key: config.get(key, 0) for key in favor_core.SPECIAL_GIFT_KEYS}
+            for key in favor_core.SPECIAL_GIFT_KEYS:
+                config[key] = 0
         else:
             # 恢复之前保存的特殊喜好（如果有）
             if '_previous_special_gifts' in config:
-                config['level40_gifts'] = config['_previous_special_gifts'].get('level40_gifts', set())
-                config['level60_gifts'] = config['_previous_special_gifts'].get('level60_gifts', set())
-                config['level180_gifts'] = config['_previous_special_gifts'].get('level180_gifts', set())
-                config['level240_gifts'] = config['_previous_special_gifts'].get('level240_gifts', set())
-                del config['_previous_special_gifts']  # 删除临时储存
+                config.update(config.pop('_previous_special_gifts'))  # 同时删除临时储存
 
         # **关键**：把 is_linked 状态写回当前 config，这样保存/加载时能保持状态一致
-        config['is_linked_student'] = is_linked
+        if config.get('is_linked_student', False) != is_linked:
+            config['is_linked_student'] = is_linked
+            self.invalidate_config_cache(self.current_config)
+        return True
 
-        # 更新显示与计算
-        self.update_special_gifts_display()
+    def on_linked_student_toggled(self, state):
+        """处理联动学生复选框切换"""
+        has_config = self.apply_linked_state(state == Qt.Checked)
+        if has_config:
+            self.update_special_gifts_display()
+
+        # 重新计算以反映联动状态变化
         self.calculate_favor()
 
         # 标记为修改
-        self.config_modified = True
+        if has_config:
+            self.config_modified = True
 
     def configure_special_gifts(self):
         """配置特殊喜好礼物"""
@@ -338,45 +516,95 @@ class FavorCalculator(QMainWindow):
                 QMessageBox.information(self, "提示", "联动学生无法配置特殊喜好礼物。")
                 return
 
-            print(f"打开特殊喜好配置对话框，当前配置: {self.current_config}")
-            dialog = GiftConfigDialog(self.gifts_data, self.current_config, self)
-            print("对话框创建成功")
+            logger.debug("打开特殊喜好配置对话框，当前配置: %s", self.current_config)
+            with metrics.timer('dialog.special_gifts'):
+                dialog = GiftConfigDialog(self.gifts_data, self.current_config, self)
             
             result = dialog.exec_()
-            print(f"对话框返回结果: {result}")
+            logger.debug("对话框返回结果: %s", result)
+            if self.memory_profiler:
+                self.memory_profiler.snapshot('after_gift_dialog', self)
             
             if result == QDialog.Accepted:
                 selected_40, selected_60, selected_180, selected_240 = dialog.get_selected_gifts()
-                print(f"获取到选择的礼物: 40={len(selected_40)}, 60={len(selected_60)}, 180={len(selected_180)}, 240={len(selected_240)}")
+                logger.debug("获取到选择的礼物: 40=%d, 60=%d, 180=%d, 240=%d",
+                             len(selected_40), len(selected_60), len(selected_180), len(selected_240))
 
                 config = self.student_configs[self.current_config]
-                config['level40_gifts'] = selected_40
-                config['level60_gifts'] = selected_60
-                config['level180_gifts'] = selected_180
-                config['level240_gifts'] = selected_240
+                config['level40_gifts'] = self.gift_catalog.mask_of(selected_40)
+                config['level60_gifts'] = self.gift_catalog.mask_of(selected_60)
+                config['level180_gifts'] = self.gift_catalog.mask_of(selected_180)
+                config['level240_gifts'] = self.gift_catalog.mask_of(selected_240)
+                self.invalidate_config_cache(self.current_config)
 
                 self.config_modified = True
 
                 self.update_special_gifts_display()
                 self.calculate_favor()
-                print("特殊喜好配置完成")
+                logger.info("特殊喜好配置完成: %s", self.current_config)
         except Exception as e:
-            print(f"配置特殊喜好礼物时发生错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("配置特殊喜好礼物时发生错误")
             QMessageBox.critical(self, "错误", f"配置特殊喜好礼物时发生错误:\n{str(e)}")
 
+    def handle_instance_arguments(self, args):
+        """处理启动参数（含后续启动转交的参数）：--paste 从剪贴板导入，否则导入最后一个文件"""
+        if not self.startup_complete:
+            self._pending_instance_args.append(args)
+            return
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
+        if PASTE_COMMAND in args:
+            self.paste_from_clipboard()
+            return
+        files = [arg for arg in args if arg != PASTE_COMMAND]
+        if not files:
+            return
+        if os.path.isfile(files[-1]):
+            self.import_manager.start_import(file_path=files[-1])
+        else:
+            QMessageBox.warning(self, "警告", f"找不到导入文件:\n{files[-1]}")
+
 def main():
+    multiprocessing.freeze_support()  # 打包后多账号并行解析需要
+
+    # 已有实例在运行时把参数交给它处理后直接退出
+    single_instance = NEW_INSTANCE_FLAG not in sys.argv
+    startup_args = instance_arguments()
+    if single_instance and forward_to_running_instance(startup_args):
+        return
+
     # 设置高DPI支持
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
 
+    log_level, log_file = app_logging.requested_options()
+    app_logging.setup_logging(log_level, log_file,
+                              log_dir=resource_path("configs", use_exe_dir_for_config=True))
+
     app = QApplication(sys.argv)
     app.setStyle('Fusion')  # 使用Fusion样式
 
+    # 诊断模式需在加载数据前开始跟踪内存
+    memory_profiler = MemoryProfiler.from_environment()
+
     window = FavorCalculator()
     window.show()
 
+    if single_instance:
+        instance_server = InstanceServer(parent=app)
+        instance_server.message_received.connect(window.handle_instance_arguments)
+        instance_server.listen()
+    if startup_args:
+        window.handle_instance_arguments(startup_args)
+
+    if memory_profiler:
+        window.memory_profiler = memory_profiler
+        window.startup_finished.connect(lambda: memory_profiler.snapshot('startup', window))
+        app.aboutToQuit.connect(lambda: logger.warning("内存诊断报告: %s", memory_profiler.export()))
+
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""好感度计算核心逻辑（不依赖界面，供主界面与计算服务共用）
+
+特殊喜好以位掩码保存：礼物目录为每个礼物分配固定的槽位，第 i 位表示槽位 i 的礼物。
+每个配置编译为按槽位排列的实际好感向量，计算时与数量向量做一次点积。
+"""
+
+import operator
+
+from data_models import notna
+
+GIFT_SET_KEYS = ('level20_gifts', 'level40_gifts', 'level60_gifts',
+                 'level120_gifts', 'level180_gifts', 'level240_gifts')
+SPECIAL_GIFT_KEYS = ('level40_gifts', 'level60_gifts', 'level180_gifts', 'level240_gifts')
+SPECIAL_FAVORS = ((20, 40), (20, 60), (120, 180), (120, 240))  # 与 SPECIAL_GIFT_KEYS 对应的 (基础好感, 实际好感)
+LINKED_GIFT_ID = 100008  # 联动学生时礼物选择盒按20好感计算
+MAX_LEVEL = 100
+COMPILED_CACHE_SIZE = 256
+
+
+class GiftCatalog(dict):
+    """礼物ID->基础好感 的映射（保持表内顺序），并为每个礼物分配位掩码槽位
+
+    槽位只分配给目录中的礼物，配置中引用的目录外礼物在转换为掩码时被忽略，
+    不会在共享的目录中留下多余的槽位（也不会写入配置文件的 _gift_slots）。
+    """
+
+    def __init__(self, gift_favors=()):
+        super().__init__(gift_favors)
+        self.slot_ids = list(self)
+        self.slots = {gift_id: slot for slot, gift_id in enumerate(self.slot_ids)}
+        self._compiled = {}
+        self._base = None
+        self._linked = None
+
+    def slot_of(self, gift_id):
+        """返回礼物的槽位，目录外的礼物返回None"""
+        return self.slots.get(gift_id)
+
+    def mask_of(self, gift_ids):
+        """礼物ID -> 掩码，忽略目录外的礼物"""
+        mask = 0
+        slots = self.slots
+        for gift_id in gift_ids:
+            slot = slots.get(int(gift_id))
+            if slot is not None:
+                mask |= 1 << slot
+        return mask
+
+    def ids_of(self, mask):
+        """按槽位顺序返回掩码中的礼物ID"""
+        ids = []
+        slot = 0
+        while mask:
+            if mask & 1:
+                ids.append(self.slot_ids[slot])
+            mask >>= 1
+            slot += 1
+        return ids
+
+    def remap(self, mask, slot_ids):
+        """把按另一套槽位顺序（slot_ids）编码的掩码转换为本目录的掩码"""
+        if list(slot_ids) == self.slot_ids[:len(slot_ids)]:
+            return mask & ((1 << len(slot_ids)) - 1)
+        return self.mask_of(self.decode_ids(mask, slot_ids))
+
+    def decode_ids(self, value, slot_ids=None):
+        """把配置文件中的礼物列表（旧格式）或按 slot_ids 编码的十六进制掩码转换为礼物ID列表
+
+        结果可能包含目录外的礼物，不分配槽位；slot_ids 为None时按本目录的槽位解码。
+        """
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return [int(gift_id) for gift_id in value]
+        if isinstance(value, str):
+            value = int(value, 16) if value else 0
+        slot_ids = self.slot_ids if slot_ids is None else slot_ids
+        return [slot_ids[slot] for slot in range(min(value.bit_length(), len(slot_ids))) if value >> slot & 1]
+
+    def decode_mask(self, value, slot_ids=None):
+        """把配置文件中的礼物列表（旧格式）或十六进制掩码转换为掩码，目录外的礼物被忽略"""
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return self.mask_of(value)
+        if isinstance(value, str):
+            value = int(value, 16) if value else 0
+        if slot_ids is not None:
+            return self.remap(value, slot_ids)
+        return value & ((1 << len(self.slot_ids)) - 1)
+
+    @staticmethod
+    def encode_mask(mask):
+        return format(mask, 'x')
+
+    def quantity_vector(self, quantities):
+        """按槽位排列的数量向量，负数按0处理"""
+        vector = [0] * len(self.slot_ids)
+        slots = self.slots
+        for gift_id, quantity in quantities.items():
+            slot = slots.get(gift_id)
+            if slot is not None and quantity > 0:
+                vector[slot] = quantity
+        return vector
+
+    def _base_vectors(self):
+        if self._base is None or len(self._base) != len(self.slot_ids):
+            self._base = tuple(self.get(gift_id, 0) for gift_id in self.slot_ids)
+            # 联动学生：只有礼物选择盒按20好感计算
+            self._linked = tuple(20 if gift_id == LINKED_GIFT_ID else favor
+                                 for gift_id, favor in zip(self.slot_ids, self._base))
+        return self._base, self._linked
+
+    def compile(self, config, is_linked=False):
+        """编译配置的实际好感向量（按槽位排列），相同特殊喜好的配置共享同一结果"""
+        base, linked = self._base_vectors()
+        if is_linked:
+            return linked
+        masks = tuple(config.get(key, 0) for key in SPECIAL_GIFT_KEYS) if config else None
+        if not masks or not any(masks):
+            return base
+
+        vector = self._compiled.get(masks)
+        if vector is None:
+            if len(self._compiled) >= COMPILED_CACHE_SIZE:
+                self._compiled = {}
+            vector = list(base)
+            # 后应用的档位优先：同时标记时60优先于40，240优先于180
+            for mask, (base_favor, favor) in zip(masks, SPECIAL_FAVORS):
+                while mask:
+                    low = mask & -mask
+                    slot = low.bit_length() - 1
+                    if base[slot] == base_favor:
+                        vector[slot] = favor
+                    mask ^= low
+            vector = self._compiled[masks] = tuple(vector)
+        return vector
+
+
+def build_level_table(levels_data):
+    """由等级表生成 (等级->累计经验映射, 按等级排序的列表)"""
+    level_exp_cache = {}
+    level_list = []
+
+    for _, level in levels_data.iterrows():
+        level_num = int(level['当前等级'])
+        exp_required = int(level['达到等级累计经验'])
+        level_exp_cache[level_num] = exp_required
+        level_list.append((level_num, exp_required))
+
+    level_list.sort(key=lambda x: x[0])
+    return level_exp_cache, level_list
+
+
+def build_gift_table(gifts_data):
+    """由礼物表生成礼物目录 GiftCatalog（礼物ID->基础好感，保持表内顺序）"""
+    gift_favors = {}
+    for _, gift in gifts_data.iterrows():
+        try:
+            if not notna(gift['ID']):
+                continue
+            base_favor = int(gift.get('基础经验值', 0)) if notna(gift.get('基础经验值')) else 0
+            gift_favors[int(gift['ID'])] = base_favor
+        except (ValueError, TypeError):
+            continue
+    return GiftCatalog(gift_favors)
+
+
+def normalize_config(conf, catalog, slot_ids=None):
+    """把从JSON读取的配置中的礼物列表或掩码转换为 catalog 下的掩码
+
+    slot_ids 为配置文件记录的槽位顺序（_gift_slots），与 catalog 不同时重新映射。
+    """
+    config = {k: catalog.decode_mask(v, slot_ids) if k in GIFT_SET_KEYS else v for k, v in conf.items()}
+    for key in GIFT_SET_KEYS:
+        config.setdefault(key, 0)
+    return config
+
+
+def get_actual_favor(catalog, gift_id, config, is_linked=False):
+    """获取礼物在指定配置下的实际好感度，目录外的礼物为0"""
+    slot = catalog.slot_of(gift_id)
+    if slot is None:
+        return 0
+    return catalog.compile(config, is_linked)[slot]
+
+
+def find_target_level(level_list, total_exp, default_level):
+    """使用二分查找找到累计经验可达到的等级"""
+    left, right = 0, len(level_list) - 1
+    target_level = default_level
+
+    while left <= right:
+        mid = (left + right) // 2
+        level_num, required_exp = level_list[mid]
+
+        if required_exp <= total_exp:
+            target_level = level_num
+            left = mid + 1
+        else:
+            right = mid - 1
+
+    return target_level
+
+
+def calculate_favor(level_exp_cache, level_list, catalog, quantities,
+                    start_level, start_exp, config=None, is_linked=False):
+    """计算使用礼物后的等级，返回结果字典
+
+    quantities 为 礼物ID->数量 的映射，不在 catalog 中的礼物会被忽略。
+    """
+    current_cumulative_exp = level_exp_cache.get(start_level, 0)
+    total_exp = current_cumulative_exp + start_exp
+    total_exp += sum(map(operator.mul, catalog.compile(config, is_linked), catalog.quantity_vector(quantities)))
+
+    target_level = find_target_level(level_list, total_exp, start_level)
+
+    result = {
+        'start_level': start_level,
+        'start_exp': start_exp,
+        'total_exp': total_exp,
+        'gained_exp': total_exp - current_cumulative_exp - start_exp,
+        'target_level': target_level,
+        'next_level': None,
+        'remaining_exp': None,
+    }
+    if target_level < MAX_LEVEL:
+        next_level_exp = level_exp_cache.get(target_level + 1)
+        if next_level_exp is not None:
+            result['next_level'] = target_level + 1
+            result['remaining_exp'] = next_level_exp - total_exp
+    return result
+
+
+def format_result(result):
+    """把计算结果格式化为界面显示的文本"""
+    result_text = f"当前状态: 等级 {result['start_level']}, 经验 {result['start_exp']}\n"
+    result_text += f"使用礼物后获得经验: {result['gained_exp']}\n"
+    result_text += f"预计达到等级: {result['target_level']}\n"
+
+    if result['target_level'] < MAX_LEVEL:
+        if result['next_level'] is not None:
+            result_text += f"升级到 {result['next_level']} 级还需要经验: {result['remaining_exp']}"
+        else:
+            result_text += "无下一等级数据"
+    else:
+        result_text += "已达到最高等级"
+    return result_text
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""多周好感度预测
+
+按每日礼物收入预测每个学生配置到达目标等级的天数。每个配置使用礼物目录编译的
+实际好感向量，与收入向量做一次点积得到每日经验，再对每个目标等级
+用闭式解求出到达天数，因此耗时与预测天数无关，只与 配置数 × 礼物数 成正比。
+"""
+
+import math
+import operator
+import time
+
+import favor_core
+
+SECONDS_PER_DAY = 86400
+DEFAULT_TARGETS = (50, 80, 100)
+
+
+def income_from_history(history, profile_id, window_days=28, now=None):
+    """用快照历史估算每日礼物收入 礼物ID->每日数量"""
+    now = time.time() if now is None else now
+    since = now - window_days * SECONDS_PER_DAY
+    timestamps = [t for t in history.snapshots(profile_id) if t <= now]
+    if len(timestamps) < 2:
+        return {}
+    # 以窗口内（含窗口前最后一条）实际覆盖的时间作为分母
+    first = max(since, timestamps[0])
+    span_days = (timestamps[-1] - first) / SECONDS_PER_DAY
+    if span_days <= 0:
+        return {}
+    gains = history.gains_since(profile_id, first, now)
+    return {gift_id: amount / span_days for gift_id, amount in gains.items()}
+
+
+def project_roster(level_exp_cache, level_list, catalog, configs, income,
+                   targets=DEFAULT_TARGETS, horizon_days=365, include_inventory=False):
+    """预测每个配置到达各目标等级的天数
+
+    configs 为 配置名->配置；income 为 礼物ID->每日数量。
+    include_inventory 为 True 时先用掉配置中保存的礼物数量。
+    每个学生独立计算，即假设全部收入都用于该学生。
+    返回 {配置名: {'daily_exp', 'start_level', 'levels': {目标等级: 天数或None}}}，
+    已达到的目标为0，超出 horizon_days 或无收入时为None。
+    """
+    income_vector = catalog.quantity_vector(income)
+    target_exp = {level: level_exp_cache[level] for level in targets if level in level_exp_cache}
+
+    projections = {}
+    for name, config in configs.items():
+        is_linked = config.get('is_linked_student', False)
+        start_level = config.get('start_level', 1)
+        start_total = level_exp_cache.get(start_level, 0) + config.get('start_exp', 0)
+        if include_inventory:
+            stock = {int(k): v for k, v in config.get('gift_quantities', {}).items()}
+            start_total = favor_core.calculate_favor(
+                level_exp_cache, level_list, catalog, stock, start_level,
+                config.get('start_exp', 0), config, is_linked)['total_exp']
+
+        daily_exp = sum(map(operator.mul, catalog.compile(config, is_linked), income_vector))
+
+        levels = {}
+        for level, required in target_exp.items():
+            if required <= start_total:
+                levels[level] = 0
+            elif daily_exp <= 0:
+                levels[level] = None
+            else:
+                day = math.ceil((required - start_total) / daily_exp)
+                levels[level] = day if day <= horizon_days else None
+
+        projections[name] = {
+            'daily_exp': daily_exp,
+            'start_total': start_total,
+            'start_level': favor_core.find_target_level(level_list, start_total, start_level),
+            'levels': levels,
+        }
+    return projections
+
+
+def level_on_day(level_list, projection, day):
+    """预测第 day 天的等级"""
+    return favor_core.find_target_level(level_list, projection['start_total'] + projection['daily_exp'] * day,
+                                        projection['start_level'])
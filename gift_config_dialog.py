@@ -18,10 +18,11 @@ class GiftConfigDialog(QDialog):
 
         if parent is not None and hasattr(parent, 'student_configs') and current_config in parent.student_configs:
             config = parent.student_configs[current_config]
-            self.level40_gifts = set(config.get('level40_gifts', set()))
-            self.level60_gifts = set(config.get('level60_gifts', set()))
-            self.level180_gifts = set(config.get('level180_gifts', set()))
-            self.level240_gifts = set(config.get('level240_gifts', set()))
+            catalog = parent.gift_catalog
+            self.level40_gifts = set(catalog.ids_of(config.get('level40_gifts', 0)))
+            self.level60_gifts = set(catalog.ids_of(config.get('level60_gifts', 0)))
+            self.level180_gifts = set(catalog.ids_of(config.get('level180_gifts', 0)))
+            self.level240_gifts = set(catalog.ids_of(config.get('level240_gifts', 0)))
 
             conflicts = self.level40_gifts & self.level60_gifts
             if conflicts:
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton,
+                             QTableWidget, QTableWidgetItem, QDateEdit, QTextEdit, QHeaderView)
+from PyQt5.QtCore import QDate
+
+import favor_core
+
+class InventoryHistoryDialog(QDialog):
+    """查看导入快照历史与一段时间内获得的礼物"""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.history = parent.inventory_history
+        self.setWindowTitle("库存历史")
+        self.resize(640, 520)
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("账号:"))
+        self.profile_combo = QComboBox()
+        for profile_id, name in self.history.profile_names().items():
+            self.profile_combo.addItem(name or profile_id, profile_id)
+        self.profile_combo.currentIndexChanged.connect(self.refresh)
+        profile_layout.addWidget(self.profile_combo, 1)
+        layout.addLayout(profile_layout)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["导入时间", "礼物总数", "当前配置下预计等级"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        gains_layout = QHBoxLayout()
+        gains_layout.addWidget(QLabel("统计自:"))
+        self.since_edit = QDateEdit(QDate.currentDate().addDays(-7))
+        self.since_edit.setCalendarPopup(True)
+        self.since_edit.dateChanged.connect(self.update_gains)
+        gains_layout.addWidget(self.since_edit)
+        gains_layout.addWidget(QLabel("以来获得的礼物"))
+        gains_layout.addStretch()
+        layout.addLayout(gains_layout)
+
+        self.gains_text = QTextEdit()
+        self.gains_text.setReadOnly(True)
+        self.gains_text.setMaximumHeight(140)
+        layout.addWidget(self.gains_text)
+
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        layout.addWidget(close_btn)
+
+    def refresh(self):
+        profile_id = self.profile_combo.currentData()
+        timestamps = self.history.snapshots(profile_id) if profile_id else []
+
+        config, is_linked = self.parent._get_favor_context()
+
+        self.table.setRowCount(len(timestamps))
+        for row, timestamp in enumerate(reversed(timestamps)):
+            quantities = self.history.quantities_at(profile_id, timestamp)
+            result = favor_core.calculate_favor(
+                self.parent.level_exp_cache, self.parent.level_list, self.parent.gift_catalog, quantities,
+                self.parent.current_level, self.parent.current_exp, config, is_linked)
+            time_text = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+            self.table.setItem(row, 0, QTableWidgetItem(time_text))
+            self.table.setItem(row, 1, QTableWidgetItem(str(sum(quantities.values()))))
+            self.table.setItem(row, 2, QTableWidgetItem(str(result['target_level'])))
+        self.update_gains()
+
+    def update_gains(self):
+        profile_id = self.profile_combo.currentData()
+        if not profile_id:
+            self.gains_text.setPlainText("暂无导入记录")
+            return
+        since = self.since_edit.date().toPyDate()
+        gains = self.history.gains_since(profile_id, since)
+        if not gains:
+            self.gains_text.setPlainText("该时间段内没有新增礼物")
+            return
+        lines = []
+        for gift_id, amount in sorted(gains.items(), key=lambda x: -x[1]):
+            name = self.parent.gift_inputs.get(gift_id, {}).get('name', str(gift_id))
+            lines.append(f"{name}: +{amount}")
+        self.gains_text.setPlainText("\n".join(lines))
@@ -2,13 +2,256 @@
 # -*- coding: utf-8 -*-
 
 import json
+import os
 import re
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from PyQt5.QtCore import QTimer
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication, QProgressDialog
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal
+
+import app_logging
+import metrics
+
+logger = app_logging.get_logger(__name__)
+
+# 查找类似 "id": 1234, "number": 5 的模式（支持单双引号，更宽松的格式）
+ITEM_PATTERN = re.compile(r"""['"]?id['"]?\s*:\s*([0-9]+).*?['"]?number['"]?\s*:\s*([0-9]+)""",
+                          re.DOTALL | re.IGNORECASE)
+# 账号对象以字符串id开头，学生/物品等条目的id均为数字
+PROFILE_START_PATTERN = re.compile(r'\{\s*"id"\s*:\s*"')
+READ_CHUNK_SIZE = 1 << 20
+CANCEL_CHECK_INTERVAL = 2048
+PARALLEL_PARSE_THRESHOLD = 16 * 1024 * 1024  # 超过该大小的多账号文件用进程池解析
+
+class ImportParseError(Exception):
+    """导入失败，code 用于区分失败原因"""
+    EMPTY = 'empty'
+    READ_FAILED = 'read_failed'
+    INVALID_FORMAT = 'invalid_format'
+    NO_GIFTS = 'no_gifts'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, code, message, detail=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.detail = detail
+
+def extract_json_profiles(data, offset=0):
+    """从已解析的bacv数据中取出所有账号，格式不符时返回None
+
+    offset 为第一个账号在整个文件中的序号，用于生成缺省的账号id与名称。
+    """
+    if not isinstance(data, list):
+        return None
+    profiles = [p for p in data if isinstance(p, dict) and 'item' in p]
+    if not profiles:
+        return None
+    return [{'id': str(p.get('id') or i + 1), 'name': p.get('name') or f"账号{i + 1}", 'items': p['item'] or [],
+             'students': extract_student_ids(p)}
+            for i, p in enumerate(profiles, offset)]
+
+def extract_student_ids(profile):
+    """取出账号 student 列表中已拥有的学生ID"""
+    student_ids = []
+    for student in profile.get('student') or []:
+        try:
+            student_ids.append(int(student['id']))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return student_ids
+
+def scan_regex_items(content, progress=None, is_cancelled=None):
+    """逐条用正则提取物品列表，定期汇报进度并检查是否取消"""
+    items = []
+    total = max(1, len(content))
+    for i, match in enumerate(ITEM_PATTERN.finditer(content)):
+        items.append({'id': int(match.group(1)), 'number': int(match.group(2))})
+        if i % CANCEL_CHECK_INTERVAL == 0:
+            if is_cancelled is not None and is_cancelled():
+                raise ImportParseError(ImportParseError.CANCELLED, "导入已取消")
+            if progress is not None:
+                progress(match.end() / total)
+    return items
+
+def split_profile_chunks(content):
+    """把bacv顶层数组按账号切分为独立的JSON文本，无法切分时返回None"""
+    text = content.strip()
+    if not text.startswith('['):
+        return None
+    starts = [m.start() for m in PROFILE_START_PATTERN.finditer(text)]
+    if len(starts) < 2 or text[1:starts[0]].strip():
+        return None
+    bounds = starts + [len(text)]
+    chunks = []
+    for begin, end in zip(bounds, bounds[1:]):
+        chunk = text[begin:end].rstrip()
+        if end == len(text):
+            chunk = chunk[:-1].rstrip() if chunk.endswith(']') else None
+        elif chunk.endswith(','):
+            chunk = chunk[:-1]
+        else:
+            return None
+        if not chunk:
+            return None
+        chunks.append(chunk)
+    return chunks
+
+def build_profile(index, profile, known_gift_ids):
+    """校验单个账号的物品列表"""
+    quantities, invalid = validate_items(profile['items'], known_gift_ids)
+    return {'id': profile['id'], 'name': profile['name'], 'quantities': quantities,
+            'students': profile.get('students', []),
+            'item_count': len(profile['items']), 'invalid': invalid, 'index': index}
+
+def _parse_profile_chunk(index, chunk, known_gift_ids):
+    """进程池任务：解析并校验一个账号"""
+    profiles = extract_json_profiles([json.loads(chunk)], offset=index)
+    if not profiles:
+        raise ValueError(f"第 {index + 1} 个账号格式错误")
+    return build_profile(index, profiles[0], known_gift_ids)
+
+def _parse_chunks_parallel(chunks, known_gift_ids, progress=None, is_cancelled=None):
+    workers = min(len(chunks), os.cpu_count() or 1)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(_parse_profile_chunk, i, chunk, known_gift_ids)
+                   for i, chunk in enumerate(chunks)]
+        profiles = []
+        for done, future in enumerate(as_completed(futures), 1):
+            if is_cancelled is not None and is_cancelled():
+                raise ImportParseError(ImportParseError.CANCELLED, "导入已取消")
+            profiles.append(future.result())
+            if progress is not None:
+                progress(done / len(chunks))
+        profiles.sort(key=lambda p: p['index'])
+        return profiles
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def parse_import_profiles(content, known_gift_ids=None, progress=None, is_cancelled=None):
+    """解析导入文本中的所有账号
+
+    known_gift_ids 为None时只解析，返回 [{'id', 'name', 'items'}]；
+    否则同时校验，返回 [{'id', 'name', 'quantities', 'item_count', 'invalid'}]。
+    大文件中的多个账号由进程池并行解析，无法解析时抛出 ImportParseError。
+    """
+    if not content or not content.strip():
+        raise ImportParseError(ImportParseError.EMPTY, "导入内容为空!")
+
+    if known_gift_ids is not None and len(content) >= PARALLEL_PARSE_THRESHOLD:
+        chunks = split_profile_chunks(content)
+        if chunks:
+            try:
+                return _parse_chunks_parallel(chunks, frozenset(known_gift_ids), progress, is_cancelled)
+            except (ValueError, KeyError, TypeError, OSError, BrokenProcessPool):
+                pass  # 切分不准确时退回整体解析
+
+    json_error = None
+    try:
+        profiles = extract_json_profiles(json.loads(content))
+    except ValueError as e:
+        profiles = None
+        json_error = f"JSON解析失败: 第{e.lineno}行第{e.colno}列 {e.msg}" if hasattr(e, 'lineno') else str(e)
+    if profiles is None:
+        items = scan_regex_items(content, progress, is_cancelled)
+        profiles = [{'id': '1', 'name': "导入数据", 'items': items}] if items else None
+    if not profiles or not any(p['items'] for p in profiles):
+        raise ImportParseError(ImportParseError.INVALID_FORMAT, "无法解析数据格式!", json_error)
+
+    if known_gift_ids is None:
+        return profiles
+    return [build_profile(i, profile, known_gift_ids) for i, profile in enumerate(profiles)]
+
+def validate_items(items, known_gift_ids):
+    """把物品列表转换为 礼物ID->数量，返回 (数量映射, 跳过的非法条目数)"""
+    quantities = {}
+    invalid = 0
+    for item in items:
+        try:
+            gift_id = int(item['id'])
+            quantity = int(item['number'])
+        except (KeyError, TypeError, ValueError):
+            invalid += 1
+            continue
+        if quantity < 0:
+            invalid += 1
+            continue
+        if gift_id in known_gift_ids:
+            quantities[gift_id] = quantity
+    return quantities, invalid
+
+class ImportWorker(QObject):
+    """在后台线程读取、解析并校验导入数据"""
+    progress = pyqtSignal(int)
+    succeeded = pyqtSignal(dict)
+    failed = pyqtSignal(object)
+
+    def __init__(self, known_gift_ids, content=None, file_path=None):
+        super().__init__()
+        self.known_gift_ids = frozenset(known_gift_ids)
+        self.content = content
+        self.file_path = file_path
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _check_cancelled(self):
+        if self.is_cancelled():
+            raise ImportParseError(ImportParseError.CANCELLED, "导入已取消")
+
+    def _read_file(self):
+        try:
+            chunks = []
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                while True:
+                    chunk = f.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    self._check_cancelled()
+            return ''.join(chunks)
+        except (OSError, UnicodeDecodeError) as e:
+            raise ImportParseError(ImportParseError.READ_FAILED, "读取文件失败", str(e))
+
+    def run(self):
+        try:
+            content = self.content if self.file_path is None else self._read_file()
+            self.progress.emit(20)
+            self._check_cancelled()
+
+            profiles = parse_import_profiles(
+                content,
+                self.known_gift_ids,
+                progress=lambda fraction: self.progress.emit(20 + int(fraction * 70)),
+                is_cancelled=self.is_cancelled
+            )
+            self._check_cancelled()
+
+            if not any(profile['quantities'] for profile in profiles):
+                raise ImportParseError(ImportParseError.NO_GIFTS, "导入数据中没有可识别的礼物",
+                                       f"共 {sum(p['item_count'] for p in profiles)} 个条目")
+            self.progress.emit(100)
+            self.succeeded.emit({'profiles': profiles})
+        except ImportParseError as e:
+            self.failed.emit(e)
+        except Exception as e:
+            self.failed.emit(ImportParseError(ImportParseError.INVALID_FORMAT, "导入时发生错误", str(e)))
 
 class ImportManager:
     def __init__(self, parent):
         self.parent = parent
+        self._thread = None
+        self._worker = None
+        self._progress_dialog = None
+        self._import_started = None
+        self._roster_declined = set()  # 本次运行中已拒绝生成学生配置的账号id
 
     def paste_from_clipboard(self):
         """从剪贴板粘贴"""
@@ -19,57 +262,145 @@ class ImportManager:
             QMessageBox.warning(self.parent, "警告", "剪贴板为空!")
             return
 
-        self.parse_import_data(text)
+        self.start_import(content=text)
 
     def import_from_file(self):
         """从文件导入"""
         file_path, _ = QFileDialog.getOpenFileName(self.parent, "选择导入文件", "", "Text Files (*.txt);;All Files (*)")
 
         if file_path:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                self.parse_import_data(content)
-            except Exception as e:
-                QMessageBox.critical(self.parent, "错误", f"读取文件失败:\n{str(e)}")
-
-    def parse_import_data(self, content):
-        """解析导入数据"""
+            self.start_import(file_path=file_path)
+
+    def is_importing(self):
+        return self._thread is not None
+
+    def start_import(self, content=None, file_path=None):
+        """在后台线程中读取与解析，完成后在界面线程一次性写入"""
+        if self.is_importing():
+            QMessageBox.information(self.parent, "提示", "正在导入，请稍候")
+            return
+
+        self._import_started = time.perf_counter()
+        self._thread = QThread(self.parent)
+        self._worker = ImportWorker(self.parent.gift_inputs.keys(), content=content, file_path=file_path)
+        self._worker.moveToThread(self._thread)
+
+        self._progress_dialog = QProgressDialog("正在导入...", "取消", 0, 100, self.parent)
+        self._progress_dialog.setWindowTitle("导入")
+        self._progress_dialog.setWindowModality(Qt.WindowModal)
+        self._progress_dialog.setMinimumDuration(300)  # 快速导入不弹出进度框
+        self._progress_dialog.setAutoClose(False)
+        self._progress_dialog.setAutoReset(False)
+        # 工作线程的事件循环在解析期间被占用，取消必须直接调用
+        self._progress_dialog.canceled.connect(self._worker.cancel, Qt.DirectConnection)
+
+        self._thread.started.connect(self._worker.run)
+        self._worker.progress.connect(self._progress_dialog.setValue)
+        self._worker.succeeded.connect(self._on_import_succeeded)
+        self._worker.failed.connect(self._on_import_failed)
+        self._thread.start()
+
+    def _finish_job(self, outcome):
+        metrics.observe('import', time.perf_counter() - self._import_started)
+        metrics.increment(f'import.{outcome}')
+        self._thread.quit()
+        self._thread.wait()
+        self._thread.deleteLater()
+        self._worker.deleteLater()
+        self._progress_dialog.close()
+        self._progress_dialog.deleteLater()
+        self._thread = None
+        self._worker = None
+        self._progress_dialog = None
+
+    def _on_import_succeeded(self, result):
+        self._finish_job('succeeded')
+        profiles = result['profiles']
+        self.parent.inventory_store.replace(profiles)
+        self.record_history(profiles)
+        self.parent.update_profile_combo()
+        imported_count = self.apply_gift_quantities(profiles[0]['quantities'])
+
+        message = f"成功导入 {imported_count} 个礼物的数量"
+        if len(profiles) > 1:
+            message = f"共导入 {len(profiles)} 个账号，当前账号 '{profiles[0]['name']}' {message}"
+            message += "\n可在\"账号\"下拉框中切换"
+        invalid = sum(profile['invalid'] for profile in profiles)
+        if invalid:
+            message += f"\n跳过 {invalid} 个格式错误的条目"
+        QMessageBox.information(self.parent, "导入完成", message)
+        self.offer_roster_configs(profiles[0])
+
+    def offer_roster_configs(self, profile):
+        """账号中有还没有配置的学生且学生目录不为空时，询问是否为这些学生生成配置
+
+        用户拒绝后，本次运行中不再为同一账号询问。
+        """
+        student_ids = profile.get('students') or []
+        if not student_ids or profile['id'] in self._roster_declined:
+            return
+        if len(self.parent.student_catalog) == 0:
+            return  # 学生目录为空时只能生成空白配置
+        existing = {config['student_id'] for config in self.parent.student_configs.values() if 'student_id' in config}
+        missing = len(set(student_ids) - existing)
+        if missing == 0:
+            return
+        reply = QMessageBox.question(
+            self.parent, "学生配置",
+            f"账号 '{profile['name']}' 拥有 {len(student_ids)} 名学生，其中 {missing} 名还没有配置。\n\n"
+            "是否一次性为这些学生创建配置，并按学生目录更新已有配置的特殊喜好？",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            self._roster_declined.add(profile['id'])
+            return
+
+        summary = self.parent.config_manager.generate_roster_configs(student_ids)
+        QMessageBox.information(self.parent, "学生配置",
+                                f"新建 {len(summary['created'])} 个配置，更新 {len(summary['updated'])} 个配置")
+
+    def record_history(self, profiles):
+        """把本次导入的每个账号保存为历史快照"""
         try:
-            data = json.loads(content)
-            if isinstance(data, list) and len(data) > 0 and 'item' in data[0]:
-                items = data[0]['item']
-                self.import_gift_quantities(items)
-            else:
-                self.parse_with_regex(content)
-        except:
-            self.parse_with_regex(content)
-
-    def parse_with_regex(self, content):
-        """正则解析导入文本"""
-        # 查找类似 "id": 1234, "number": 5 的模式（支持单双引号，更宽松的格式）
-        pattern = r"""['"]?id['"]?\s*:\s*([0-9]+).*?['"]?number['"]?\s*:\s*([0-9]+)"""
-        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-
-        if matches:
-            items = [{'id': int(id_str), 'number': int(num_str)} for id_str, num_str in matches]
-            self.import_gift_quantities(items)
-        else:
-            QMessageBox.warning(self.parent, "警告", "无法解析数据格式!")
+            for profile in profiles:
+                self.parent.inventory_history.record(profile['id'], profile['name'], profile['quantities'])
+        except (OSError, ValueError) as e:
+            logger.warning("保存库存历史失败: %s", e)
 
-    def import_gift_quantities(self, items):
-        """导入礼物数量"""
-        imported_count = 0
+    def switch_profile(self, profile_id):
+        """切换到已导入的另一个账号的库存"""
+        profile = self.parent.inventory_store.set_active(profile_id)
+        if profile is not None:
+            # 其他账号的数量不应残留，未出现的礼物按0处理
+            quantities = profile['quantities']
+            self.apply_gift_quantities({gift_id: quantities.get(gift_id, 0) for gift_id in self.parent.gift_inputs})
 
-        for item in items:
-            gift_id = item['id']
-            quantity = item['number']
+    def _on_import_failed(self, error):
+        self._finish_job(error.code)
+        if error.code == ImportParseError.CANCELLED:
+            return
+        text = error.message if not error.detail else f"{error.message}\n{error.detail}"
+        if error.code == ImportParseError.READ_FAILED:
+            QMessageBox.critical(self.parent, "错误", text)
+        else:
+            QMessageBox.warning(self.parent, "警告", text)
 
+    def apply_gift_quantities(self, quantities):
+        """在界面线程中一次性写入礼物数量并计算一次"""
+        imported_count = 0
+        for gift_id, quantity in quantities.items():
             if gift_id in self.parent.gift_inputs:
-                self.parent.gift_inputs[gift_id]['spinbox'].setValue(quantity)
+                spinbox = self.parent.gift_inputs[gift_id]['spinbox']
+                spinbox.blockSignals(True)
+                spinbox.setValue(quantity)
+                spinbox.blockSignals(False)
                 imported_count += 1
 
-        QMessageBox.information(self.parent, "导入完成", f"成功导入 {imported_count} 个礼物的数量")
+        if imported_count and self.parent.current_config:
+            self.parent.config_modified = True
 
         # 自动计算
         self.parent.calculate_favor()
+
+        if self.parent.memory_profiler:
+            self.parent.memory_profiler.snapshot('after_import', self.parent)
+        return imported_count
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""库存快照历史
+
+每次导入按账号追加一条快照到 configs/inventory_history.jsonl。
+快照以与上一条的差异（delta）保存，每隔 KEYFRAME_INTERVAL 条保存一次完整快照（关键帧），
+因此还原任意历史快照最多只需回放 KEYFRAME_INTERVAL - 1 条差异。
+"""
+
+import bisect
+import datetime
+import json
+import os
+import time
+
+KEYFRAME_INTERVAL = 32
+HISTORY_FILE = "inventory_history.jsonl"
+
+
+def to_timestamp(when):
+    """把 datetime/date/ISO字符串/数字 统一转换为时间戳"""
+    if when is None:
+        return time.time()
+    if isinstance(when, (int, float)):
+        return float(when)
+    if isinstance(when, str):
+        when = datetime.datetime.fromisoformat(when)
+    if isinstance(when, datetime.datetime):
+        return when.timestamp()
+    if isinstance(when, datetime.date):
+        return datetime.datetime(when.year, when.month, when.day).timestamp()
+    raise TypeError(f"无法识别的时间: {when!r}")
+
+
+def diff_quantities(old, new):
+    """返回把 old 变为 new 所需的差异（数量变为0的礼物记为0）"""
+    delta = {gift_id: qty for gift_id, qty in new.items() if old.get(gift_id, 0) != qty}
+    for gift_id in old:
+        if gift_id not in new and old[gift_id] != 0:
+            delta[gift_id] = 0
+    return delta
+
+
+class _ProfileHistory:
+    """单个账号的快照序列"""
+
+    def __init__(self, name):
+        self.name = name
+        self.timestamps = []
+        self.entries = []  # {'key': bool, 'data': {礼物ID: 数量}}
+        self.latest = {}
+
+    def keyframe_before(self, index):
+        while not self.entries[index]['key']:
+            index -= 1
+        return index
+
+    def state_at_index(self, index):
+        start = self.keyframe_before(index)
+        state = dict(self.entries[start]['data'])
+        for entry in self.entries[start + 1:index + 1]:
+            state.update(entry['data'])
+        return {gift_id: qty for gift_id, qty in state.items() if qty}
+
+    def index_at(self, timestamp):
+        """不晚于 timestamp 的最后一条快照的下标，没有时返回-1"""
+        return bisect.bisect_right(self.timestamps, timestamp) - 1
+
+
+class InventoryHistory:
+    """按账号保存的库存快照历史"""
+
+    def __init__(self, path):
+        self.path = path
+        self.profiles = {}
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    data = {int(k): int(v) for k, v in record['data'].items()}
+                    self._append(record['profile'], record.get('name', ''), record['ts'], record['key'], data)
+                except (ValueError, KeyError, TypeError):
+                    continue  # 跳过写入中断造成的残缺行
+
+    def _append(self, profile_id, name, timestamp, is_key, data):
+        history = self.profiles.get(profile_id)
+        if history is None:
+            history = self.profiles[profile_id] = _ProfileHistory(name)
+        if name:
+            history.name = name
+        if is_key:
+            history.latest = {gift_id: qty for gift_id, qty in data.items() if qty}
+        else:
+            history.latest.update(data)
+            history.latest = {gift_id: qty for gift_id, qty in history.latest.items() if qty}
+        history.timestamps.append(timestamp)
+        history.entries.append({'key': is_key, 'data': data})
+
+    def record(self, profile_id, name, quantities, timestamp=None):
+        """追加一条快照，与上一条完全相同时不记录，返回是否写入"""
+        self._ensure_loaded()
+        timestamp = to_timestamp(timestamp)
+        quantities = {int(gift_id): int(qty) for gift_id, qty in quantities.items() if qty}
+        history = self.profiles.get(profile_id)
+
+        if history is not None and history.timestamps and timestamp < history.timestamps[-1]:
+            raise ValueError("快照时间早于已有的最后一条快照")
+        is_key = history is None or len(history.entries) % KEYFRAME_INTERVAL == 0
+        if is_key:
+            data = quantities
+        else:
+            data = diff_quantities(history.latest, quantities)
+            if not data:
+                return False
+
+        record = {'ts': timestamp,
+                  'time': datetime.datetime.fromtimestamp(timestamp).isoformat(timespec='seconds'),
+                  'profile': profile_id, 'name': name, 'key': is_key,
+                  'data': {str(gift_id): qty for gift_id, qty in data.items()}}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._append(profile_id, name, timestamp, is_key, data)
+        return True
+
+    def profile_names(self):
+        self._ensure_loaded()
+        return {profile_id: history.name for profile_id, history in self.profiles.items()}
+
+    def snapshots(self, profile_id):
+        """返回账号所有快照的时间戳"""
+        self._ensure_loaded()
+        history = self.profiles.get(profile_id)
+        return list(history.timestamps) if history else []
+
+    def quantities_at(self, profile_id, when=None):
+        """还原不晚于 when 的最后一条快照，不存在时返回None"""
+        self._ensure_loaded()
+        history = self.profiles.get(profile_id)
+        if history is None:
+            return None
+        index = history.index_at(to_timestamp(when))
+        if index < 0:
+            return None
+        if index == len(history.entries) - 1:
+            return dict(history.latest)
+        return history.state_at_index(index)
+
+    def gains_since(self, profile_id, since, until=None):
+        """统计 since 之后（到 until 为止）各礼物累计增加的数量，期间使用掉的不抵扣
+
+        since 之前没有快照时以之后的第一条快照为起点，这条快照本身不计为增加。
+        """
+        self._ensure_loaded()
+        history = self.profiles.get(profile_id)
+        if history is None:
+            return {}
+        start = max(history.index_at(to_timestamp(since)), 0)
+        end = history.index_at(to_timestamp(until))
+        if end <= start:
+            return {}
+
+        state = history.state_at_index(start)
+        gains = {}
+        for entry in history.entries[start + 1:end + 1]:
+            changes = entry['data'] if not entry['key'] else diff_quantities(state, entry['data'])
+            for gift_id, qty in changes.items():
+                increase = qty - state.get(gift_id, 0)
+                if increase > 0:
+                    gains[gift_id] = gains.get(gift_id, 0) + increase
+                state[gift_id] = qty
+        return gains
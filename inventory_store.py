@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+class InventoryStore:
+    """按账号保存导入的礼物库存"""
+
+    def __init__(self):
+        self.profiles = {}  # 账号id -> {'id', 'name', 'quantities', ...}，保持导入顺序
+        self.active_id = None
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def __iter__(self):
+        return iter(self.profiles.values())
+
+    def replace(self, profiles):
+        """用一次导入的全部账号替换当前库存，默认选中第一个账号"""
+        self.profiles = {profile['id']: profile for profile in profiles}
+        self.active_id = profiles[0]['id'] if profiles else None
+
+    def set_active(self, profile_id):
+        if profile_id in self.profiles:
+            self.active_id = profile_id
+        return self.active()
+
+    def active(self):
+        return self.profiles.get(self.active_id)
+
+    def merge(self, profiles):
+        """加入或更新账号（例如从其他机器同步的库存），保持当前选中的账号"""
+        for profile in profiles:
+            self.profiles[profile['id']] = profile
+        if self.active_id is None and self.profiles:
+            self.active_id = next(iter(self.profiles))
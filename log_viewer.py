@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton,
+                             QPlainTextEdit, QApplication)
+from PyQt5.QtGui import QFont
+
+import app_logging
+
+LEVEL_CHOICES = (("全部", logging.NOTSET), ("信息", logging.INFO), ("警告", logging.WARNING), ("错误", logging.ERROR))
+
+class LogViewerDialog(QDialog):
+    """查看内存中最近的日志记录"""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setWindowTitle("日志")
+        self.resize(820, 520)
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        options = QHBoxLayout()
+        options.addWidget(QLabel("级别:"))
+        self.level_combo = QComboBox()
+        for text, level in LEVEL_CHOICES:
+            self.level_combo.addItem(text, level)
+        self.level_combo.currentIndexChanged.connect(self.refresh)
+        options.addWidget(self.level_combo)
+        options.addStretch()
+        paths = app_logging.log_file_paths()
+        options.addWidget(QLabel(f"日志文件: {paths[0]}" if paths else "未写入日志文件（启动参数 --log-file 开启）"))
+        layout.addLayout(options)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.text.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.text)
+
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.clicked.connect(self.refresh)
+        copy_btn = QPushButton("复制")
+        copy_btn.clicked.connect(lambda: QApplication.clipboard().setText(self.text.toPlainText()))
+        clear_btn = QPushButton("清空")
+        clear_btn.clicked.connect(self.clear)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        for btn in (refresh_btn, copy_btn, clear_btn):
+            buttons.addWidget(btn)
+        buttons.addStretch()
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+    def refresh(self):
+        handler = app_logging.ring_buffer()
+        lines = handler.lines(self.level_combo.currentData()) if handler else []
+        self.text.setPlainText("\n".join(lines) if lines else "暂无日志")
+        self.text.verticalScrollBar().setValue(self.text.verticalScrollBar().maximum())
+
+    def clear(self):
+        handler = app_logging.ring_buffer()
+        if handler:
+            handler.clear()
+        self.refresh()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""内存诊断模式
+
+通过 --memory-profile[=报告路径] 参数或 SHIGUREAI_MEMPROFILE 环境变量开启。
+在启动、导入后、打开特殊喜好对话框后各记录一次快照，退出时导出报告：
+Python 内存按 tracemalloc 回溯归属到各子系统，Qt 对象按数量与像素占用统计。
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from PyQt5.QtWidgets import QApplication, QWidget, QLabel, QDialog
+
+from utils import gift_pixmap_cache_size
+
+TRACE_FRAMES = 16
+ENV_VAR = 'SHIGUREAI_MEMPROFILE'
+CLI_FLAG = '--memory-profile'
+
+# 源文件 -> 子系统
+SUBSYSTEM_FILES = {
+    'data_models.py': 'catalog',
+    'favor_core.py': 'catalog',
+    'ui_components.py': 'gift_inputs',
+    'utils.py': 'pixmaps',
+    'config_manager.py': 'student_configs',
+    'gift_config_dialog.py': 'dialogs',
+    'import_manager.py': 'imports',
+    'result_cache.py': 'caches',
+}
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def requested_report_path(argv=None, environ=None):
+    """返回诊断报告路径；未开启诊断模式时返回None"""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    for arg in argv[1:]:
+        if arg == CLI_FLAG:
+            return ''
+        if arg.startswith(CLI_FLAG + '='):
+            return arg.split('=', 1)[1]
+    value = environ.get(ENV_VAR)
+    if value:
+        return '' if value == '1' else value
+    return None
+
+
+def deep_size(obj, seen=None):
+    """递归估算Python对象占用的字节数"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+class MemoryProfiler:
+    """按子系统归属内存的快照记录器"""
+
+    def __init__(self, report_path=''):
+        self.report_path = report_path
+        self.snapshots = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+
+    @classmethod
+    def from_environment(cls):
+        path = requested_report_path()
+        return None if path is None else cls(path)
+
+    def _subsystem_of(self, traceback):
+        # 从最近的调用帧往外找第一个项目源文件
+        for frame in reversed(traceback):
+            if frame.filename.startswith(PROJECT_DIR):
+                return SUBSYSTEM_FILES.get(os.path.basename(frame.filename), 'other')
+        return 'external'
+
+    def _python_by_subsystem(self):
+        snapshot = tracemalloc.take_snapshot()
+        totals = {}
+        for stat in snapshot.statistics('traceback'):
+            name = self._subsystem_of(stat.traceback)
+            entry = totals.setdefault(name, {'bytes': 0, 'blocks': 0})
+            entry['bytes'] += stat.size
+            entry['blocks'] += stat.count
+        return totals
+
+    def _qt_counts(self, window):
+        counts = {'all_widgets': len(QApplication.allWidgets())}
+
+        gifts_widget = window.gifts_layout.parentWidget() if hasattr(window, 'gifts_layout') else None
+        counts['gift_inputs_widgets'] = len(gifts_widget.findChildren(QWidget)) if gifts_widget else 0
+
+        special_widgets = 0
+        layout = getattr(window, 'special_gifts_layout', None)
+        if layout is not None:
+            for i in range(layout.count()):
+                widget = layout.itemAt(i).widget()
+                if widget is not None:
+                    special_widgets += 1 + len(widget.findChildren(QWidget))
+        counts['special_gifts_widgets'] = special_widgets
+
+        pixmaps = 0
+        pixmap_bytes = 0
+        for label in window.findChildren(QLabel):
+            pixmap = label.pixmap()
+            if pixmap is not None and not pixmap.isNull():
+                pixmaps += 1
+                pixmap_bytes += pixmap.width() * pixmap.height() * pixmap.depth() // 8
+        counts['pixmap_labels'] = pixmaps
+        counts['pixmap_bytes'] = pixmap_bytes
+        counts['cached_pixmaps'], counts['cached_pixmap_bytes'] = gift_pixmap_cache_size()
+
+        dialogs = window.findChildren(QDialog)
+        counts['dialogs'] = len(dialogs)
+        counts['dialog_widgets'] = sum(len(d.findChildren(QWidget)) for d in dialogs)
+        return counts
+
+    def _structures(self, window):
+        sizes = {
+            'catalog': deep_size([window.gifts_data, window.levels_data,
+                                  getattr(window, 'gift_catalog', None),
+                                  getattr(window, 'level_exp_cache', None),
+                                  getattr(window, 'level_list', None)]),
+            'student_configs': deep_size(window.student_configs),
+            'gift_inputs': deep_size({k: {f: v for f, v in info.items() if f != 'spinbox'}
+                                      for k, info in window.gift_inputs.items()}),
+        }
+        result_cache = getattr(window, 'result_cache', None)
+        if result_cache is not None:
+            sizes['caches'] = deep_size(result_cache.results._data)
+        return sizes
+
+    def snapshot(self, label, window):
+        """记录一次快照"""
+        traced, peak = tracemalloc.get_traced_memory()
+        self.snapshots.append({
+            'label': label,
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'traced_bytes': traced,
+            'peak_bytes': peak,
+            'python_by_subsystem': self._python_by_subsystem(),
+            'python_structures': self._structures(window),
+            'qt': self._qt_counts(window),
+        })
+
+    def build_report(self):
+        report = {'snapshots': self.snapshots, 'deltas': []}
+        for before, after in zip(self.snapshots, self.snapshots[1:]):
+            names = set(before['python_by_subsystem']) | set(after['python_by_subsystem'])
+            report['deltas'].append({
+                'from': before['label'],
+                'to': after['label'],
+                'python_bytes': {
+                    name: after['python_by_subsystem'].get(name, {}).get('bytes', 0)
+                    - before['python_by_subsystem'].get(name, {}).get('bytes', 0)
+                    for name in sorted(names)
+                },
+                'qt': {key: after['qt'][key] - before['qt'].get(key, 0) for key in after['qt']},
+            })
+        return report
+
+    def format_text(self, report):
+        lines = []
+        for snap in report['snapshots']:
+            lines.append(f"== {snap['label']} ({snap['time']}) traced {snap['traced_bytes'] / 1024:.1f} KiB,"
+                         f" peak {snap['peak_bytes'] / 1024:.1f} KiB")
+            for name, entry in sorted(snap['python_by_subsystem'].items(), key=lambda x: -x[1]['bytes']):
+                lines.append(f"  python  {name:<16} {entry['bytes'] / 1024:>10.1f} KiB  {entry['blocks']:>8} blocks")
+            for name, size in snap['python_structures'].items():
+                lines.append(f"  struct  {name:<16} {size / 1024:>10.1f} KiB")
+            for name, value in snap['qt'].items():
+                lines.append(f"  qt      {name:<22} {value:>10}")
+        for delta in report['deltas']:
+            lines.append(f"-- {delta['from']} -> {delta['to']}")
+            for name, diff in delta['python_bytes'].items():
+                if diff:
+                    lines.append(f"  python  {name:<16} {diff / 1024:>+10.1f} KiB")
+            for name, diff in delta['qt'].items():
+                if diff:
+                    lines.append(f"  qt      {name:<22} {diff:>+10}")
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path=None):
+        """导出JSON报告与同名的文本摘要，返回JSON路径"""
+        from utils import resource_path
+        path = path or self.report_path or os.path.join(
+            resource_path("configs", use_exe_dir_for_config=True), "memory_report.json")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        report = self.build_report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        with open(os.path.splitext(path)[0] + '.txt', 'w', encoding='utf-8') as f:
+            f.write(self.format_text(report))
+        return path
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""运行时指标
+
+轻量的计数器与延迟直方图登记处，主界面与计算服务共用。直方图只保留最近
+HISTOGRAM_WINDOW 个样本，统计 p50/p95/max，记录一次只需一次加锁和一次追加。
+主界面在按 Ctrl+Shift+M 打开的诊断对话框中查看，并可导出为JSON。
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+HISTOGRAM_WINDOW = 1024
+
+
+class Histogram:
+    """最近 window 个样本的延迟分布（秒）"""
+
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def summary(self):
+        """返回以毫秒为单位的统计，count/mean 覆盖全部样本，分位数只覆盖最近的样本"""
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total = self.count, self.total
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+        return {
+            'count': count,
+            'mean': round(total / count * 1000, 3) if count else 0.0,
+            'p50': round(percentile(0.50), 3),
+            'p95': round(percentile(0.95), 3),
+            'max': round(samples[-1] * 1000, 3) if samples else 0.0,
+            'samples': len(samples),
+        }
+
+
+class _Timer:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    """按名称登记的计数器与直方图"""
+
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self._lock = threading.Lock()
+        self.window = window
+        self.started_at = time.time()
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(self.window))
+        return histogram
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    def timer(self, name):
+        """with registry.timer('name'): ... 记录代码块耗时"""
+        return _Timer(self.histogram(name))
+
+    def timed(self, name):
+        """记录函数耗时的装饰器"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.counters = {}
+            self.histograms = {}
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+        return {
+            'uptime_s': round(time.time() - self.started_at, 3),
+            'counters': dict(sorted(counters.items())),
+            'latency_ms': {name: histograms[name].summary() for name in sorted(histograms)},
+        }
+
+    def export(self, path):
+        """把当前快照写入JSON文件，返回路径"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+# 主界面使用的全局登记处
+registry = MetricsRegistry()
+increment = registry.increment
+observe = registry.observe
+timer = registry.timer
+timed = registry.timed
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox)
+
+from utils import resource_path
+import metrics
+
+LATENCY_COLUMNS = ("count", "mean", "p50", "p95", "max")
+
+class MetricsDialog(QDialog):
+    """运行指标：各操作的调用次数与延迟分布（毫秒）"""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setWindowTitle("运行指标")
+        self.resize(720, 520)
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.uptime_label = QLabel()
+        layout.addWidget(self.uptime_label)
+
+        self.latency_table = QTableWidget(0, len(LATENCY_COLUMNS) + 1)
+        self.latency_table.setHorizontalHeaderLabels(["操作", "次数", "平均(ms)", "p50(ms)", "p95(ms)", "最大(ms)"])
+        self.latency_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.latency_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.latency_table, 3)
+
+        self.counter_table = QTableWidget(0, 2)
+        self.counter_table.setHorizontalHeaderLabels(["计数器", "值"])
+        self.counter_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.counter_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.counter_table, 2)
+
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.clicked.connect(self.refresh)
+        export_btn = QPushButton("导出JSON")
+        export_btn.clicked.connect(self.export)
+        reset_btn = QPushButton("清零")
+        reset_btn.clicked.connect(self.reset)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        for btn in (refresh_btn, export_btn, reset_btn):
+            buttons.addWidget(btn)
+        buttons.addStretch()
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+    def refresh(self):
+        snapshot = metrics.registry.snapshot()
+        self.uptime_label.setText(f"统计时长: {snapshot['uptime_s']:.0f} 秒")
+
+        latencies = snapshot['latency_ms']
+        self.latency_table.setRowCount(len(latencies))
+        for row, (name, summary) in enumerate(latencies.items()):
+            self.latency_table.setItem(row, 0, QTableWidgetItem(name))
+            for col, key in enumerate(LATENCY_COLUMNS, 1):
+                self.latency_table.setItem(row, col, QTableWidgetItem(str(summary[key])))
+
+        counters = snapshot['counters']
+        self.counter_table.setRowCount(len(counters))
+        for row, (name, value) in enumerate(counters.items()):
+            self.counter_table.setItem(row, 0, QTableWidgetItem(name))
+            self.counter_table.setItem(row, 1, QTableWidgetItem(str(value)))
+
+    def export(self):
+        default_path = os.path.join(resource_path("configs", use_exe_dir_for_config=True), "metrics.json")
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出运行指标", default_path,
+                                                   "JSON Files (*.json);;All Files (*)")
+        if not file_path:
+            return
+        try:
+            metrics.registry.export(file_path)
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"导出失败:\n{e}")
+            return
+        QMessageBox.information(self, "成功", f"已导出到 {file_path}")
+
+    def reset(self):
+        metrics.registry.reset()
+        self.refresh()
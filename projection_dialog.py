@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QSpinBox,
+                             QLineEdit, QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView)
+
+import favor_simulator
+
+class ProjectionDialog(QDialog):
+    """按导入历史估算的每日礼物收入，预测所有配置到达目标等级的日期"""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.setWindowTitle("好感预测")
+        self.resize(760, 520)
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        options = QHBoxLayout()
+        options.addWidget(QLabel("账号:"))
+        self.profile_combo = QComboBox()
+        for profile_id, name in self.parent.inventory_history.profile_names().items():
+            self.profile_combo.addItem(name or profile_id, profile_id)
+        options.addWidget(self.profile_combo, 1)
+
+        options.addWidget(QLabel("统计最近"))
+        self.window_spin = QSpinBox()
+        self.window_spin.setRange(1, 365)
+        self.window_spin.setValue(28)
+        options.addWidget(self.window_spin)
+        options.addWidget(QLabel("天收入，预测"))
+        self.horizon_spin = QSpinBox()
+        self.horizon_spin.setRange(1, 3650)
+        self.horizon_spin.setValue(365)
+        options.addWidget(self.horizon_spin)
+        options.addWidget(QLabel("天"))
+        layout.addLayout(options)
+
+        targets = QHBoxLayout()
+        targets.addWidget(QLabel("目标等级:"))
+        self.targets_edit = QLineEdit(",".join(str(t) for t in favor_simulator.DEFAULT_TARGETS))
+        targets.addWidget(self.targets_edit)
+        self.inventory_check = QCheckBox("先用掉配置中保存的礼物")
+        targets.addWidget(self.inventory_check)
+        refresh_btn = QPushButton("预测")
+        refresh_btn.clicked.connect(self.refresh)
+        targets.addWidget(refresh_btn)
+        layout.addLayout(targets)
+
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.status_label)
+
+        self.table = QTableWidget(0, 0)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        layout.addWidget(close_btn)
+
+    def _targets(self):
+        targets = []
+        for part in self.targets_edit.text().replace('，', ',').split(','):
+            if part.strip().isdigit():
+                targets.append(int(part))
+        return tuple(sorted(set(targets))) or favor_simulator.DEFAULT_TARGETS
+
+    def refresh(self):
+        profile_id = self.profile_combo.currentData()
+        income = {}
+        if profile_id:
+            income = favor_simulator.income_from_history(
+                self.parent.inventory_history, profile_id, self.window_spin.value())
+        if not income:
+            self.status_label.setText("导入历史不足以估算收入（同一账号至少需要两次导入）")
+        else:
+            self.status_label.setText(f"估算每日收入 {sum(income.values()):.1f} 个礼物")
+
+        targets = self._targets()
+        projections = favor_simulator.project_roster(
+            self.parent.level_exp_cache, self.parent.level_list, self.parent.gift_catalog,
+            self.parent.student_configs, income, targets, self.horizon_spin.value(),
+            self.inventory_check.isChecked())
+
+        headers = ["配置", "每日经验", "起始等级"] + [f"到 {t} 级" for t in targets]
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setRowCount(len(projections))
+
+        today = datetime.date.today()
+        for row, (name, projection) in enumerate(projections.items()):
+            cells = [name, f"{projection['daily_exp']:.1f}", str(projection['start_level'])]
+            for target in targets:
+                day = projection['levels'].get(target)
+                if day is None:
+                    cells.append("—")
+                elif day == 0:
+                    cells.append("已达到")
+                else:
+                    cells.append(f"{day} 天 ({today + datetime.timedelta(days=day):%m-%d})")
+            for column, text in enumerate(cells):
+                self.table.setItem(row, column, QTableWidgetItem(text))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""资源包
+
+把礼物表、等级表、学生目录、图标与礼物图片合并为一个 resources.pak，
+运行时用 mmap 只读映射，按目录（TOC）返回各文件的 memoryview，不复制数据。
+打包后只需解压（或放在exe旁）一个文件，而不是每张图片一个文件。
+资源包记录生成时的程序版本，程序只使用与自身版本一致的资源包，exe旁遗留的旧资源包会被忽略。
+
+文件格式：
+    8字节魔数 SHGRPAK2 | 4字节小端TOC长度 | TOC(JSON: {"version": 程序版本, "files": {名称: [偏移, 长度]}}) | 数据
+名称统一使用 / 分隔的相对路径，偏移相对于文件开头。
+"""
+
+import json
+import mmap
+import os
+import struct
+
+PACK_FILE = 'resources.pak'
+MAGIC = b'SHGRPAK2'
+HEADER = struct.Struct('<8sI')
+PACKED_FILES = ('giftID.csv', 'exp.csv', 'students.csv', 'icon.ico')
+PACKED_DIRS = ('pic',)
+
+
+def normalize_name(relative_path):
+    name = relative_path.replace('\\', '/')
+    while name.startswith('./'):
+        name = name[2:]
+    return name
+
+
+def pack_file_names(base_dir):
+    """需要打入资源包的文件（相对路径）"""
+    names = [name for name in PACKED_FILES if os.path.isfile(os.path.join(base_dir, name))]
+    for dir_name in PACKED_DIRS:
+        directory = os.path.join(base_dir, dir_name)
+        if os.path.isdir(directory):
+            names.extend(f"{dir_name}/{name}" for name in sorted(os.listdir(directory))
+                         if os.path.isfile(os.path.join(directory, name)))
+    return names
+
+
+def build_pack(output_path, base_dir, names, version):
+    """把 base_dir 下的 names 写入资源包并记录程序版本 version，返回写入的文件数"""
+    blobs = []
+    for name in names:
+        with open(os.path.join(base_dir, *normalize_name(name).split('/')), 'rb') as f:
+            blobs.append((normalize_name(name), f.read()))
+
+    # TOC 中的偏移依赖TOC自身长度，先按占位偏移估算长度再定稿
+    sizes = [(name, len(data)) for name, data in blobs]
+    toc_bytes = b''
+    while True:
+        offset = HEADER.size + len(toc_bytes)
+        files = {}
+        for name, size in sizes:
+            files[name] = [offset, size]
+            offset += size
+        encoded = json.dumps({'version': version, 'files': files}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        stable = len(encoded) == len(toc_bytes)
+        toc_bytes = encoded
+        if stable:
+            break
+
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(toc_bytes)))
+        f.write(toc_bytes)
+        for _, data in blobs:
+            f.write(data)
+    os.replace(temp_path, output_path)
+    return len(blobs)
+
+
+class ResourcePack:
+    """只读映射的资源包"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if len(self._view) < HEADER.size:
+            raise ValueError(f"资源包格式错误: {path}")
+        magic, toc_size = HEADER.unpack_from(self._view)
+        if magic != MAGIC or HEADER.size + toc_size > len(self._view):
+            raise ValueError(f"资源包格式错误: {path}")
+        toc = json.loads(str(self._view[HEADER.size:HEADER.size + toc_size], 'utf-8'))
+        self.version = toc.get('version')
+        self.toc = {name: (offset, size) for name, (offset, size) in toc.get('files', {}).items()
+                    if offset + size <= len(self._view)}
+
+    def __contains__(self, name):
+        return normalize_name(name) in self.toc
+
+    def __len__(self):
+        return len(self.toc)
+
+    def names(self):
+        return list(self.toc)
+
+    def get(self, name):
+        """返回文件内容的 memoryview（与映射共享内存），不存在时返回None"""
+        entry = self.toc.get(normalize_name(name))
+        if entry is None:
+            return None
+        offset, size = entry
+        return self._view[offset:offset + size]
+
+    def close(self):
+        """仍有未释放的 memoryview 时映射保持打开"""
+        try:
+            self._view.release()
+            self._mmap.close()
+        except (BufferError, ValueError):
+            pass
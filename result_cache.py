@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""计算结果缓存"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from favor_core import GIFT_SET_KEYS
+
+
+def fingerprint(obj):
+    """对可JSON序列化的对象计算稳定的哈希值"""
+    payload = json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def config_fingerprint(config, is_linked=None):
+    """配置指纹：特殊喜好礼物掩码 + 联动学生标记"""
+    if not config:
+        return fingerprint([None, bool(is_linked)])
+    if is_linked is None:
+        is_linked = config.get('is_linked_student', False)
+    masks = [config.get(key, 0) for key in GIFT_SET_KEYS]
+    return fingerprint([masks, bool(is_linked)])
+
+
+def inventory_fingerprint(quantities):
+    """库存指纹：只考虑数量大于0的礼物"""
+    return fingerprint(sorted((int(g), int(q)) for g, q in quantities.items() if q > 0))
+
+
+class LRUCache:
+    """线程安全的LRU缓存"""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {'size': len(self._data), 'max_size': self.max_size,
+                'hits': self.hits, 'misses': self.misses}
+
+    def discard_where(self, predicate):
+        """删除键满足条件的条目，返回删除数量"""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+
+class ResultCache:
+    """界面计算结果缓存
+
+    键为 (配置指纹, 数量向量, 起始等级, 起始经验)。配置指纹按配置名记忆，
+    配置被编辑时需调用 invalidate_config 使其失效。
+    """
+
+    def __init__(self, max_size=128):
+        self.results = LRUCache(max_size)
+        self._config_keys = {}
+
+    def config_key(self, name, config, is_linked):
+        memo_key = (name, bool(is_linked))
+        key = self._config_keys.get(memo_key)
+        if key is None:
+            key = config_fingerprint(config, is_linked)
+            self._config_keys[memo_key] = key
+        return key
+
+    def make_key(self, name, config, is_linked, quantities, start_level, start_exp):
+        return (self.config_key(name, config, is_linked), tuple(quantities.items()),
+                start_level, start_exp)
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def put(self, key, result):
+        self.results.put(key, result)
+
+    def invalidate_config(self, name):
+        """配置内容变化后丢弃该配置的指纹与结果"""
+        stale = {self._config_keys.pop((name, linked))
+                 for linked in (False, True) if (name, linked) in self._config_keys}
+        if stale:
+            self.results.discard_where(lambda key: key[0] in stale)
+
+    def clear(self):
+        self._config_keys.clear()
+        self.results.clear()
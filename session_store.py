@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""会话快照
+
+退出时把当前配置、礼物数量、等级经验、礼物面板滚动位置与最后一次计算结果写入
+configs/session.json，下次启动在加载配置后直接恢复。快照记录数据文件（礼物表、等级表）
+与程序版本的哈希，不一致时整个快照作废；还记录退出时已保存配置的哈希，配置在此之后被外部修改或同步
+且退出时没有未保存的修改时，保留加载的配置，只恢复滚动位置；计算输入的哈希与恢复后的输入一致时，
+保存的结果直接放入结果缓存，启动时的首次计算不再重新计算。
+"""
+
+import hashlib
+import json
+import os
+
+from config_store import encode_config
+from result_cache import fingerprint
+
+SESSION_FILE = 'session.json'
+SESSION_FORMAT = 1
+
+
+def data_fingerprint(buffers, version=''):
+    """数据文件内容（bytes/memoryview，缺失为None）与程序版本的哈希"""
+    digest = hashlib.sha1(f"{SESSION_FORMAT}\0{version}".encode('utf-8'))
+    for data in buffers:
+        digest.update(b'\0')
+        if data is not None:
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def config_fingerprint(config):
+    """已保存配置按写入格式计算的哈希，配置不存在时为None"""
+    return fingerprint(encode_config(config)) if config is not None else None
+
+
+def input_fingerprint(cache_key):
+    """结果缓存键（配置指纹, 数量, 等级, 经验）的稳定哈希"""
+    return fingerprint(cache_key)
+
+
+def read_session(path, data_hash):
+    """读取快照；文件不存在、损坏或数据文件已变化时返回None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            session = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(session, dict) or session.get('data_hash') != data_hash:
+        return None
+    session['quantities'] = {int(gift_id): int(qty) for gift_id, qty in session.get('quantities', {}).items()}
+    return session
+
+
+def write_session(path, session):
+    """先写临时文件再替换，退出中断时不会留下残缺的快照"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(session, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_path, path)
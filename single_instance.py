@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""单实例运行
+
+第一个启动的程序在本地套接字（Windows 上为命名管道）上监听；之后启动的程序把
+命令行参数发送给它后立即退出，不再加载界面、礼物目录与图片。
+参数中的文件路径按bacv文件导入，--paste 表示立即从剪贴板导入；不带参数时只把已有窗口提到前台。
+--new-instance 跳过检查，强制启动新的窗口（同一目录下的多个窗口会互相覆盖 config.json）。
+"""
+
+import getpass
+import hashlib
+import json
+import os
+import sys
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+from utils import resource_path
+import app_logging
+
+logger = app_logging.get_logger(__name__)
+
+NEW_INSTANCE_FLAG = '--new-instance'
+PASTE_COMMAND = '--paste'
+CONNECT_TIMEOUT_MS = 200
+WRITE_TIMEOUT_MS = 1000
+
+
+def server_name():
+    """同一用户、同一配置目录共用一个实例"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = ''
+    config_dir = os.path.normcase(os.path.abspath(resource_path("configs", use_exe_dir_for_config=True)))
+    digest = hashlib.sha1(f"{user}\0{config_dir}".encode('utf-8')).hexdigest()[:12]
+    return f"ShigureAI-{digest}"
+
+
+def instance_arguments(argv=None):
+    """需要转交给已运行实例的参数：文件路径转为绝对路径，诊断与日志参数不转交"""
+    argv = sys.argv if argv is None else argv
+    args = []
+    for arg in argv[1:]:
+        if arg == PASTE_COMMAND:
+            args.append(arg)
+        elif not arg.startswith('-'):
+            args.append(os.path.abspath(arg))
+    return args
+
+
+def forward_to_running_instance(args, name=None):
+    """把参数发送给已运行的实例，成功时返回True"""
+    socket = QLocalSocket()
+    socket.connectToServer(name or server_name())
+    if not socket.waitForConnected(CONNECT_TIMEOUT_MS):
+        return False
+    message = json.dumps({'args': args}, ensure_ascii=False) + '\n'
+    socket.write(message.encode('utf-8'))
+    sent = socket.waitForBytesWritten(WRITE_TIMEOUT_MS)
+    socket.disconnectFromServer()
+    if socket.state() != QLocalSocket.UnconnectedState:
+        socket.waitForDisconnected(WRITE_TIMEOUT_MS)
+    return sent
+
+
+class InstanceServer(QObject):
+    """接收后续启动转交的参数，每条消息发出一次 message_received(参数列表)"""
+
+    message_received = pyqtSignal(list)
+
+    def __init__(self, name=None, parent=None):
+        super().__init__(parent)
+        self.name = name or server_name()
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+        self._buffers = {}
+
+    def listen(self):
+        """开始监听，上次异常退出遗留的套接字文件会先被清理"""
+        if self.server.listen(self.name):
+            return True
+        # 同时启动的另一个实例已经在监听时不抢占
+        probe = QLocalSocket()
+        probe.connectToServer(self.name)
+        if probe.waitForConnected(CONNECT_TIMEOUT_MS):
+            probe.disconnectFromServer()
+            logger.warning("另一个实例已在监听 %s，本窗口不接收转交的参数", self.name)
+            return False
+        QLocalServer.removeServer(self.name)
+        if self.server.listen(self.name):
+            return True
+        logger.warning("无法监听单实例套接字 %s: %s", self.name, self.server.errorString())
+        return False
+
+    def close(self):
+        self.server.close()
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            self._buffers[connection] = b''
+            connection.readyRead.connect(lambda c=connection: self._on_ready_read(c))
+            connection.disconnected.connect(lambda c=connection: self._on_disconnected(c))
+            # 数据可能在连接信号之前已经到达
+            if connection.bytesAvailable():
+                self._on_ready_read(connection)
+
+    def _on_ready_read(self, connection):
+        buffer = self._buffers.get(connection, b'') + bytes(connection.readAll())
+        while b'\n' in buffer:
+            line, buffer = buffer.split(b'\n', 1)
+            self._dispatch(line)
+        self._buffers[connection] = buffer
+
+    def _on_disconnected(self, connection):
+        buffer = self._buffers.pop(connection, b'')
+        if buffer.strip():
+            self._dispatch(buffer)
+        connection.deleteLater()
+
+    def _dispatch(self, line):
+        try:
+            args = json.loads(line.decode('utf-8'))['args']
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("忽略无法识别的实例消息: %s", e)
+            return
+        if not isinstance(args, list):
+            return
+        logger.info("收到其他启动转交的参数: %s", args)
+        self.message_received.emit([str(arg) for arg in args])
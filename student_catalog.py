@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""学生目录
+
+students.csv 每行一个学生：ID、学生名、各档特殊喜好礼物（礼物ID以分号分隔）与是否联动学生。
+随程序附带一份目录，configs/students.csv 中的同ID条目会覆盖附带的目录，
+可用于补充或更正学生的特殊喜好。
+"""
+
+import os
+
+from data_models import load_csv_data, load_csv_buffer, notna
+from utils import resource_path, resource_data
+import app_logging
+
+logger = app_logging.get_logger(__name__)
+
+STUDENTS_FILE = 'students.csv'
+TIER_COLUMNS = {
+    'level40_gifts': '40经验礼物',
+    'level60_gifts': '60经验礼物',
+    'level180_gifts': '180经验礼物',
+    'level240_gifts': '240经验礼物',
+}
+
+
+def parse_gift_ids(value):
+    """把 "5001;5002" 形式的单元格转换为礼物ID列表"""
+    if not notna(value):
+        return []
+    return [int(part) for part in str(value).replace('；', ';').split(';') if part.strip()]
+
+
+class StudentCatalog:
+    """按学生ID索引的学生目录"""
+
+    def __init__(self):
+        self.by_id = {}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, student_id):
+        return student_id in self.by_id
+
+    def get(self, student_id):
+        return self.by_id.get(student_id)
+
+    def load(self, path):
+        """读取一个目录文件，同ID条目覆盖已有条目，返回读取的条数"""
+        return self.load_rows(load_csv_data(path))
+
+    def load_rows(self, frame):
+        count = 0
+        for _, row in frame.iterrows():
+            try:
+                student_id = int(row['ID'])
+                entry = {
+                    'id': student_id,
+                    'name': str(row.get('学生名', '')).strip() if notna(row.get('学生名')) else '',
+                    'is_linked': str(row.get('联动学生', '')).strip().lower() in ('1', 'true', 'yes', '是'),
+                }
+                for key, column in TIER_COLUMNS.items():
+                    entry[key] = parse_gift_ids(row.get(column))
+            except (KeyError, ValueError, TypeError):
+                continue
+            entry['has_preferences'] = any(entry[key] for key in TIER_COLUMNS)
+            self.by_id[student_id] = entry
+            count += 1
+        return count
+
+    def display_name(self, student_id):
+        entry = self.by_id.get(student_id)
+        return entry['name'] if entry and entry['name'] else f"学生{student_id}"
+
+
+def load_student_catalog():
+    """读取附带的学生目录与 configs 目录中的补充目录"""
+    catalog = StudentCatalog()
+    bundled = resource_data(STUDENTS_FILE)
+    if bundled is not None:
+        try:
+            catalog.load_rows(load_csv_buffer(bundled))
+        except (UnicodeDecodeError, StopIteration) as e:
+            logger.warning("读取学生目录失败 %s: %s", STUDENTS_FILE, e)
+
+    path = os.path.join(resource_path("configs", use_exe_dir_for_config=True), STUDENTS_FILE)
+    if os.path.exists(path):
+        try:
+            catalog.load(path)
+        except (OSError, UnicodeDecodeError, StopIteration) as e:
+            logger.warning("读取学生目录失败 %s: %s", path, e)
+    return catalog
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""配置与库存的增量同步客户端
+
+configs/sync_state.json 记录服务器地址、口令、冲突策略、上次同步时服务器的版本，
+以及每个条目同步时的版本与内容哈希。同步时只提交内容哈希与记录不同的条目（包括已删除的配置），服务器只返回上次同步之后
+其他机器修改的条目。两边都修改了同一条目时按冲突策略处理：
+    remote  使用服务器上的版本
+    local   用本机版本覆盖服务器
+    rename  本机版本另存为 "名称 (2)" 形式的新配置，原名称使用服务器上的版本（库存按 remote 处理）
+"""
+
+import json
+import os
+
+from sync_protocol import (CONFIG_PREFIX, SYNC_PATH, TOKEN_HEADER, item_hash, config_key,
+                           encode_sync_config, decode_sync_config, inventory_key, encode_inventory)
+import app_logging
+
+logger = app_logging.get_logger(__name__)
+
+SYNC_STATE_FILE = 'sync_state.json'
+SYNC_KEEP_REMOTE = 'remote'
+SYNC_KEEP_LOCAL = 'local'
+SYNC_RENAME = 'rename'
+SYNC_TIMEOUT = 15
+
+
+class SyncError(Exception):
+    """连接同步服务失败或服务返回错误"""
+
+
+def unique_item_key(key, existing):
+    """为冲突的配置生成 "名称 (2)" 形式的新键"""
+    index = 2
+    while f"{key} ({index})" in existing:
+        index += 1
+    return f"{key} ({index})"
+
+
+class SyncState:
+    """上次同步的服务器版本与各条目的 (版本, 哈希)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.server = None
+        self.token = None
+        self.strategy = SYNC_KEEP_REMOTE
+        self.revision = 0
+        self.items = {}  # 键 -> [版本, 哈希]
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.server = saved.get('server')
+        self.token = saved.get('token')
+        self.strategy = saved.get('strategy', SYNC_KEEP_REMOTE)
+        self.revision = saved.get('revision', 0)
+        self.items = {key: list(entry) for key, entry in saved.get('items', {}).items()}
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'server': self.server, 'token': self.token, 'strategy': self.strategy,
+                       'revision': self.revision, 'items': self.items},
+                      f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+
+    def reset(self, server):
+        """换了服务器时之前的版本号没有意义，全部重新比较"""
+        self.server = server
+        self.revision = 0
+        self.items = {}
+
+
+class SyncClient:
+    def __init__(self, server_url, state_path, token=None, strategy=SYNC_KEEP_REMOTE, timeout=SYNC_TIMEOUT):
+        self.server_url = server_url.rstrip('/')
+        self.token = token
+        self.strategy = strategy
+        self.timeout = timeout
+        self.state = SyncState(state_path)
+        if self.state.server != self.server_url:
+            self.state.reset(self.server_url)
+        self.state.token = token
+        self.state.strategy = strategy
+
+    def _post(self, payload):
+        import requests  # 只在联网时加载，加快启动
+
+        headers = {TOKEN_HEADER: self.token} if self.token else {}
+        try:
+            response = requests.post(self.server_url + SYNC_PATH, json=payload, headers=headers,
+                                     timeout=self.timeout)
+        except requests.RequestException as e:
+            raise SyncError(f"无法连接同步服务: {e}")
+        try:
+            result = response.json()
+        except ValueError:
+            raise SyncError(f"同步服务返回了无法识别的内容 (HTTP {response.status_code})")
+        if response.status_code != 200:
+            raise SyncError(result.get('error') or f"HTTP {response.status_code}")
+        return result
+
+    def pending_changes(self, items, deletable_prefixes=(CONFIG_PREFIX,)):
+        """与上次同步相比发生变化的条目；deletable_prefixes 下本机不存在的条目视为已删除"""
+        changes = []
+        for key, data in items.items():
+            digest = item_hash(data)
+            known = self.state.items.get(key)
+            if known is None or known[1] != digest:
+                changes.append({'key': key, 'base': known[0] if known else 0, 'hash': digest, 'data': data})
+        for key, (rev, digest) in self.state.items.items():
+            if key not in items and digest is not None and key.startswith(deletable_prefixes):
+                changes.append({'key': key, 'base': rev, 'hash': None, 'data': None})
+        return changes
+
+    def sync(self, items, deletable_prefixes=(CONFIG_PREFIX,)):
+        """同步条目（键 -> 同步格式的内容）
+
+        返回 {'pushed': [提交的键], 'pulled': {键: 内容，删除为None}, 'conflicts': [冲突的键],
+              'renamed': [(原键, 新键)], 'revision': 服务器版本}，pulled 需要由调用方写回本机。
+        """
+        items = dict(items)
+        summary = {'pushed': [], 'pulled': {}, 'conflicts': [], 'renamed': [], 'revision': self.state.revision}
+        changes = self.pending_changes(items, deletable_prefixes)
+
+        # 冲突按 local/rename 处理时需要再提交一次
+        for _ in range(2):
+            result = self._post({'since': self.state.revision, 'changes': changes})
+            submitted = {change['key']: change for change in changes}
+            for key, rev in result['accepted'].items():
+                self.state.items[key] = [rev, submitted[key]['hash']]
+                summary['pushed'].append(key)
+            for item in result['changes']:
+                self.state.items[item['key']] = [item['rev'], item['hash']]
+                summary['pulled'][item['key']] = item['data']
+            self.state.revision = result['revision']
+
+            changes = []
+            for item in result['conflicts']:
+                key = item['key']
+                summary['conflicts'].append(key)
+                local = submitted[key]
+                if self.strategy == SYNC_KEEP_LOCAL:
+                    changes.append(dict(local, base=item['rev']))
+                    continue
+                self.state.items[key] = [item['rev'], item['hash']]
+                summary['pulled'][key] = item['data']
+                if self.strategy == SYNC_RENAME and key.startswith(CONFIG_PREFIX) and local['data'] is not None:
+                    new_key = unique_item_key(key, set(items) | set(self.state.items))
+                    items[new_key] = local['data']
+                    summary['renamed'].append((key, new_key))
+                    summary['pulled'][new_key] = local['data']
+                    changes.append({'key': new_key, 'base': 0, 'hash': local['hash'], 'data': local['data']})
+            if not changes:
+                break
+
+        self.state.save()
+        summary['revision'] = self.state.revision
+        logger.info("同步完成: 提交 %d，取回 %d，冲突 %d", len(summary['pushed']), len(summary['pulled']),
+                    len(summary['conflicts']))
+        return summary
+
+
+def collect_items(configs, catalog, inventories=()):
+    """把配置与已导入的账号库存转换为同步条目"""
+    items = {config_key(name): encode_sync_config(config, catalog) for name, config in configs.items()}
+    for profile in inventories:
+        items[inventory_key(profile['id'])] = encode_inventory(profile)
+    return items
+
+
+def apply_config_items(configs, pulled, catalog):
+    """把取回的配置条目写入 configs，返回 (新增或更新的配置名, 删除的配置名)"""
+    updated, removed = [], []
+    for key, data in pulled.items():
+        if not key.startswith(CONFIG_PREFIX):
+            continue
+        name = key[len(CONFIG_PREFIX):]
+        if data is None:
+            if configs.pop(name, None) is not None:
+                removed.append(name)
+        else:
+            configs[name] = decode_sync_config(data, catalog)
+            updated.append(name)
+    return updated, removed
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QLineEdit, QComboBox, QDialogButtonBox,
+                             QMessageBox, QApplication)
+from PyQt5.QtCore import Qt
+
+from utils import resource_path
+from sync_client import (SyncClient, SyncState, SyncError, collect_items, apply_config_items,
+                         SYNC_STATE_FILE, SYNC_KEEP_REMOTE, SYNC_KEEP_LOCAL, SYNC_RENAME)
+from sync_protocol import INVENTORY_PREFIX, config_key, decode_inventory
+from sync_server import DEFAULT_HOST, DEFAULT_PORT
+import app_logging
+import metrics
+
+logger = app_logging.get_logger(__name__)
+
+STRATEGY_LABELS = ((SYNC_KEEP_REMOTE, "使用服务器上的版本"),
+                   (SYNC_KEEP_LOCAL, "用本机版本覆盖服务器"),
+                   (SYNC_RENAME, "保留两者（本机版本另存为新配置）"))
+
+
+class SyncDialog(QDialog):
+    """同步服务地址、口令与冲突策略"""
+
+    def __init__(self, parent, state):
+        super().__init__(parent)
+        self.setWindowTitle("同步配置")
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        self.server_input = QLineEdit(state.server or f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+        form.addRow("服务器地址:", self.server_input)
+        self.token_input = QLineEdit(state.token or "")
+        self.token_input.setEchoMode(QLineEdit.Password)
+        form.addRow("口令:", self.token_input)
+        self.strategy_combo = QComboBox()
+        for strategy, label in STRATEGY_LABELS:
+            self.strategy_combo.addItem(label, strategy)
+        index = self.strategy_combo.findData(state.strategy)
+        self.strategy_combo.setCurrentIndex(max(index, 0))
+        form.addRow("两边都修改时:", self.strategy_combo)
+        layout.addLayout(form)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.button(QDialogButtonBox.Ok).setText("同步")
+        buttons.button(QDialogButtonBox.Cancel).setText("取消")
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def options(self):
+        return (self.server_input.text().strip(), self.token_input.text().strip() or None,
+                self.strategy_combo.currentData())
+
+
+class SyncManager:
+    """与同步服务交换已保存的配置与已导入的库存"""
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.state_file = os.path.join(resource_path("configs", use_exe_dir_for_config=True), SYNC_STATE_FILE)
+
+    def sync_now(self):
+        parent = self.parent
+        if parent.current_config and parent.config_modified:
+            # 未保存的修改不会提交；其他机器修改了当前配置时会被取回的版本替换
+            reply = QMessageBox.question(
+                parent, "确认同步",
+                f"当前配置 '{parent.current_config}' 有未保存的更改。\n\n"
+                "是否在同步前保存当前配置？选择\"否\"时，如果其他机器修改了该配置，未保存的更改将被丢弃。",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Yes)
+            if reply == QMessageBox.Cancel:
+                return
+            elif reply == QMessageBox.Yes:
+                parent.save_config()
+
+        dialog = SyncDialog(parent, SyncState(self.state_file))
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        server, token, strategy = dialog.options()
+        if not server:
+            QMessageBox.warning(self.parent, "警告", "请输入同步服务器地址!")
+            return
+        if not server.startswith(('http://', 'https://')):
+            server = 'http://' + server
+
+        client = SyncClient(server, self.state_file, token=token, strategy=strategy)
+        items = collect_items(parent.student_configs, parent.gift_catalog, parent.inventory_store)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            with metrics.timer('sync'):
+                summary = client.sync(items)
+        except SyncError as e:
+            QMessageBox.critical(parent, "错误", f"同步失败:\n{e}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        message = self.apply(summary)
+        QMessageBox.information(parent, "同步完成", message)
+
+    def apply(self, summary):
+        """把取回的条目写回本机，返回结果说明"""
+        parent = self.parent
+        pulled = dict(summary['pulled'])
+        current = parent.current_config
+        kept_current = current and config_key(current) in pulled and pulled[config_key(current)] is None
+        if kept_current:
+            del pulled[config_key(current)]  # 正在使用的配置不随其他机器的删除而消失
+
+        updated, removed = apply_config_items(parent.student_configs, pulled, parent.gift_catalog)
+        for name in updated + removed:
+            parent.invalidate_config_cache(name)
+
+        profiles = [decode_inventory(key[len(INVENTORY_PREFIX):], data) for key, data in pulled.items()
+                    if key.startswith(INVENTORY_PREFIX) and data is not None]
+        if profiles:
+            parent.inventory_store.merge(profiles)
+            parent.import_manager.record_history(profiles)
+            parent.update_profile_combo()
+
+        if updated or removed:
+            parent.save_all_configs()
+            if current not in parent.student_configs:
+                parent.current_config = next(iter(parent.student_configs), None)
+            parent.config_combo.blockSignals(True)
+            parent.update_config_combo()
+            parent.config_combo.blockSignals(False)
+
+        lines = [f"提交 {len(summary['pushed'])} 项，取回 {len(updated)} 个配置、{len(profiles)} 个账号库存",
+                 f"服务器版本: {summary['revision']}"]
+        if removed:
+            lines.append(f"删除 {len(removed)} 个其他机器已删除的配置")
+        if summary['renamed']:
+            lines.append("本机版本已另存为: " + "、".join(new[len(config_key('')):] for _, new in summary['renamed']))
+        elif summary['conflicts']:
+            lines.append(f"{len(summary['conflicts'])} 项两边都有修改，已按所选策略处理")
+        if kept_current:
+            lines.append(f"当前配置 '{current}' 已在其他机器删除，本机仍保留，下次同步时重新上传")
+        if current in updated:
+            # 配置已被替换，界面上的未保存修改不能再与新内容混在一起
+            if parent.config_modified:
+                lines.append(f"当前配置 '{current}' 已替换为其他机器的版本，本机未保存的修改已丢弃")
+            parent.load_config(current)
+        return "\n".join(lines)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""配置与库存同步的数据格式
+
+同步的单位是条目，键为 "config/配置名" 或 "inventory/账号id"，内容为与礼物槽位无关的JSON：
+配置中的特殊喜好写成礼物ID列表（各机器的礼物表顺序可能不同），数量的键为字符串。
+内容哈希用于判断条目是否变化，只有变化的条目才会发送。
+
+    POST /sync  {"since": 已知的服务器版本, "changes": [{"key", "base", "hash", "data"}, ...]}
+                base 为修改所基于的条目版本（新条目为0），data 为 null 表示删除。
+                返回 {"revision": 服务器版本, "accepted": {键: 新版本},
+                      "conflicts": [服务器上的条目], "changes": [since 之后其他机器修改的条目]}
+"""
+
+import hashlib
+import json
+
+from favor_core import GIFT_SET_KEYS, normalize_config
+from config_store import encode_config
+
+CONFIG_PREFIX = 'config/'
+INVENTORY_PREFIX = 'inventory/'
+SYNC_PATH = '/sync'
+TOKEN_HEADER = 'X-Sync-Token'
+
+
+def item_hash(data):
+    """条目内容的哈希，删除的条目为None"""
+    if data is None:
+        return None
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def config_key(name):
+    return CONFIG_PREFIX + name
+
+
+def inventory_key(profile_id):
+    return INVENTORY_PREFIX + str(profile_id)
+
+
+def encode_sync_config(config, catalog):
+    """内存中的配置 -> 同步格式"""
+    data = {key: value for key, value in encode_config(config).items() if key not in GIFT_SET_KEYS}
+    for key in GIFT_SET_KEYS:
+        data[key] = sorted(catalog.ids_of(config.get(key, 0)))
+    if 'gift_quantities' in data:
+        data['gift_quantities'] = {str(gift_id): int(qty) for gift_id, qty in data['gift_quantities'].items()}
+    return data
+
+
+def decode_sync_config(data, catalog):
+    """同步格式 -> 内存中的配置（礼物列表转换为本机礼物表下的掩码）"""
+    return normalize_config(data, catalog)
+
+
+def encode_inventory(profile):
+    return {'name': profile['name'],
+            'quantities': {str(gift_id): int(qty) for gift_id, qty in profile['quantities'].items() if qty}}
+
+
+def decode_inventory(profile_id, data):
+    quantities = {int(gift_id): int(qty) for gift_id, qty in data.get('quantities', {}).items()}
+    return {'id': profile_id, 'name': data.get('name') or profile_id, 'quantities': quantities,
+            'students': [], 'item_count': len(quantities), 'invalid': 0, 'index': 0}
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""同步服务（参考实现）
+
+保存各条目的最新内容、版本号与内容哈希，供多台机器上的程序增量同步配置与库存，
+协议见 sync_protocol。版本号全局递增，客户端只取自己已知版本之后的修改；
+提交的修改基于的版本与服务器不一致且内容不同时作为冲突返回，由客户端按策略处理。
+数据保存在一个JSON文件中，适合本机测试或在家庭网络内使用。
+
+    GET  /health    存活检查
+    GET  /manifest  所有条目的 {键: [版本, 哈希]}
+    POST /sync      提交修改并取回其他机器的修改
+
+运行: python sync_server.py --port 8766 [--token 共享口令]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from version import __version__
+from utils import resource_path
+from sync_protocol import item_hash, SYNC_PATH, TOKEN_HEADER
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8766
+DATA_FILE = 'sync_server.json'
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+class SyncRequestError(Exception):
+    """请求错误，携带HTTP状态码"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class SyncStore:
+    """条目的版本存储，删除的条目保留为 data 为None的墓碑，其他机器才能得知删除"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.revision = 0
+        self.items = {}  # 键 -> {'rev', 'hash', 'data'}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self.revision = saved.get('revision', 0)
+            self.items = saved.get('items', {})
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'revision': self.revision, 'items': self.items}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+
+    def manifest(self):
+        with self._lock:
+            return {key: [item['rev'], item['hash']] for key, item in self.items.items()}
+
+    def sync(self, since, changes):
+        """应用客户端的修改，返回接受的版本、冲突与 since 之后的其他修改
+
+        服务器上不存在的条目按版本0处理（例如服务器数据丢失后客户端仍记录着旧版本），直接接受。
+        """
+        accepted = {}
+        conflicts = []
+        for change in changes:
+            if change.get('hash') != item_hash(change.get('data')):
+                raise SyncRequestError(f"条目 {change['key']} 的哈希与内容不一致")
+
+        changed = False
+        with self._lock:
+            for change in changes:
+                key = change['key']
+                data = change.get('data')
+                digest = change['hash']
+                current = self.items.get(key)
+                current_rev = current['rev'] if current else 0
+                if current is None and data is None:
+                    accepted[key] = 0  # 删除服务器上不存在的条目
+                elif current is not None and current['hash'] == digest:
+                    accepted[key] = current_rev  # 内容相同，无需新版本
+                elif current is not None and change.get('base', 0) != current_rev:
+                    conflicts.append(dict(current, key=key))
+                else:
+                    self.revision += 1
+                    self.items[key] = {'rev': self.revision, 'hash': digest, 'data': data}
+                    accepted[key] = self.revision
+                    changed = True
+
+            submitted = {change['key'] for change in changes}
+            updates = [dict(item, key=key) for key, item in self.items.items()
+                       if item['rev'] > since and key not in submitted]
+            if changed:
+                self._save()
+            return {'revision': self.revision, 'accepted': accepted, 'conflicts': conflicts, 'changes': updates}
+
+
+class SyncRequestHandler(BaseHTTPRequestHandler):
+    server_version = f"ShigureAI-Sync/{__version__}"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch({
+            '/health': lambda payload: {'status': 'ok', 'version': __version__},
+            '/manifest': lambda payload: {'revision': self.server.store.revision,
+                                          'items': self.server.store.manifest()},
+        }, with_body=False)
+
+    def do_POST(self):
+        self._dispatch({SYNC_PATH: self._sync}, with_body=True)
+
+    def _sync(self, payload):
+        try:
+            since = int(payload.get('since', 0))
+            changes = [dict(change) for change in payload.get('changes', [])]
+            if not all(isinstance(change.get('key'), str) for change in changes):
+                raise ValueError
+        except (TypeError, ValueError):
+            raise SyncRequestError("since/changes 格式错误")
+        return self.server.store.sync(since, changes)
+
+    def _read_payload(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_SIZE:
+            raise SyncRequestError("请求体过大", status=413)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+        try:
+            payload = json.loads(body) if body.strip() else {}
+        except ValueError:
+            raise SyncRequestError("请求体不是有效的JSON")
+        if not isinstance(payload, dict):
+            raise SyncRequestError("请求体必须为JSON对象")
+        return payload
+
+    def _dispatch(self, routes, with_body):
+        path = self.path.split('?', 1)[0]
+        try:
+            if self.server.token and self.headers.get(TOKEN_HEADER) != self.server.token:
+                raise SyncRequestError("同步口令错误", status=401)
+            route = routes.get(path)
+            if route is None:
+                raise SyncRequestError(f"未知路径: {path}", status=404)
+            status, response = 200, route(self._read_payload() if with_body else {})
+        except SyncRequestError as e:
+            status, response = e.status, {'error': str(e)}
+        except Exception as e:
+            status, response = 500, {'error': f"内部错误: {e}"}
+
+        body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class SyncHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store, token=None, verbose=False):
+        super().__init__(address, SyncRequestHandler)
+        self.store = store
+        self.token = token
+        self.verbose = verbose
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, data_file=None, token=None, verbose=False):
+    """创建同步服务，data_file 为空字符串时只保存在内存中"""
+    if data_file is None:
+        data_file = os.path.join(resource_path("configs", use_exe_dir_for_config=True), DATA_FILE)
+    return SyncHTTPServer((host, port), SyncStore(data_file or None), token=token, verbose=verbose)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ShigureAI 配置同步服务")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="监听地址，其他机器访问时使用 0.0.0.0")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--data', default=None, help=f"数据文件路径，默认为 configs/{DATA_FILE}")
+    parser.add_argument('--token', default=None, help="共享口令，客户端需提供相同的口令")
+    parser.add_argument('--verbose', action='store_true', help="输出请求日志")
+    args = parser.parse_args(argv)
+
+    if args.host != DEFAULT_HOST and not args.token:
+        print("提示: 监听非本机地址时建议使用 --token 设置口令")
+    try:
+        server = create_server(args.host, args.port, args.data, args.token, args.verbose)
+    except (OSError, ValueError) as e:
+        print(e)
+        return 2
+
+    host, port = server.server_address[:2]
+    print(f"ShigureAI 同步服务已启动: http://{host}:{port}  (版本 {server.store.revision}，{len(server.store.items)} 个条目)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+from binary_delta import HEADER, DeltaError, make_delta, apply_delta, make_delta_file, apply_delta_file, read_header
+
+
+def release_pair(size=200 * 1024, seed=1):
+    """模拟两个版本的exe：大部分相同，中间改动、插入与删除若干段"""
+    rng = random.Random(seed)
+    old = rng.randbytes(size)
+    new = bytearray(old)
+    new[1000:1100] = bytes(100)
+    new[50000:50000] = b'inserted section' * 64
+    del new[120000:121000]
+    new += b'appended tail'
+    return old, bytes(new)
+
+
+def test_round_trip():
+    old, new = release_pair()
+    delta = make_delta(old, new)
+    assert apply_delta(old, delta) == new
+    assert len(delta) < len(new) // 10
+
+
+@pytest.mark.parametrize('old, new', [
+    (b'', b'new file only'),
+    (b'old file only', b''),
+    (b'identical' * 100, b'identical' * 100),
+    (b'short', b'shorter than a block'),
+])
+def test_round_trip_edge_cases(old, new):
+    assert apply_delta(old, make_delta(old, new, block_size=16)) == new
+
+
+def test_rejects_mismatched_source():
+    old, new = release_pair()
+    delta = make_delta(old, new)
+    other = bytearray(old)
+    other[0] ^= 0xFF
+    with pytest.raises(DeltaError):
+        apply_delta(bytes(other), delta)
+    with pytest.raises(DeltaError):
+        apply_delta(old[:-1], delta)
+
+
+def test_rejects_corrupted_patch():
+    old, new = release_pair()
+    delta = make_delta(old, new)
+    with pytest.raises(DeltaError):
+        apply_delta(old, b'NOTDELTA' + delta[8:])
+    with pytest.raises(DeltaError):
+        apply_delta(old, delta[:20])
+    with pytest.raises(DeltaError):
+        apply_delta(old, delta[:-10])
+    corrupted = bytearray(delta)
+    corrupted[-5] ^= 0xFF
+    with pytest.raises(DeltaError):
+        apply_delta(old, bytes(corrupted))
+
+
+def test_rejects_wrong_result_hash():
+    old, new = release_pair()
+    delta = make_delta(old, new)
+    magic, source_size, source_hash, target_size, _, block_size = HEADER.unpack_from(delta)
+    tampered = HEADER.pack(magic, source_size, source_hash, target_size, bytes(32), block_size) + delta[HEADER.size:]
+    with pytest.raises(DeltaError):
+        apply_delta(old, tampered)
+
+
+def test_files(tmp_path):
+    old, new = release_pair()
+    (tmp_path / 'old.exe').write_bytes(old)
+    (tmp_path / 'new.exe').write_bytes(new)
+    size = make_delta_file(tmp_path / 'old.exe', tmp_path / 'new.exe', tmp_path / 'update.delta')
+    assert size == (tmp_path / 'update.delta').stat().st_size
+    assert read_header((tmp_path / 'update.delta').read_bytes())[2] == len(new)
+
+    output = str(tmp_path / 'out.exe')
+    assert apply_delta_file(tmp_path / 'old.exe', tmp_path / 'update.delta', output) == len(new)
+    assert (tmp_path / 'out.exe').read_bytes() == new
+
+
+def test_failed_apply_keeps_output(tmp_path):
+    old, new = release_pair()
+    (tmp_path / 'other.exe').write_bytes(b'not the old version')
+    (tmp_path / 'update.delta').write_bytes(make_delta(old, new))
+    (tmp_path / 'out.exe').write_bytes(b'previous')
+    with pytest.raises(DeltaError):
+        apply_delta_file(tmp_path / 'other.exe', tmp_path / 'update.delta', str(tmp_path / 'out.exe'))
+    assert (tmp_path / 'out.exe').read_bytes() == b'previous'
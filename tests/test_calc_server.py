@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from calc_server import CalculationService, WorkerPoolHTTPServer, MAX_BODY_SIZE
+
+
+@pytest.fixture(scope='module')
+def service(tmp_path_factory):
+    return CalculationService(config_file=str(tmp_path_factory.mktemp('calc') / 'config.json'))
+
+
+def start_server(service, **kwargs):
+    server = WorkerPoolHTTPServer(('127.0.0.1', 0), service, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def server(service):
+    server = start_server(service, workers=2)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+    try:
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        data = response.read()
+        return response.status, json.loads(data) if data else None
+    finally:
+        connection.close()
+
+
+def test_health(server):
+    status, body = request(server, 'GET', '/health')
+    assert status == 200
+    assert body['status'] == 'ok'
+
+
+def test_calculate(server):
+    payload = {'quantities': {'5000': 10}, 'start_level': 1, 'start_exp': 0}
+    status, body = request(server, 'POST', '/calculate', payload)
+    assert status == 200
+    assert body['total_exp'] == 200
+    assert body['config'] is None
+    assert body['text']
+
+    # 相同的输入命中结果缓存
+    hits = server.service.cache.stats()['hits']
+    assert request(server, 'POST', '/calculate', payload)[1] == body
+    assert server.service.cache.stats()['hits'] == hits + 1
+
+
+def test_calculate_errors(server):
+    status, body = request(server, 'POST', '/calculate', '{"quantities": {"5000": ')
+    assert status == 400
+    assert 'error' in body
+    assert request(server, 'POST', '/calculate', {'quantities': {'5000': 1}, 'start_level': 'x'})[0] == 400
+    assert request(server, 'POST', '/calculate', {'config': '不存在的配置'})[0] == 404
+    assert request(server, 'GET', '/unknown')[0] == 404
+
+
+def test_oversized_body(server):
+    status, body = request(server, 'POST', '/calculate', b'{}',
+                           headers={'Content-Length': str(MAX_BODY_SIZE + 1)})
+    assert status == 413
+    assert 'error' in body
+
+
+def test_metrics(server):
+    request(server, 'GET', '/health')
+    status, body = request(server, 'GET', '/metrics')
+    assert status == 200
+    assert body['workers'] == 2
+    assert body['counters']['requests'] >= 1
+    assert body['counters']['/health 200'] >= 1
+    assert '/health' in body['endpoint_latency_ms']
+    assert 'hits' in body['cache']
+
+
+def test_saturated_pool_returns_503(service):
+    # 一个工作线程、没有排队位置：先建立的连接不发送请求，占住工作线程，之后的请求立即得到503
+    server = start_server(service, workers=1, backlog=0)
+    idle = socket.create_connection(server.server_address[:2])
+    try:
+        assert request(server, 'GET', '/health')[0] == 503
+    finally:
+        idle.close()
+    try:
+        deadline = time.monotonic() + 5
+        while request(server, 'GET', '/health')[0] == 503:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert request(server, 'GET', '/health')[0] == 200
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from favor_core import GiftCatalog
+from config_manager import validate_config_entry
+from config_store import encode_configs, SLOTS_KEY
+
+
+@pytest.fixture
+def catalog():
+    return GiftCatalog([(5000, 20), (5001, 120)])
+
+
+def test_unknown_gift_ids_are_counted_not_slotted(catalog):
+    config, unknown = validate_config_entry({'level40_gifts': [5000, 999999, 888888]}, catalog)
+    assert unknown == 2
+    assert catalog.ids_of(config['level40_gifts']) == [5000]
+    assert catalog.slot_ids == [5000, 5001]
+    assert encode_configs({'甲': config}, catalog)[SLOTS_KEY] == [5000, 5001]
+
+
+def test_hex_mask_from_another_slot_order(catalog):
+    # 导出文件的槽位顺序: 5001, 888888, 5000
+    config, unknown = validate_config_entry({'level180_gifts': '1', 'level40_gifts': '6'}, catalog,
+                                            slot_ids=[5001, 888888, 5000])
+    assert unknown == 1
+    assert catalog.ids_of(config['level180_gifts']) == [5001]
+    assert catalog.ids_of(config['level40_gifts']) == [5000]
+    assert catalog.slot_ids == [5000, 5001]
+
+
+@pytest.mark.parametrize('data', [
+    {'level40_gifts': 'zz'},
+    {'level40_gifts': [5000, '5001']},
+    {'level40_gifts': 3},
+    {'gift_quantities': {'5000': -1}},
+    [],
+])
+def test_invalid_entries(catalog, data):
+    with pytest.raises(ValueError):
+        validate_config_entry(data, catalog)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+from PyQt5.QtCore import QObject
+from PyQt5.QtWidgets import QComboBox
+
+import favor_core
+from config_store import write_config_file
+from config_watcher import ConfigFileWatcher
+
+
+class FakeWindow(QObject):
+    """只提供合并所需属性的主界面"""
+
+    def __init__(self, configs, current):
+        super().__init__()
+        self.gift_catalog = favor_core.GiftCatalog([(5000, 20), (5001, 20), (5002, 120)])
+        self.student_configs = {name: self.normalize(conf) for name, conf in configs.items()}
+        self.current_config = current
+        self.config_modified = False
+        self.config_combo = QComboBox()
+        self.config_combo.addItems(list(self.student_configs))
+        self.invalidated = []
+        self.loaded = []
+
+    def normalize(self, conf):
+        return favor_core.normalize_config(conf, self.gift_catalog)
+
+    def invalidate_config_cache(self, name):
+        self.invalidated.append(name)
+
+    def load_config(self, name):
+        self.loaded.append(name)
+
+    def combo_items(self):
+        return [self.config_combo.itemText(i) for i in range(self.config_combo.count())]
+
+
+def config(level, level40=()):
+    return {'start_level': level, 'level40_gifts': list(level40), 'gift_quantities': {'5000': 1}}
+
+
+@pytest.fixture
+def setup(qapp, tmp_path):
+    """返回 (主界面, 监视器, 外部写入函数)，文件中已有配置 甲、乙、丙，当前配置为 甲"""
+    path = str(tmp_path / 'configs' / 'config.json')
+    window = FakeWindow({'甲': config(1), '乙': config(2), '丙': config(3)}, '甲')
+    write_config_file(path, window.student_configs, window.gift_catalog, '甲')
+    watcher = ConfigFileWatcher(window, path)
+    watcher.start()
+    events = []
+    watcher.configs_changed.connect(lambda *args: events.append(args))
+
+    def external_write(configs):
+        previous = os.stat(path).st_mtime_ns
+        write_config_file(path, {name: window.normalize(conf) for name, conf in configs.items()},
+                          window.gift_catalog, '甲')
+        # 保证修改时间变化，避免同一时刻两次写入被当作未修改
+        os.utime(path, ns=(previous + 10 ** 9, previous + 10 ** 9))
+
+    window.events = events
+    return window, watcher, external_write
+
+
+def test_unchanged_file_is_ignored(setup):
+    window, watcher, external_write = setup
+    assert watcher.check() is False
+
+    # 内容相同的重新写入（如程序自身保存）只更新基准
+    external_write({'甲': config(1), '乙': config(2), '丙': config(3)})
+    assert watcher.check() is False
+    assert window.events == [] and window.invalidated == []
+
+
+def test_external_changes_are_merged(setup):
+    window, watcher, external_write = setup
+    external_write({'甲': config(1), '乙': config(5, [5000]), '丁': config(4)})
+
+    assert watcher.check() is True
+    assert window.events == [(['丁'], ['乙'], ['丙'], [])]
+    assert window.student_configs['乙']['start_level'] == 5
+    assert window.student_configs['乙']['level40_gifts'] == window.gift_catalog.mask_of([5000])
+    assert '丙' not in window.student_configs
+    assert window.combo_items() == ['甲', '乙', '丁']
+    assert sorted(window.invalidated) == sorted(['乙', '丙', '丁'])
+    assert window.loaded == []
+    assert watcher.check() is False
+
+
+def test_current_config_reloaded_when_unmodified(setup):
+    window, watcher, external_write = setup
+    external_write({'甲': config(9), '乙': config(2), '丙': config(3)})
+
+    assert watcher.check() is True
+    assert window.student_configs['甲']['start_level'] == 9
+    assert window.loaded == ['甲']
+    assert watcher.conflicts == set()
+
+
+def test_unsaved_current_config_is_conflict(setup):
+    window, watcher, external_write = setup
+    window.config_modified = True
+    window.student_configs['甲']['start_level'] = 7  # 本机未保存的修改
+    external_write({'甲': config(9), '乙': config(6), '丙': config(3)})
+
+    assert watcher.check() is True
+    assert window.events == [([], ['甲', '乙'], [], ['甲'])]
+    assert window.student_configs['甲']['start_level'] == 7
+    assert window.student_configs['乙']['start_level'] == 6
+    assert window.loaded == []
+    assert watcher.conflicts == {'甲'}
+
+    # 保存后以文件内容为新基准，冲突清除
+    watcher.mark_synced()
+    assert watcher.conflicts == set()
+
+
+def test_removed_current_config_is_kept(setup):
+    window, watcher, external_write = setup
+    external_write({'乙': config(2), '丙': config(3)})
+
+    assert watcher.check() is True
+    assert window.events == [([], [], ['甲'], ['甲'])]
+    assert '甲' in window.student_configs
+    assert window.combo_items() == ['甲', '乙', '丙']
+    assert watcher.conflicts == {'甲'}
+
+
+def test_unparsable_file_waits_for_next_change(setup):
+    window, watcher, external_write = setup
+    path = watcher.path
+    previous = os.stat(path).st_mtime_ns
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"乙": ')
+    os.utime(path, ns=(previous + 10 ** 9, previous + 10 ** 9))
+    assert watcher.check() is False
+    assert window.events == []
+
+    external_write({'甲': config(1), '乙': config(8), '丙': config(3)})
+    assert watcher.check() is True
+    assert window.events == [([], ['乙'], [], [])]
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import favor_core
+from favor_core import GiftCatalog
+
+
+def small_catalog():
+    return GiftCatalog([(100008, 60), (5000, 20), (5001, 120)])
+
+
+def test_unknown_gifts_get_no_slots():
+    catalog = small_catalog()
+    config = favor_core.normalize_config({'level40_gifts': [5000, 999999, 888888]}, catalog)
+    assert catalog.ids_of(config['level40_gifts']) == [5000]
+    assert catalog.mask_of([999999]) == 0
+    assert catalog.slot_of(999999) is None
+    assert catalog.slot_ids == [100008, 5000, 5001]
+    assert favor_core.get_actual_favor(catalog, 999999, config) == 0
+
+
+def test_hex_masks_with_other_slot_order():
+    catalog = small_catalog()
+    # 其他机器的槽位顺序中包含本目录没有的礼物
+    slot_ids = [5001, 888888, 5000]
+    assert catalog.decode_ids('7', slot_ids) == [5001, 888888, 5000]
+    assert catalog.ids_of(catalog.decode_mask('7', slot_ids)) == [5000, 5001]
+    assert catalog.decode_mask('ff') == 0b111
+    assert catalog.decode_mask('ff', [100008, 5000]) == 0b11
+    assert catalog.slot_ids == [100008, 5000, 5001]
+
+
+def test_special_favors():
+    catalog = small_catalog()
+    config = favor_core.normalize_config({'level60_gifts': [5000], 'level240_gifts': [5001]}, catalog)
+    assert favor_core.get_actual_favor(catalog, 5000, config) == 60
+    assert favor_core.get_actual_favor(catalog, 5001, config) == 240
+    assert favor_core.get_actual_favor(catalog, 100008, config, is_linked=True) == 20
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+import import_manager
+from import_manager import ImportParseError, parse_import_profiles, split_profile_chunks
+
+KNOWN_GIFTS = frozenset({5000, 5001, 5002})
+
+
+def bacv_profile(profile_id, items, **extra):
+    profile = {'id': profile_id, 'name': f"账号{profile_id}",
+               'item': [{'id': gift_id, 'number': number} for gift_id, number in items],
+               'student': [{'id': 10000 + int(profile_id)}]}
+    profile.update(extra)
+    return profile
+
+
+def bacv_content(*profiles):
+    return json.dumps(list(profiles), ensure_ascii=False, indent=1)
+
+
+@pytest.fixture
+def parallel(monkeypatch):
+    """把并行解析阈值调低，并记录每次进程池解析的块数"""
+    calls = []
+    original = import_manager._parse_chunks_parallel
+
+    def record(chunks, *args, **kwargs):
+        calls.append(len(chunks))
+        return original(chunks, *args, **kwargs)
+
+    monkeypatch.setattr(import_manager, 'PARALLEL_PARSE_THRESHOLD', 0)
+    monkeypatch.setattr(import_manager, '_parse_chunks_parallel', record)
+    return calls
+
+
+def whole_file_parse(content):
+    return parse_import_profiles(content, KNOWN_GIFTS)
+
+
+def test_parallel_parse_matches_whole_file(parallel):
+    content = bacv_content(
+        bacv_profile('1', [(5000, 3), (5001, 2)]),
+        bacv_profile('2', [(5002, 7), (999, 1), (5000, -1)]),
+        bacv_profile('3', []),
+    )
+    progress = []
+    profiles = parse_import_profiles(content, KNOWN_GIFTS, progress=progress.append)
+
+    assert parallel == [3]
+    assert [p['id'] for p in profiles] == ['1', '2', '3']
+    assert [p['index'] for p in profiles] == [0, 1, 2]
+    assert profiles[0]['quantities'] == {5000: 3, 5001: 2}
+    assert profiles[1]['quantities'] == {5002: 7}
+    assert profiles[1]['invalid'] == 1
+    assert profiles[1]['item_count'] == 3
+    assert profiles[2]['students'] == [10003]
+    assert progress[-1] == 1
+
+
+def test_bad_chunk_falls_back_to_whole_file(parallel):
+    # 第二个对象没有物品列表：单独解析该块失败，整体解析时被跳过
+    content = bacv_content(
+        bacv_profile('1', [(5000, 1)]),
+        {'id': '2', 'name': "不是账号"},
+        bacv_profile('3', [(5001, 4)]),
+    )
+    profiles = parse_import_profiles(content, KNOWN_GIFTS)
+
+    assert parallel == [3]
+    assert [p['id'] for p in profiles] == ['1', '3']
+    assert [p['quantities'] for p in profiles] == [{5000: 1}, {5001: 4}]
+
+
+def test_wrong_split_falls_back_to_whole_file(parallel):
+    # 账号内嵌套的字符串id对象会被误当作账号开头，切出的块不是合法JSON
+    nested = bacv_profile('1', [(5000, 2)], extra=[{'id': 1}, {'id': "嵌套"}])
+    content = bacv_content(nested, bacv_profile('2', [(5002, 5)]))
+    assert len(split_profile_chunks(content)) == 3
+
+    profiles = parse_import_profiles(content, KNOWN_GIFTS)
+
+    assert parallel == [3]
+    assert [p['id'] for p in profiles] == ['1', '2']
+    assert [p['quantities'] for p in profiles] == [{5000: 2}, {5002: 5}]
+
+
+def test_unsplittable_content_skips_pool(parallel):
+    single = bacv_content(bacv_profile('1', [(5000, 1)]))
+    assert split_profile_chunks(single) is None
+    assert split_profile_chunks('{"id": "1"}') is None
+
+    profiles = parse_import_profiles(single, KNOWN_GIFTS)
+    assert parallel == []
+    assert profiles[0]['quantities'] == {5000: 1}
+
+
+def test_below_threshold_uses_whole_file(monkeypatch):
+    monkeypatch.setattr(import_manager, '_parse_chunks_parallel', None)
+    content = bacv_content(bacv_profile('1', [(5000, 1)]), bacv_profile('2', [(5001, 2)]))
+    profiles = whole_file_parse(content)
+    assert [p['quantities'] for p in profiles] == [{5000: 1}, {5001: 2}]
+
+
+def test_regex_fallback_for_loose_text():
+    content = "{id: 5000, number: 3}, {'id': 5001, 'number': 4}, {id: 777, number: 1"
+    profiles = parse_import_profiles(content, KNOWN_GIFTS)
+    assert len(profiles) == 1
+    assert profiles[0]['name'] == "导入数据"
+    assert profiles[0]['quantities'] == {5000: 3, 5001: 4}
+
+
+def test_empty_and_invalid_content():
+    with pytest.raises(ImportParseError) as empty:
+        parse_import_profiles("  \n", KNOWN_GIFTS)
+    assert empty.value.code == ImportParseError.EMPTY
+
+    with pytest.raises(ImportParseError) as invalid:
+        parse_import_profiles('[{"name": "没有物品"', KNOWN_GIFTS)
+    assert invalid.value.code == ImportParseError.INVALID_FORMAT
+    assert invalid.value.detail.startswith("JSON解析失败")
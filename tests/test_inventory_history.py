@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from inventory_history import InventoryHistory, KEYFRAME_INTERVAL
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = InventoryHistory(str(tmp_path / 'inventory_history.jsonl'))
+    history.record('1', '账号', {5000: 10, 5001: 3}, timestamp=100)
+    history.record('1', '账号', {5000: 14, 5001: 1}, timestamp=200)
+    history.record('1', '账号', {5000: 12, 5001: 6}, timestamp=300)
+    return history
+
+
+def test_gains_between_snapshots(history):
+    assert history.gains_since('1', 100, 300) == {5000: 4, 5001: 5}
+    assert history.gains_since('1', 200, 300) == {5001: 5}
+    assert history.gains_since('1', 300, 400) == {}
+
+
+def test_no_snapshot_before_since(history):
+    # 第一条快照之前的起点：第一条快照本身不算作增加
+    assert history.gains_since('1', 50, 300) == history.gains_since('1', 100, 300)
+    assert history.gains_since('1', 50, 150) == {}
+    assert history.gains_since('1', 50, 80) == {}
+    assert history.gains_since('2', 50, 300) == {}
+
+
+def test_gains_across_keyframes(tmp_path):
+    history = InventoryHistory(str(tmp_path / 'inventory_history.jsonl'))
+    for i in range(KEYFRAME_INTERVAL * 2 + 1):
+        history.record('1', '账号', {5000: i + 1}, timestamp=i + 1)
+    assert history.gains_since('1', 0) == {5000: KEYFRAME_INTERVAL * 2}
+
+    reloaded = InventoryHistory(history.path)
+    assert reloaded.gains_since('1', KEYFRAME_INTERVAL) == {5000: KEYFRAME_INTERVAL + 1}
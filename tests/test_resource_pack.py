@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+
+import pytest
+
+import utils
+from version import __version__
+from resource_pack import PACK_FILE, ResourcePack, build_pack
+
+
+def make_pack(directory, version, content=b'ID,name\n1,a\n'):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / 'giftID.csv').write_bytes(content)
+    (directory / 'pic').mkdir(exist_ok=True)
+    (directory / 'pic' / '1.png').write_bytes(b'png')
+    path = directory / PACK_FILE
+    build_pack(str(path), str(directory), ['giftID.csv', 'pic/1.png'], version)
+    return path
+
+
+@pytest.fixture
+def fresh_pack_lookup(monkeypatch):
+    """get_resource_pack 只查找一次，每个测试重新查找"""
+    monkeypatch.setattr(utils, '_resource_pack', None)
+    monkeypatch.setattr(utils, '_resource_pack_checked', False)
+    monkeypatch.delenv(utils.RESOURCE_PACK_ENV_VAR, raising=False)
+    yield
+    if utils._resource_pack is not None:
+        utils._resource_pack.close()
+
+
+def test_round_trip(tmp_path):
+    pack = ResourcePack(str(make_pack(tmp_path, '1.2.3')))
+    try:
+        assert pack.version == '1.2.3'
+        assert sorted(pack.names()) == ['giftID.csv', 'pic/1.png']
+        assert bytes(pack.get('./giftID.csv')) == b'ID,name\n1,a\n'
+        assert bytes(pack.get('pic\\1.png')) == b'png'
+        assert pack.get('missing.csv') is None
+    finally:
+        pack.close()
+
+
+def test_rejects_other_format(tmp_path):
+    path = tmp_path / PACK_FILE
+    path.write_bytes(b'SHGRPAK1' + bytes(8))
+    with pytest.raises(ValueError):
+        ResourcePack(str(path))
+
+
+def test_pack_from_environment(tmp_path, monkeypatch, fresh_pack_lookup):
+    monkeypatch.setenv(utils.RESOURCE_PACK_ENV_VAR, str(make_pack(tmp_path, __version__)))
+    assert utils.get_resource_pack().version == __version__
+
+
+def test_mismatched_pack_is_ignored(tmp_path, monkeypatch, fresh_pack_lookup):
+    monkeypatch.setenv(utils.RESOURCE_PACK_ENV_VAR, str(make_pack(tmp_path, 'v0.0.1')))
+    assert utils.get_resource_pack() is None
+
+
+def test_stale_pack_next_to_exe_falls_back_to_bundled(tmp_path, monkeypatch, fresh_pack_lookup):
+    # 升级后exe旁遗留旧版本的资源包，应使用随exe解压的资源包
+    make_pack(tmp_path / 'install', 'v0.0.1', content=b'old')
+    make_pack(tmp_path / 'onefile', __version__, content=b'new')
+    monkeypatch.setattr(sys, 'frozen', True, raising=False)
+    monkeypatch.setattr(sys, 'executable', str(tmp_path / 'install' / 'ShigureAI.exe'))
+    monkeypatch.setenv('NUITKA_ONEFILE_TEMP', str(tmp_path / 'onefile'))
+    pack = utils.get_resource_pack()
+    assert pack.version == __version__
+    assert bytes(pack.get('giftID.csv')) == b'new'
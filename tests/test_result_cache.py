@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import favor_core
+from favor_core import GiftCatalog
+from result_cache import ResultCache, config_fingerprint
+
+LEVEL_EXP = {1: 0, 2: 30, 3: 70, 4: 150}
+LEVEL_LIST = sorted(LEVEL_EXP.items())
+
+
+def cached_calculate(cache, catalog, name, config, quantities, is_linked=False):
+    """与主界面 _cached_calculate 相同的流程：先查缓存，未命中再计算"""
+    key = cache.make_key(name, config, is_linked, quantities, 1, 0)
+    result = cache.get(key)
+    if result is None:
+        result = favor_core.calculate_favor(LEVEL_EXP, LEVEL_LIST, catalog, quantities,
+                                            1, 0, config, is_linked)
+        cache.put(key, result)
+    return result
+
+
+def make_config(catalog, level40=()):
+    return favor_core.normalize_config({'level40_gifts': list(level40)}, catalog)
+
+
+def test_edited_config_is_recalculated_after_invalidate():
+    catalog = GiftCatalog([(100008, 60), (5000, 20), (5001, 120)])
+    cache = ResultCache()
+    config = make_config(catalog)
+    quantities = {5000: 2, 5001: 0}
+
+    assert cached_calculate(cache, catalog, 'A', config, quantities)['gained_exp'] == 40
+
+    # 编辑特殊喜好：指纹按配置名记忆，未失效前仍会命中旧结果
+    config['level40_gifts'] = catalog.mask_of([5000])
+    assert cached_calculate(cache, catalog, 'A', config, quantities)['gained_exp'] == 40
+
+    cache.invalidate_config('A')
+    result = cached_calculate(cache, catalog, 'A', config, quantities)
+    assert result['gained_exp'] == 80
+    assert result['target_level'] == 3
+    assert cache.config_key('A', config, False) == config_fingerprint(config, False)
+
+
+def test_invalidate_keeps_other_configs():
+    catalog = GiftCatalog([(100008, 60), (5000, 20), (5001, 120)])
+    cache = ResultCache()
+    config_a = make_config(catalog)
+    config_b = make_config(catalog, [5000])
+    quantities = {5000: 1}
+
+    cached_calculate(cache, catalog, 'A', config_a, quantities)
+    cached_calculate(cache, catalog, 'A', config_a, quantities, is_linked=True)
+    result_b = cached_calculate(cache, catalog, 'B', config_b, quantities)
+
+    cache.invalidate_config('A')
+    assert len(cache.results) == 1
+    hits = cache.results.hits
+    assert cached_calculate(cache, catalog, 'B', config_b, quantities) is result_b
+    assert cache.results.hits == hits + 1
+
+    # 未记忆过的配置名失效时不影响已有结果
+    cache.invalidate_config('C')
+    assert len(cache.results) == 1
+
+
+def test_linked_state_has_separate_key():
+    catalog = GiftCatalog([(100008, 60), (5000, 20)])
+    cache = ResultCache()
+    config = make_config(catalog)
+    quantities = {100008: 1}
+
+    assert cached_calculate(cache, catalog, 'A', config, quantities)['gained_exp'] == 60
+    assert cached_calculate(cache, catalog, 'A', config, quantities, is_linked=True)['gained_exp'] == 20
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+
+import pytest
+
+import favor_core
+from data_models import load_csv_resource
+from sync_client import (SyncClient, SyncError, collect_items, apply_config_items,
+                         SYNC_KEEP_REMOTE, SYNC_KEEP_LOCAL, SYNC_RENAME)
+from sync_protocol import config_key, inventory_key
+from sync_server import create_server
+
+CONFIG_A = config_key('甲')
+INVENTORY = inventory_key('1')
+
+
+@pytest.fixture
+def server():
+    server = create_server(port=0, data_file='')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def connect(server, tmp_path):
+    """connect(机器名, 策略) -> 使用该机器自己的 sync_state.json 的客户端"""
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def connect(machine, strategy=SYNC_KEEP_REMOTE, token=None):
+        return SyncClient(url, str(tmp_path / machine / 'sync_state.json'), token=token, strategy=strategy)
+    return connect
+
+
+def config_data(level):
+    return {'start_level': level, 'level40_gifts': [5000], 'gift_quantities': {'5000': 3}}
+
+
+@pytest.fixture
+def synced(connect):
+    """两台机器都已同步过同一个配置与库存，返回 (A的条目, B的条目)"""
+    items = {CONFIG_A: config_data(1), INVENTORY: {'name': '账号', 'quantities': {'5000': 10}}}
+    assert sorted(connect('a').sync(items)['pushed']) == sorted(items)
+    pulled = connect('b').sync({})['pulled']
+    assert pulled == items
+    return dict(items), dict(pulled)
+
+
+def test_resync_without_changes_is_noop(connect, synced, server):
+    items_a, items_b = synced
+    revision = server.store.revision
+    for machine, items in (('a', items_a), ('b', items_b)):
+        client = connect(machine)
+        assert client.pending_changes(items) == []
+        summary = client.sync(items)
+        assert summary['pushed'] == [] and summary['pulled'] == {} and summary['conflicts'] == []
+        assert summary['revision'] == revision
+    assert server.store.revision == revision
+
+
+def test_only_other_machines_changes_are_pulled(connect, synced):
+    items_a, items_b = synced
+    items_a[CONFIG_A] = config_data(5)
+    assert connect('a').sync(items_a)['pushed'] == [CONFIG_A]
+    summary = connect('b').sync(items_b)
+    assert summary['pushed'] == []
+    assert summary['pulled'] == {CONFIG_A: config_data(5)}
+
+
+def test_conflict_keep_remote(connect, synced):
+    items_a, items_b = synced
+    items_a[CONFIG_A] = config_data(5)
+    connect('a').sync(items_a)
+    items_b[CONFIG_A] = config_data(7)
+    summary = connect('b', SYNC_KEEP_REMOTE).sync(items_b)
+    assert summary['conflicts'] == [CONFIG_A]
+    assert summary['pushed'] == []
+    assert summary['pulled'] == {CONFIG_A: config_data(5)}
+
+    # 写回服务器版本后两边一致
+    items_b.update(summary['pulled'])
+    assert connect('b').pending_changes(items_b) == []
+    assert connect('a').sync(items_a)['pulled'] == {}
+
+
+def test_conflict_keep_local(connect, synced):
+    items_a, items_b = synced
+    items_a[CONFIG_A] = config_data(5)
+    connect('a').sync(items_a)
+    items_b[CONFIG_A] = config_data(7)
+    summary = connect('b', SYNC_KEEP_LOCAL).sync(items_b)
+    assert summary['conflicts'] == [CONFIG_A]
+    assert summary['pushed'] == [CONFIG_A]
+    assert CONFIG_A not in summary['pulled']
+    assert connect('a').sync(items_a)['pulled'] == {CONFIG_A: config_data(7)}
+
+
+def test_conflict_rename(connect, synced):
+    items_a, items_b = synced
+    items_a[CONFIG_A] = config_data(5)
+    connect('a').sync(items_a)
+    items_b[CONFIG_A] = config_data(7)
+    summary = connect('b', SYNC_RENAME).sync(items_b)
+    renamed = config_key('甲 (2)')
+    assert summary['renamed'] == [(CONFIG_A, renamed)]
+    assert summary['pulled'] == {CONFIG_A: config_data(5), renamed: config_data(7)}
+    assert connect('a').sync(items_a)['pulled'] == {renamed: config_data(7)}
+
+
+def test_deletion_leaves_tombstone(connect, synced, server):
+    items_a, items_b = synced
+    del items_a[CONFIG_A]
+    del items_a[INVENTORY]  # 库存不随本机缺少而删除
+    assert connect('a').sync(items_a)['pushed'] == [CONFIG_A]
+    assert server.store.items[CONFIG_A]['data'] is None
+    assert server.store.items[INVENTORY]['data'] is not None
+
+    summary = connect('b').sync(items_b)
+    assert summary['pulled'] == {CONFIG_A: None}
+    configs = {'甲': {}, '乙': {}}
+    assert apply_config_items(configs, summary['pulled'], catalog=None) == ([], ['甲'])
+    assert list(configs) == ['乙']
+
+    # 新机器不会收到已删除的配置的内容
+    assert connect('c').sync({})['pulled'] == {CONFIG_A: None, INVENTORY: items_b[INVENTORY]}
+
+
+def test_config_round_trip(connect):
+    catalog = favor_core.build_gift_table(load_csv_resource('giftID.csv'))
+    config = favor_core.normalize_config(config_data(3), catalog)
+    config['gift_quantities'] = {5000: 3}
+    profile = {'id': '1', 'name': '账号', 'quantities': {5000: 10, 100008: 0}}
+    connect('a').sync(collect_items({'甲': config}, catalog, [profile]))
+
+    configs = {}
+    updated, removed = apply_config_items(configs, connect('b').sync({})['pulled'], catalog)
+    assert (updated, removed) == (['甲'], [])
+    assert configs['甲']['level40_gifts'] == config['level40_gifts']
+    assert configs['甲']['start_level'] == 3
+
+
+def test_token_required(server, connect):
+    server.token = 'secret'
+    with pytest.raises(SyncError):
+        connect('a').sync({CONFIG_A: config_data(1)})
+    assert connect('a', token='secret').sync({CONFIG_A: config_data(1)})['pushed'] == [CONFIG_A]
+
+
+def test_stale_base_against_fresh_store(connect, synced, server):
+    # 服务器数据丢失后重新启动，客户端仍记录着旧版本
+    items_a, _ = synced
+    server.store.items = {}
+    server.store.revision = 0
+    items_a[CONFIG_A] = config_data(5)
+    summary = connect('a').sync(items_a)
+    assert summary['pushed'] == [CONFIG_A]
+    assert summary['conflicts'] == []
+    assert server.store.items[CONFIG_A]['data'] == config_data(5)
+    assert connect('a').sync(items_a)['pushed'] == []
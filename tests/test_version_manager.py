@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import functools
+import hashlib
+import json
+import sys
+import threading
+from types import SimpleNamespace
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from version import __version__
+import metrics
+from binary_delta import make_delta
+from version_manager import VersionManager, UPDATE_URL_ENV_VAR, compare_versions, delta_filename
+
+NEW_VERSION = 'v99.0.0'
+OLD_EXE = b'old build ' * 5000
+NEW_EXE = OLD_EXE[:20000] + b'new code ' * 300 + OLD_EXE[20000:]
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def release_dir(tmp_path, monkeypatch):
+    """本地发布目录：{地址}/{版本}/{文件名}，通过 SHIGUREAI_UPDATE_URL 指向它"""
+    root = tmp_path / 'releases'
+    (root / NEW_VERSION).mkdir(parents=True)
+    handler = functools.partial(QuietHandler, directory=str(root))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv(UPDATE_URL_ENV_VAR, f"http://127.0.0.1:{server.server_address[1]}")
+    yield root / NEW_VERSION
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def manager(qapp):
+    from PyQt5.QtWidgets import QLabel
+    manager = VersionManager(None)
+    manager.update_status_label = QLabel()
+    return manager
+
+
+def release_data(content):
+    digest = hashlib.sha256(content).hexdigest()
+    return {'tag_name': NEW_VERSION,
+            'assets': [{'name': f"ShigureAI_{NEW_VERSION}.exe", 'digest': f"sha256:{digest}"}]}
+
+
+@pytest.fixture
+def installed(tmp_path):
+    path = tmp_path / 'ShigureAI.exe'
+    path.write_bytes(OLD_EXE)
+    return str(path)
+
+
+def test_compare_versions():
+    assert compare_versions('v1.10.0', '1.9.3') == 1
+    assert compare_versions('1.2', 'v1.2') == 0
+    assert compare_versions(__version__, NEW_VERSION) == -1
+
+
+def test_delta_update(release_dir, manager, installed, tmp_path):
+    (release_dir / delta_filename(__version__, NEW_VERSION)).write_bytes(make_delta(OLD_EXE, NEW_EXE))
+    dest = tmp_path / 'new.exe'
+    assert manager.download_update(release_data(NEW_EXE), NEW_VERSION, str(dest), source_path=installed)
+    assert dest.read_bytes() == NEW_EXE
+    assert manager.update_status_label.text() == "增量更新完成！"
+    assert not (tmp_path / 'new.exe.delta').exists()
+
+
+def test_missing_delta_falls_back_to_full(release_dir, manager, installed, tmp_path):
+    (release_dir / f"ShigureAI_{NEW_VERSION}.exe").write_bytes(NEW_EXE)
+    dest = tmp_path / 'new.exe'
+    assert manager.download_update(release_data(NEW_EXE), NEW_VERSION, str(dest), source_path=installed)
+    assert dest.read_bytes() == NEW_EXE
+    assert manager.update_status_label.text() == "下载完成！"
+
+
+def test_unusable_delta_falls_back_to_full(release_dir, manager, tmp_path):
+    # 补丁基于另一个版本，应用失败后下载完整文件
+    (release_dir / delta_filename(__version__, NEW_VERSION)).write_bytes(make_delta(b'other build' * 100, NEW_EXE))
+    (release_dir / f"ShigureAI_{NEW_VERSION}.exe").write_bytes(NEW_EXE)
+    installed = tmp_path / 'ShigureAI.exe'
+    installed.write_bytes(OLD_EXE)
+    dest = tmp_path / 'new.exe'
+    assert manager.download_update(release_data(NEW_EXE), NEW_VERSION, str(dest), source_path=str(installed))
+    assert dest.read_bytes() == NEW_EXE
+    assert not (tmp_path / 'new.exe.delta').exists()
+
+
+def test_full_download_hash_mismatch(release_dir, manager, installed, tmp_path):
+    (release_dir / f"ShigureAI_{NEW_VERSION}.exe").write_bytes(b'tampered' + NEW_EXE)
+    dest = tmp_path / 'new.exe'
+    assert not manager.download_update(release_data(NEW_EXE), NEW_VERSION, str(dest), source_path=installed)
+    assert not dest.exists()
+    assert manager.update_status_label.text() == "所有下载源均不可用"
+
+
+def test_delta_result_hash_mismatch(release_dir, manager, installed, tmp_path):
+    # 补丁本身有效，但结果与发布信息中的哈希不一致：不能使用，也没有完整文件时下载失败
+    (release_dir / delta_filename(__version__, NEW_VERSION)).write_bytes(make_delta(OLD_EXE, NEW_EXE))
+    dest = tmp_path / 'new.exe'
+    assert not manager.download_update(release_data(b'different release'), NEW_VERSION, str(dest),
+                                       source_path=installed)
+    assert not dest.exists()
+
+
+def test_check_without_requests(manager, monkeypatch):
+    from PyQt5.QtWidgets import QMessageBox
+    monkeypatch.setitem(sys.modules, 'requests', None)  # import requests 抛出 ImportError
+    warnings = []
+    monkeypatch.setattr(QMessageBox, 'warning', lambda *args: warnings.append(args[1:]))
+    manager.check_for_updates(None)
+    assert manager.update_status_label.text() == "缺少requests库"
+    assert warnings[0][0] == "依赖缺失"
+
+
+def test_check_times_only_the_release_lookup(release_dir, manager, monkeypatch):
+    from PyQt5.QtWidgets import QMessageBox
+    (release_dir.parent / 'latest').write_text(json.dumps(release_data(NEW_EXE)), encoding='utf-8')
+    manager.parent = SimpleNamespace(update_prefetcher=SimpleNamespace(staged=lambda: None))
+    monkeypatch.setattr(QMessageBox, 'question', lambda *args: QMessageBox.No)
+    checks = metrics.registry.histogram('update_check').count
+    downloads = metrics.registry.histogram('update_download').count
+    manager.check_for_updates(None)
+    assert manager.update_status_label.text() == f"发现新版本: {NEW_VERSION}"
+    assert metrics.registry.histogram('update_check').count == checks + 1
+    assert metrics.registry.histogram('update_download').count == downloads
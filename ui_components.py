@@ -1,14 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os
+import logging
 from PyQt5.QtWidgets import (QFrame, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, 
                              QGridLayout, QScrollArea, QGroupBox, QTextEdit, QComboBox, QSpinBox, 
                              QCheckBox, QMenuBar, QMenu, QAction, QDialog, QWidget)
 from PyQt5.QtGui import QPixmap, QIcon, QFont
 from PyQt5.QtCore import Qt
-from utils import resource_path, get_gift_icon
+from utils import get_gift_icon, get_gift_pixmap, load_resource_pixmap
 from data_models import notna
+from favor_core import GIFT_SET_KEYS
+import app_logging
+
+logger = app_logging.get_logger(__name__)
+
+GIFT_COLUMNS = 5
+GIFT_BATCH_SIZE = 10  # 启动时每轮事件循环创建的礼物格子数
+
+# (分组标题, 决定分组是否显示的键, [(档位键, 档位文字)])
+SPECIAL_GIFT_GROUPS = (
+    ("金礼物", ('level20_gifts', 'level40_gifts', 'level60_gifts'),
+     (('level40_gifts', "40经验礼物:"), ('level60_gifts', "60经验礼物:"))),
+    ("紫礼物", ('level120_gifts', 'level180_gifts', 'level240_gifts'),
+     (('level180_gifts', "180经验礼物:"), ('level240_gifts', "240经验礼物:"))),
+)
 
 class UIComponents:
     def __init__(self, parent):
@@ -25,9 +40,26 @@ class UIComponents:
         version_action.triggered.connect(self.parent.show_version)
         menubar.addAction(version_action)
 
-        help_action = QAction('帮助', self.parent)
+        history_action = QAction('库存历史', self.parent)
+        history_action.triggered.connect(self.parent.show_inventory_history)
+        menubar.addAction(history_action)
+
+        projection_action = QAction('好感预测', self.parent)
+        projection_action.triggered.connect(self.parent.show_projection)
+        menubar.addAction(projection_action)
+
+        sync_action = QAction('同步', self.parent)
+        sync_action.triggered.connect(self.parent.show_sync)
+        menubar.addAction(sync_action)
+
+        help_menu = menubar.addMenu('帮助')
+        help_action = QAction('使用说明', self.parent)
         help_action.triggered.connect(self.parent.show_help)
-        menubar.addAction(help_action)
+        help_menu.addAction(help_action)
+
+        log_action = QAction('查看日志', self.parent)
+        log_action.triggered.connect(self.parent.show_log_viewer)
+        help_menu.addAction(log_action)
 
     def create_left_panel(self):
         """创建左侧配置面板"""
@@ -136,6 +168,17 @@ class UIComponents:
         import_file_btn.clicked.connect(self.parent.import_from_file)
         import_layout.addWidget(import_file_btn)
 
+        # 导入多个账号时用于切换
+        self.parent.profile_row = QWidget()
+        profile_layout = QHBoxLayout(self.parent.profile_row)
+        profile_layout.setContentsMargins(0, 0, 0, 0)
+        profile_layout.addWidget(QLabel("账号:"))
+        self.parent.profile_combo = QComboBox()
+        self.parent.profile_combo.currentIndexChanged.connect(self.parent.switch_profile)
+        profile_layout.addWidget(self.parent.profile_combo, 1)
+        self.parent.profile_row.setVisible(False)
+        import_layout.addWidget(self.parent.profile_row)
+
         button_layout.addWidget(import_group)
         layout.addWidget(button_group)
 
@@ -150,6 +193,20 @@ class UIComponents:
 
         return panel
 
+    def update_profile_combo(self):
+        """更新账号下拉框，只有一个账号时隐藏"""
+        store = self.parent.inventory_store
+        combo = self.parent.profile_combo
+        combo.blockSignals(True)
+        combo.clear()
+        for profile in store:
+            combo.addItem(profile['name'], profile['id'])
+        index = combo.findData(store.active_id)
+        if index >= 0:
+            combo.setCurrentIndex(index)
+        combo.blockSignals(False)
+        self.parent.profile_row.setVisible(len(store) > 1)
+
     def create_right_panel(self):
         """创建右侧礼物面板"""
         panel = QFrame()
@@ -160,14 +217,14 @@ class UIComponents:
         scroll_area.setWidgetResizable(True)
         scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.parent.gifts_scroll_area = scroll_area
 
         # 礼物网格
         gifts_widget = QWidget()
         self.parent.gifts_layout = QGridLayout(gifts_widget)
         self.parent.gifts_layout.setSpacing(10)
 
-        # 加载礼物
-        self.parent.load_gifts()
+        # 礼物格子在窗口显示后由启动阶段分批创建
 
         scroll_area.setWidget(gifts_widget)
 
@@ -183,10 +240,9 @@ class UIComponents:
 
     def create_gift_image_label(self, gift_id):
         """创建礼物图片标签"""
-        image_path = resource_path(os.path.join("pic", f"{gift_id}.jpg"))
         label = QLabel()
-        if os.path.exists(image_path):
-            pixmap = QPixmap(image_path).scaled(24, 24, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        pixmap = get_gift_pixmap(gift_id, 24)
+        if not pixmap.isNull():
             label.setPixmap(pixmap)
         else:
             label.setText(str(gift_id))
@@ -196,6 +252,11 @@ class UIComponents:
 
     def load_gifts(self):
         """加载礼物显示"""
+        for _ in self.iter_load_gifts():
+            pass
+
+    def iter_load_gifts(self, batch_size=GIFT_BATCH_SIZE):
+        """分批创建礼物格子，每创建 batch_size 个让出一次，启动时分多轮事件循环完成"""
         if self.parent.gifts_data is None:
             return
 
@@ -206,17 +267,15 @@ class UIComponents:
                 item.widget().deleteLater()
 
         self.parent.gift_inputs = {}
-        row = 0
-        col = 0
+        # 每个礼物的调试日志需要额外查询文件，在循环外判断一次是否开启
+        self.debug_gift_images = logger.isEnabledFor(logging.DEBUG)
 
-        for idx, gift in self.parent.gifts_data.iterrows():
+        for index, (idx, gift) in enumerate(self.parent.gifts_data.iterrows()):
             gift_frame = self.create_gift_item(gift)
+            row, col = divmod(index, GIFT_COLUMNS)
             self.parent.gifts_layout.addWidget(gift_frame, row, col)
-
-            col += 1
-            if col >= 5:
-                col = 0
-                row += 1
+            if (index + 1) % batch_size == 0:
+                yield
 
     def create_gift_item(self, gift):
         """创建单个礼物项"""
@@ -228,11 +287,10 @@ class UIComponents:
 
         try:
             gift_id = int(gift['ID']) if notna(gift['ID']) else 0
-            image_path = resource_path(os.path.join("pic", f"{gift_id}.jpg"))
-            print(f"主界面加载图片: {gift_id}, 路径: {image_path}, 存在: {os.path.exists(image_path)}")
-            if os.path.exists(image_path):
-                pixmap = QPixmap(image_path)
-                print(f"主界面Pixmap创建成功: {not pixmap.isNull()}, 大小: {pixmap.size()}")
+            pixmap = load_resource_pixmap(f"pic/{gift_id}.jpg")
+            if self.debug_gift_images:
+                logger.debug("主界面加载图片: %s, 成功: %s, 大小: %s", gift_id, not pixmap.isNull(), pixmap.size())
+            if not pixmap.isNull():
                 pixmap = pixmap.scaled(120, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation)
                 image_label = QLabel()
                 image_label.setPixmap(pixmap)
@@ -244,7 +302,7 @@ class UIComponents:
                 placeholder_label.setStyleSheet("color: gray; font-size: 12px;")
                 layout.addWidget(placeholder_label)
         except (ValueError, TypeError) as e:
-            print(f"主界面加载图片错误 {gift_id}: {e}")
+            logger.warning("主界面加载图片错误 %s: %s", gift['ID'], e)
             placeholder_label = QLabel("无效ID")
             placeholder_label.setAlignment(Qt.AlignCenter)
             placeholder_label.setStyleSheet("color: gray; font-size: 12px;")
@@ -284,68 +342,55 @@ class UIComponents:
 
         return frame
 
+    def create_special_gifts_panel(self):
+        """创建特殊礼物面板的固定部分（分组与每档一行），之后只增删礼物图标"""
+        self.special_groups = []
+        self.special_rows = {}
+        for title, group_keys, rows in SPECIAL_GIFT_GROUPS:
+            group = QGroupBox(title)
+            group_layout = QVBoxLayout(group)
+            for key, text in rows:
+                row = QWidget()
+                row_layout = QHBoxLayout(row)
+                row_layout.setContentsMargins(0, 0, 0, 0)
+                row_layout.addWidget(QLabel(text))
+                row_layout.addStretch()
+                row.setVisible(False)
+                group_layout.addWidget(row)
+                self.special_rows[key] = {'widget': row, 'layout': row_layout, 'labels': {}}
+            group.setVisible(False)
+            self.parent.special_gifts_layout.addWidget(group)
+            self.special_groups.append((group, group_keys))
+        self.rendered_special_masks = None
+
     def update_special_gifts_display(self):
-        """更新特殊礼物显示"""
-        # 清除动态内容
-        for i in reversed(range(self.parent.special_gifts_layout.count())):
-            widget = self.parent.special_gifts_layout.itemAt(i).widget()
-            if widget and isinstance(widget, (QGroupBox, QLabel)):
-                widget.deleteLater()
-
-        if not self.parent.current_config or self.parent.current_config not in self.parent.student_configs:
-            return
+        """按与上次显示的差异更新特殊礼物显示"""
+        if not hasattr(self, 'special_rows'):
+            self.create_special_gifts_panel()
 
-        config = self.parent.student_configs[self.parent.current_config]
-
-        # 金礼物
-        if config['level20_gifts'] or config['level40_gifts'] or config['level60_gifts']:
-            level20_group = QGroupBox("金礼物")
-            level20_layout = QVBoxLayout(level20_group)
-
-            # 40经验礼物
-            if config['level40_gifts']:
-                level40_hbox = QHBoxLayout()
-                level40_hbox.addWidget(QLabel("40经验礼物:"))
-                for gift_id in config['level40_gifts']:
-                    level40_hbox.addWidget(self.create_gift_image_label(gift_id))
-                level40_hbox.addStretch()
-                level20_layout.addLayout(level40_hbox)
-
-            # 60经验礼物
-            if config['level60_gifts']:
-                level60_hbox = QHBoxLayout()
-                level60_hbox.addWidget(QLabel("60经验礼物:"))
-                for gift_id in config['level60_gifts']:
-                    level60_hbox.addWidget(self.create_gift_image_label(gift_id))
-                level60_hbox.addStretch()
-                level20_layout.addLayout(level60_hbox)
-
-            self.parent.special_gifts_layout.addWidget(level20_group)
-
-        # 紫礼物
-        if config['level120_gifts'] or config['level180_gifts'] or config['level240_gifts']:
-            level120_group = QGroupBox("紫礼物")
-            level120_layout = QVBoxLayout(level120_group)
-
-            # 180经验礼物
-            if config['level180_gifts']:
-                level180_hbox = QHBoxLayout()
-                level180_hbox.addWidget(QLabel("180经验礼物:"))
-                for gift_id in config['level180_gifts']:
-                    level180_hbox.addWidget(self.create_gift_image_label(gift_id))
-                level180_hbox.addStretch()
-                level120_layout.addLayout(level180_hbox)
-
-            # 240经验礼物
-            if config['level240_gifts']:
-                level240_hbox = QHBoxLayout()
-                level240_hbox.addWidget(QLabel("240经验礼物:"))
-                for gift_id in config['level240_gifts']:
-                    level240_hbox.addWidget(self.create_gift_image_label(gift_id))
-                level240_hbox.addStretch()
-                level120_layout.addLayout(level240_hbox)
-
-            self.parent.special_gifts_layout.addWidget(level120_group)
+        config = self.parent.student_configs.get(self.parent.current_config) if self.parent.current_config else None
+        masks = tuple(config.get(key, 0) for key in GIFT_SET_KEYS) if config else (0,) * len(GIFT_SET_KEYS)
+        if masks == self.rendered_special_masks:
+            return
+        self.rendered_special_masks = masks
+        masks = dict(zip(GIFT_SET_KEYS, masks))
+
+        for key, row in self.special_rows.items():
+            gift_ids = self.parent.gift_catalog.ids_of(masks[key])
+            labels = row['labels']
+            for gift_id in set(labels) - set(gift_ids):
+                label = labels.pop(gift_id)
+                row['layout'].removeWidget(label)
+                label.deleteLater()
+            # 图标按槽位顺序排列，第0个位置是档位文字
+            for position, gift_id in enumerate(gift_ids, 1):
+                if gift_id not in labels:
+                    labels[gift_id] = self.create_gift_image_label(gift_id)
+                    row['layout'].insertWidget(position, labels[gift_id])
+            row['widget'].setVisible(bool(gift_ids))
+
+        for group, group_keys in self.special_groups:
+            group.setVisible(any(masks[key] for key in group_keys))
 
     def show_help(self):
         dialog = QDialog(self.parent)
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""空闲时在后台预下载新版本（需在"版本信息"中开启）
+
+启动完成一段时间后，以及之后每隔一段时间，在没有导入任务和模态对话框时检查一次更新；
+发现新版本就在最低优先级的线程中按限速下载到 configs/updates/，优先下载增量补丁。
+下载中断时保留 .part 文件，下次从断点继续。下载并校验完成后写入 staged.json，
+之后"检查更新"发现同一版本时直接使用已下载的文件，不再等待下载。
+关闭窗口或关闭预下载时最多等待 STOP_WAIT_MS，后台线程没有及时结束时让它自行结束，不阻塞界面。
+
+设置保存在 configs/settings.json：
+    {"update_prefetch": {"enabled": false, "interval_hours": 6, "rate_limit_kib": 256}}
+"""
+
+import datetime
+import json
+import os
+import shutil
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+from version import __version__
+from utils import resource_path
+from binary_delta import DeltaError, apply_delta_file
+from version_manager import (fetch_latest_release, compare_versions, release_urls, delta_filename,
+                             release_asset_digest, installed_executable, file_sha256)
+import app_logging
+import metrics
+
+logger = app_logging.get_logger(__name__)
+
+SETTINGS_FILE = 'settings.json'
+SETTINGS_KEY = 'update_prefetch'
+STAGING_DIR = 'updates'
+STAGED_FILE = 'staged.json'
+DEFAULT_SETTINGS = {'enabled': False, 'interval_hours': 6, 'rate_limit_kib': 256}
+FIRST_CHECK_DELAY_MS = 60 * 1000
+BUSY_RETRY_MS = 60 * 1000
+CHUNK_SIZE = 16 * 1024
+FETCH_TIMEOUT = 5
+REQUEST_TIMEOUT = (5, 10)  # (连接, 读取)，取消后后台线程最多在网络请求中再停留这么久
+STOP_WAIT_MS = 1000
+
+_detached_jobs = set()  # 停止时没有及时结束的 (线程, 工作对象)，保持引用直到线程结束
+
+
+class PrefetchCancelled(Exception):
+    pass
+
+
+def settings_path():
+    return os.path.join(resource_path("configs", use_exe_dir_for_config=True), SETTINGS_FILE)
+
+
+def load_prefetch_settings(path=None):
+    try:
+        with open(path or settings_path(), 'r', encoding='utf-8') as f:
+            saved = json.load(f).get(SETTINGS_KEY, {})
+    except (OSError, ValueError, AttributeError):
+        saved = {}
+    return dict(DEFAULT_SETTINGS, **saved)
+
+
+def save_prefetch_settings(settings, path=None):
+    """只更新 update_prefetch 一项，settings.json 中的其他设置保持原样"""
+    path = path or settings_path()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    data[SETTINGS_KEY] = settings
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def read_staged(staging_dir):
+    """已下载完成、比当前版本新且文件完好的更新，没有时返回None"""
+    try:
+        with open(os.path.join(staging_dir, STAGED_FILE), 'r', encoding='utf-8') as f:
+            staged = json.load(f)
+        path = os.path.join(staging_dir, staged['file'])
+        if compare_versions(staged['version'], __version__) <= 0 or os.path.getsize(path) != staged['size']:
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return dict(staged, path=path)
+
+
+class TokenBucket:
+    """令牌桶限速：每秒补充 rate 字节，最多积累 capacity 字节"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+
+    def consume(self, amount, cancel_event=None):
+        """取走 amount 字节的令牌，不足时等待；cancel_event 被设置时抛出 PrefetchCancelled"""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= amount or self._tokens >= self.capacity:
+                self._tokens -= amount
+                return
+            wait = (min(amount, self.capacity) - self._tokens) / self.rate
+            if cancel_event is not None and cancel_event.wait(wait):
+                raise PrefetchCancelled()
+            if cancel_event is None:
+                time.sleep(wait)
+
+
+class PrefetchWorker(QObject):
+    """在后台线程检查并下载新版本"""
+    ready = pyqtSignal(dict)
+    finished = pyqtSignal(str)  # 结束说明（没有新版本、失败原因等）
+
+    def __init__(self, staging_dir, rate_limit):
+        super().__init__()
+        self.staging_dir = staging_dir
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise PrefetchCancelled()
+
+    def _download(self, urls, dest_path, expected_sha256=None):
+        """限速下载到 dest_path，支持从 .part 断点续传；所有源都失败时返回False"""
+        import requests  # 只在联网时加载，加快启动
+        part_path = dest_path + '.part'
+        for url in urls:
+            try:
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                headers = {'Range': f'bytes={offset}-'} if offset else {}
+                self._check_cancelled()
+                with requests.get(url, timeout=REQUEST_TIMEOUT, stream=True, headers=headers) as response:
+                    complete = offset and response.status_code == 416  # 上次已下载完整，只差校验
+                    if response.status_code not in (200, 206) and not complete:
+                        continue
+                    if not complete:
+                        mode = 'ab' if response.status_code == 206 else 'wb'
+                        with open(part_path, mode) as f:
+                            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                                self._check_cancelled()
+                                if self.bucket is not None:
+                                    self.bucket.consume(len(chunk), self._cancel_event)
+                                f.write(chunk)
+                if expected_sha256 and file_sha256(part_path) != expected_sha256:
+                    logger.warning("预下载的文件校验失败: %s", url)
+                    os.remove(part_path)
+                    continue
+                os.replace(part_path, dest_path)
+                return True
+            except requests.RequestException as e:
+                logger.info("预下载源不可用 %s: %s", url, e)
+        return False
+
+    def _fetch(self, release_data, version):
+        """下载新版本到暂存目录，返回文件路径"""
+        filename = f"ShigureAI_{version}.exe"
+        dest_path = os.path.join(self.staging_dir, filename)
+        expected = release_asset_digest(release_data, filename)
+        source_path = installed_executable()
+        if source_path:
+            delta_path = os.path.join(self.staging_dir, delta_filename(__version__, version))
+            try:
+                if self._download(release_urls(version, delta_filename(__version__, version)), delta_path):
+                    self._check_cancelled()
+                    apply_delta_file(source_path, delta_path, dest_path)
+                    if not expected or file_sha256(dest_path) == expected:
+                        metrics.increment('update.prefetch_delta')
+                        return dest_path
+            except (DeltaError, OSError) as e:
+                logger.warning("预下载的补丁无法应用，改为下载完整文件: %s", e)
+            finally:
+                if os.path.exists(delta_path):
+                    os.remove(delta_path)
+        self._check_cancelled()
+        if self._download(release_urls(version, filename), dest_path, expected):
+            metrics.increment('update.prefetch_full')
+            return dest_path
+        return None
+
+    def run(self):
+        try:
+            release_data = fetch_latest_release(timeout=FETCH_TIMEOUT)
+            self._check_cancelled()
+            if not release_data:
+                self.finished.emit("无法连接到更新服务器")
+                return
+            version = release_data['tag_name']
+            if compare_versions(version, __version__) <= 0:
+                self.finished.emit("当前已是最新版本")
+                return
+            staged = read_staged(self.staging_dir)
+            if staged and staged['version'] == version:
+                self.ready.emit(staged)
+                return
+            if staged and os.path.exists(staged['path']):
+                os.remove(staged['path'])  # 更早的新版本已经没有用处
+
+            os.makedirs(self.staging_dir, exist_ok=True)
+            path = self._fetch(release_data, version)
+            self._check_cancelled()
+            if path is None:
+                self.finished.emit("所有下载源均不可用")
+                return
+            staged = {'version': version, 'file': os.path.basename(path), 'size': os.path.getsize(path),
+                      'sha256': file_sha256(path),
+                      'downloaded_at': datetime.datetime.now().isoformat(timespec='seconds')}
+            with open(os.path.join(self.staging_dir, STAGED_FILE), 'w', encoding='utf-8') as f:
+                json.dump(staged, f, ensure_ascii=False, indent=2)
+            logger.info("新版本 %s 已在后台下载到 %s", version, path)
+            self.ready.emit(dict(staged, path=path))
+        except PrefetchCancelled:
+            self.finished.emit("已取消")
+        except Exception as e:
+            logger.warning("后台预下载失败: %s", e)
+            self.finished.emit(f"预下载失败: {e}")
+
+
+class UpdatePrefetcher(QObject):
+    """按设置定时在空闲时预下载更新"""
+    update_ready = pyqtSignal(dict)
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.settings = load_prefetch_settings()
+        self.staging_dir = os.path.join(resource_path("configs", use_exe_dir_for_config=True), STAGING_DIR)
+        self.last_status = None
+        self._thread = None
+        self._worker = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.check_now)
+
+    @property
+    def enabled(self):
+        return bool(self.settings.get('enabled'))
+
+    def start(self):
+        """启动完成后调用，未开启时不做任何事"""
+        if self.enabled:
+            self._timer.start(FIRST_CHECK_DELAY_MS)
+
+    def set_enabled(self, enabled):
+        self.settings['enabled'] = bool(enabled)
+        try:
+            save_prefetch_settings(self.settings)
+        except OSError as e:
+            logger.warning("保存设置失败: %s", e)
+        if enabled:
+            self._timer.start(FIRST_CHECK_DELAY_MS)
+        else:
+            self._timer.stop()
+            self.stop()
+
+    def staged(self):
+        return read_staged(self.staging_dir)
+
+    def take_staged(self, version, dest_path):
+        """把已下载的 version 移到 dest_path，没有该版本时返回False"""
+        staged = self.staged()
+        if staged is None or staged['version'] != version:
+            return False
+        shutil.move(staged['path'], dest_path)
+        os.remove(os.path.join(self.staging_dir, STAGED_FILE))
+        return True
+
+    def _is_busy(self):
+        return (QApplication.activeModalWidget() is not None or self.parent.import_manager.is_importing()
+                or not self.parent.startup_complete)
+
+    def check_now(self):
+        if self._thread is not None:
+            return
+        if self._is_busy():
+            self._timer.start(BUSY_RETRY_MS)  # 不与正在进行的操作争抢
+            return
+
+        rate_limit = int(float(self.settings.get('rate_limit_kib') or 0) * 1024)
+        self._thread = QThread(self)
+        self._worker = PrefetchWorker(self.staging_dir, rate_limit)
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.run)
+        self._worker.ready.connect(self._on_ready)
+        self._worker.finished.connect(self._on_finished)
+        self._thread.start(QThread.LowestPriority)
+
+    def _finish_job(self):
+        self._thread.quit()
+        self._thread.wait()
+        self._thread.deleteLater()
+        self._worker.deleteLater()
+        self._thread = None
+        self._worker = None
+        if self.enabled:
+            hours = float(self.settings.get('interval_hours') or DEFAULT_SETTINGS['interval_hours'])
+            self._timer.start(int(hours * 3600 * 1000))
+
+    def _on_ready(self, staged):
+        self._finish_job()
+        self.last_status = f"新版本 {staged['version']} 已下载完成"
+        self.parent.statusBar().showMessage(f"{self.last_status}，可在\"版本信息\"中检查更新后直接使用", 15000)
+        self.update_ready.emit(staged)
+
+    def _on_finished(self, message):
+        self._finish_job()
+        self.last_status = message
+        logger.info("后台检查更新: %s", message)
+
+    def stop(self, wait_ms=STOP_WAIT_MS):
+        """取消正在进行的下载，已下载的部分保留到下次继续
+
+        最多等待 wait_ms；线程仍在网络请求或校验中时不再等待，由它在结束后自行释放。
+        """
+        if self._thread is None:
+            return
+        thread, worker = self._thread, self._worker
+        self._thread = None
+        self._worker = None
+        worker.ready.disconnect()
+        worker.finished.disconnect()
+        worker.cancel()
+        thread.quit()
+        if thread.wait(wait_ms):
+            thread.deleteLater()
+            worker.deleteLater()
+            return
+        logger.info("后台下载未在 %d 毫秒内结束，不再等待", wait_ms)
+        thread.setParent(None)  # 窗口销毁时不能连带销毁仍在运行的线程
+        _detached_jobs.add((thread, worker))
+        thread.finished.connect(self._release_detached)
+
+    def _release_detached(self):
+        for job in list(_detached_jobs):
+            if job[0].isFinished():
+                _detached_jobs.discard(job)
@@ -6,6 +6,9 @@ import os
 from PyQt5.QtGui import QPixmap, QIcon
 from PyQt5.QtCore import Qt
 
+from version import __version__
+from resource_pack import PACK_FILE, ResourcePack
+
 def resource_path(relative_path, use_exe_dir_for_config=False):
     """返回资源路径，适配脚本与打包环境"""
     # 配置类文件使用可执行文件目录
@@ -24,17 +27,94 @@ def resource_path(relative_path, use_exe_dir_for_config=False):
     # 脚本运行
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), relative_path)
 
-def get_gift_icon(gift_id):
+RESOURCE_PACK_ENV_VAR = 'SHIGUREAI_RESOURCE_PACK'
+_resource_pack = None
+_resource_pack_checked = False
+
+def get_resource_pack():
+    """返回资源包，没有资源包时返回None
+
+    只有打包运行时使用资源包（exe 旁的优先，发布时放在exe旁即可免去单文件模式的解压）；
+    直接运行脚本时读取单独的文件，避免修改CSV后仍读到旧的资源包，
+    可用环境变量 SHIGUREAI_RESOURCE_PACK 指定资源包路径进行测试。
+    记录的版本与程序版本不一致的资源包（例如升级后exe旁遗留的旧资源包）被跳过，改用下一个。
+    """
+    global _resource_pack, _resource_pack_checked
+    if not _resource_pack_checked:
+        _resource_pack_checked = True
+        candidates = []
+        if os.environ.get(RESOURCE_PACK_ENV_VAR):
+            candidates.append(os.environ[RESOURCE_PACK_ENV_VAR])
+        if getattr(sys, "frozen", False):
+            candidates.append(os.path.join(os.path.dirname(sys.executable), PACK_FILE))
+            candidates.append(resource_path(PACK_FILE))
+        for path in candidates:
+            if os.path.exists(path):
+                try:
+                    pack = ResourcePack(path)
+                except (OSError, ValueError):
+                    continue
+                if pack.version == __version__:
+                    _resource_pack = pack
+                    break
+                pack.close()
+    return _resource_pack
+
+def resource_data(relative_path):
+    """返回资源内容：资源包中的文件为零复制的 memoryview，否则读取单独的文件；不存在时返回None"""
+    pack = get_resource_pack()
+    if pack is not None:
+        data = pack.get(relative_path)
+        if data is not None:
+            return data
     try:
-        image_path = resource_path(os.path.join("pic", f"{int(gift_id)}.jpg"))
-        
-        if os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-            pixmap = pixmap.scaled(32, 32, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            return QIcon(pixmap)
-        else:
+        with open(resource_path(relative_path), 'rb') as f:
+            return memoryview(f.read())
+    except OSError:
+        return None
+
+def load_resource_icon(relative_path):
+    pixmap = QPixmap()
+    data = resource_data(relative_path)
+    if data is not None:
+        pixmap.loadFromData(data)
+    return QIcon(pixmap)
+
+def load_resource_pixmap(relative_path):
+    """读取图片资源，不存在或无法解码时返回空QPixmap"""
+    pixmap = QPixmap()
+    data = resource_data(relative_path)
+    if data is not None:
+        pixmap.loadFromData(data)
+    return pixmap
+
+# (礼物ID, 边长) -> 缩放后的图片，图片不存在时为空QPixmap
+_pixmap_cache = {}
+_icon_cache = {}
+
+def get_gift_pixmap(gift_id, size):
+    """读取并缩放礼物图片，结果按 (礼物ID, 边长) 缓存"""
+    key = (gift_id, size)
+    pixmap = _pixmap_cache.get(key)
+    if pixmap is None:
+        pixmap = QPixmap()
+        try:
+            source = load_resource_pixmap(f"pic/{int(gift_id)}.jpg")
+            if not source.isNull():
+                pixmap = source.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        except (ValueError, TypeError):
             pass
-    except (ValueError, TypeError, OSError) as e:
-        pass
-    return QIcon()
+        _pixmap_cache[key] = pixmap
+    return pixmap
+
+def gift_pixmap_cache_size():
+    """返回缓存的礼物图片数量与像素占用（字节）"""
+    total = sum(p.width() * p.height() * p.depth() // 8 for p in _pixmap_cache.values() if not p.isNull())
+    return len(_pixmap_cache), total
 
+def get_gift_icon(gift_id):
+    icon = _icon_cache.get(gift_id)
+    if icon is None:
+        pixmap = get_gift_pixmap(gift_id, 32)
+        icon = _icon_cache[gift_id] = QIcon(pixmap) if not pixmap.isNull() else QIcon()
+    return icon
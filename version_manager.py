@@ -1,12 +1,92 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import requests
+import hashlib
+import os
+import sys
 import webbrowser
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTextEdit, QPushButton, QMessageBox, QApplication
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTextEdit, QPushButton, QMessageBox, QApplication,
+                             QCheckBox)
 from PyQt5.QtCore import Qt
 
 from version import __version__
+from binary_delta import DeltaError, apply_delta_file
+import app_logging
+import metrics
+
+logger = app_logging.get_logger(__name__)
+
+RELEASE_DOWNLOAD_URL = "https://github.com/Arantir1028/ShigureAI/releases/download/{version}/{filename}"
+RELEASE_API_URL = "https://api.github.com/repos/Arantir1028/ShigureAI/releases/latest"
+RELEASE_MIRRORS = ("", "https://ghfast.top/", "https://mirror.ghproxy.com/")
+# 测试用：指向本地的发布目录，{地址}/latest 为发布信息，{地址}/{版本}/{文件名} 为发布文件
+UPDATE_URL_ENV_VAR = 'SHIGUREAI_UPDATE_URL'
+
+def release_urls(version, filename):
+    """发布文件的多源下载链接"""
+    if os.environ.get(UPDATE_URL_ENV_VAR):
+        return [f"{os.environ[UPDATE_URL_ENV_VAR].rstrip('/')}/{version}/{filename}"]
+    url = RELEASE_DOWNLOAD_URL.format(version=version, filename=filename)
+    return [mirror + url for mirror in RELEASE_MIRRORS]
+
+def api_urls():
+    if os.environ.get(UPDATE_URL_ENV_VAR):
+        return [f"{os.environ[UPDATE_URL_ENV_VAR].rstrip('/')}/latest"]
+    return [mirror + RELEASE_API_URL for mirror in RELEASE_MIRRORS]
+
+def fetch_latest_release(timeout=10):
+    """依次尝试各个源获取最新发布信息，全部失败时返回None"""
+    import requests  # 只在联网时加载，加快启动
+    for api_url in api_urls():
+        try:
+            response = requests.get(api_url, timeout=timeout)
+            if response.status_code == 200:
+                return response.json()
+        except (requests.RequestException, ValueError):
+            continue
+    return None
+
+def compare_versions(version1, version2):
+    """比较版本号 (返回1: v1>v2, 0: v1=v2, -1: v1<v2)"""
+    def version_to_tuple(v):
+        return tuple(map(int, v.lstrip('v').split('.')))
+
+    v1_tuple = version_to_tuple(version1)
+    v2_tuple = version_to_tuple(version2)
+
+    if v1_tuple > v2_tuple:
+        return 1
+    elif v1_tuple < v2_tuple:
+        return -1
+    else:
+        return 0
+
+def delta_filename(from_version, to_version):
+    """从 from_version 升级到 to_version 的补丁文件名"""
+    return f"ShigureAI_{from_version}_to_{to_version}.delta"
+
+def installed_executable():
+    """打包运行时返回当前exe的路径，直接运行脚本时没有可打补丁的文件，返回None"""
+    if getattr(sys, "frozen", False):
+        path = os.path.abspath(sys.argv[0])
+        if os.path.isfile(path):
+            return path
+    return None
+
+def release_asset_digest(release_data, filename):
+    """发布信息中文件的SHA-256（GitHub 的 digest 字段，形如 sha256:...），没有时返回None"""
+    for asset in (release_data or {}).get('assets', []):
+        digest = asset.get('digest') or ''
+        if asset.get('name') == filename and digest.startswith('sha256:'):
+            return digest[len('sha256:'):].lower()
+    return None
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 class VersionManager:
     def __init__(self, parent):
@@ -64,6 +144,18 @@ class VersionManager:
 
         layout.addLayout(update_layout)
 
+        prefetcher = self.parent.update_prefetcher
+        prefetch_checkbox = QCheckBox("空闲时在后台下载新版本（限速）")
+        prefetch_checkbox.setChecked(prefetcher.enabled)
+        prefetch_checkbox.toggled.connect(prefetcher.set_enabled)
+        layout.addWidget(prefetch_checkbox)
+        staged = prefetcher.staged()
+        if staged:
+            self.update_status_label.setText(f"新版本 {staged['version']} 已下载，点击检查更新即可使用")
+            self.update_status_label.setStyleSheet("color: green;")
+        elif prefetcher.last_status:
+            self.update_status_label.setText(f"后台检查: {prefetcher.last_status}")
+
         button_layout = QHBoxLayout()
 
         close_button = QPushButton("关闭")
@@ -76,15 +168,42 @@ class VersionManager:
 
     def get_download_urls(self, version):
         """获取多源下载链接"""
-        base_filename = f"ShigureAI_{version}.exe"
-        return [
-            f"https://github.com/Arantir1028/ShigureAI/releases/download/{version}/{base_filename}",
-            f"https://ghfast.top/https://github.com/Arantir1028/ShigureAI/releases/download/{version}/{base_filename}",
-            f"https://mirror.ghproxy.com/https://github.com/Arantir1028/ShigureAI/releases/download/{version}/{base_filename}",
-        ]
-
-    def download_with_fallback(self, urls, dest_path):
-        """多源下载机制"""
+        return release_urls(version, f"ShigureAI_{version}.exe")
+
+    def get_delta_urls(self, version):
+        """从当前版本升级到 version 的补丁下载链接"""
+        return release_urls(version, delta_filename(__version__, version))
+
+    def download_update(self, release_data, version, dest_path, source_path=None):
+        """下载新版本：有补丁时下载补丁并应用到当前exe，补丁不可用或校验失败时下载完整文件"""
+        expected = release_asset_digest(release_data, f"ShigureAI_{version}.exe")
+        source_path = source_path or installed_executable()
+        if source_path:
+            delta_path = dest_path + '.delta'
+            try:
+                if self.download_with_fallback(self.get_delta_urls(version), delta_path, report_failure=False):
+                    self.update_status_label.setText("正在应用增量更新...")
+                    QApplication.processEvents()
+                    apply_delta_file(source_path, delta_path, dest_path)
+                    if expected and file_sha256(dest_path) != expected:
+                        os.remove(dest_path)
+                        raise DeltaError("生成的文件与发布的哈希不一致")
+                    metrics.increment('update.delta')
+                    self.update_status_label.setText("增量更新完成！")
+                    self.update_status_label.setStyleSheet("color: green;")
+                    return True
+            except (DeltaError, OSError) as e:
+                logger.warning("增量更新失败，改为下载完整文件: %s", e)
+            finally:
+                if os.path.exists(delta_path):
+                    os.remove(delta_path)
+
+        metrics.increment('update.full')
+        return self.download_with_fallback(self.get_download_urls(version), dest_path, expected)
+
+    def download_with_fallback(self, urls, dest_path, expected_sha256=None, report_failure=True):
+        """多源下载机制，给出 expected_sha256 时校验失败的下载源视为不可用"""
+        import requests  # 只在联网时加载，加快启动
         for i, url in enumerate(urls):
             try:
                 self.update_status_label.setText(f"尝试下载源 {i+1}/{len(urls)}...")
@@ -105,14 +224,21 @@ class VersionManager:
                                     self.update_status_label.setText(f"下载中... {progress:.1f}%")
                                     QApplication.processEvents()
                     
+                    if expected_sha256 and file_sha256(dest_path) != expected_sha256:
+                        logger.warning("下载源 %d 的文件校验失败", i + 1)
+                        os.remove(dest_path)
+                        continue
+
                     self.update_status_label.setText("下载完成！")
                     self.update_status_label.setStyleSheet("color: green;")
                     return True
                     
             except Exception as e:
-                print(f"下载源 {i+1} 失败: {e}")
+                logger.warning("下载源 %d 失败: %s", i + 1, e)
                 continue
         
+        if not report_failure:
+            return False
         self.update_status_label.setText("所有下载源均不可用")
         self.update_status_label.setStyleSheet("color: red;")
         return False
@@ -123,22 +249,9 @@ class VersionManager:
             self.update_status_label.setStyleSheet("color: blue;")
             QApplication.processEvents()
 
-            api_urls = [
-                "https://api.github.com/repos/Arantir1028/ShigureAI/releases/latest",
-                "https://ghfast.top/https://api.github.com/repos/Arantir1028/ShigureAI/releases/latest",
-                "https://mirror.ghproxy.com/https://api.github.com/repos/Arantir1028/ShigureAI/releases/latest"
-            ]
-            
-            release_data = None
-            for api_url in api_urls:
-                try:
-                    response = requests.get(api_url, timeout=10)
-                    if response.status_code == 200:
-                        release_data = response.json()
-                        break
-                except:
-                    continue
-            
+            # 只统计网络请求，不包括用户确认与下载
+            with metrics.timer('update_check'):
+                release_data = fetch_latest_release()
             if not release_data:
                 self.update_status_label.setText("无法连接到更新服务器")
                 self.update_status_label.setStyleSheet("color: red;")
@@ -152,6 +265,21 @@ class VersionManager:
                 self.update_status_label.setText(f"发现新版本: {latest_version}")
                 self.update_status_label.setStyleSheet("color: green;")
 
+                dest_path = f"ShigureAI_{latest_version}.exe"
+                staged = self.parent.update_prefetcher.staged()
+                if staged and staged['version'] == latest_version:
+                    # 已在后台下载并校验，直接使用
+                    self.parent.update_prefetcher.take_staged(latest_version, dest_path)
+                    self.update_status_label.setText("新版本已准备就绪")
+                    QMessageBox.information(
+                        parent_dialog,
+                        "发现新版本",
+                        f"当前版本: {__version__}\n"
+                        f"最新版本: {latest_version}\n\n"
+                        f"新版本已在后台下载完成: {dest_path}\n请关闭当前程序后运行新版本。"
+                    )
+                    return
+
                 reply = QMessageBox.question(
                     parent_dialog,
                     "发现新版本",
@@ -162,10 +290,9 @@ class VersionManager:
                 )
 
                 if reply == QMessageBox.Yes:
-                    download_urls = self.get_download_urls(latest_version)
-                    dest_path = f"ShigureAI_{latest_version}.exe"
-                    
-                    if self.download_with_fallback(download_urls, dest_path):
+                    with metrics.timer('update_download'):
+                        downloaded = self.download_update(release_data, latest_version, dest_path)
+                    if downloaded:
                         QMessageBox.information(
                             parent_dialog,
                             "下载完成",
@@ -188,16 +315,6 @@ class VersionManager:
                     f"当前版本 {__version__} 已是最新版本！"
                 )
 
-        except Exception as e:
-            self.update_status_label.setText("检查更新失败")
-            self.update_status_label.setStyleSheet("color: red;")
-            
-            QMessageBox.warning(
-                parent_dialog,
-                "检查更新",
-                f"检查更新时发生错误: {str(e)}"
-            )
-
         except ImportError:
             self.update_status_label.setText("缺少requests库")
             self.update_status_label.setStyleSheet("color: red;")
@@ -221,15 +338,4 @@ class VersionManager:
 
     def compare_versions(self, version1, version2):
         """比较版本号 (返回1: v1>v2, 0: v1=v2, -1: v1<v2)"""
-        def version_to_tuple(v):
-            return tuple(map(int, v.split('.')))
-
-        v1_tuple = version_to_tuple(version1)
-        v2_tuple = version_to_tuple(version2)
-
-        if v1_tuple > v2_tuple:
-            return 1
-        elif v1_tuple < v2_tuple:
-            return -1
-        else:
-            return 0
+        return compare_versions(version1, version2)